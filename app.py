@@ -6,6 +6,7 @@ import threading
 import schedule
 import time
 import importlib
+import pandas as pd
 
 # Load environment variables
 load_dotenv()
@@ -42,19 +43,48 @@ from app.utils.data_processor import DataProcessor
 from app.utils.option_chain_analyzer import OptionChainAnalyzer
 from app.utils.news_analyzer import NewsAnalyzer
 from app.utils.technical_analyzer import TechnicalAnalyzer
+from app.utils.screener import Screener, load_universe
+from app.utils.correlation_monitor import CorrelationMonitor
+from app.utils.pattern_engine import PatternEngine
+from app.utils.chain_fetcher import ChainFetcher, DEFAULT_INDEX_UNDERLYINGS
+from app.utils.chain_history import ChainHistory
 
 # Initialize all components
 data_processor = DataProcessor()
 ml_model = MLModel()
 dl_model = DeepLearningModel()
 deepseek_model = DeepSeekModel(api_key=os.getenv("GROQ_API_KEY"))
-option_analyzer = OptionChainAnalyzer(api_wrapper)
+option_history = ChainHistory(os.getenv("OPTION_HISTORY_DIR", "data/option_history"))
+option_analyzer = OptionChainAnalyzer(api_wrapper, history=option_history)
+chain_fetcher = ChainFetcher(api_wrapper, expiries=int(os.getenv("OPTION_EXPIRIES", "2")))
 news_analyzer = NewsAnalyzer(api_key=os.getenv("NEWS_API_KEY"))
-technical_analyzer = TechnicalAnalyzer()
+technical_analyzer = TechnicalAnalyzer(latest_only=True, api_wrapper=api_wrapper)
+screener = Screener(technical_analyzer, workers=int(os.getenv("SCREEN_WORKERS", "8")))
+try:
+    pattern_engine = PatternEngine()
+except ImportError as e:
+    logger.warning(f"Candlestick patterns disabled: {str(e)}")
+    pattern_engine = None
 
 # Global variables
 trading_active = False
 analyzed_stocks = {}
+correlation_monitor = None
+bought_symbols = set()
+
+# Correlation above which a BUY is skipped when a correlated symbol was already bought
+CORRELATION_LIMIT = float(os.getenv("CORRELATION_LIMIT", "0.8"))
+CORRELATION_WINDOW = int(os.getenv("CORRELATION_WINDOW", "60"))
+
+# Symbols screened by /api/screen and WATCHLIST_SCREEN: a file with one symbol per line or a
+# comma-separated list; the watchlist when unset
+SCREEN_UNIVERSE = os.getenv("SCREEN_UNIVERSE")
+
+# Worker processes computing the watchlist's features (0 uses every core)
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "0"))
+
+# Index underlyings whose option chains are refreshed with the watchlist's every cycle
+OPTION_UNDERLYINGS = [symbol.strip() for symbol in os.getenv("OPTION_UNDERLYINGS", ",".join(DEFAULT_INDEX_UNDERLYINGS)).split(",") if symbol.strip()]
 
 @app.route('/')
 def index():
@@ -128,6 +158,189 @@ def analyze_stock():
         logger.error(f"Error analyzing stock {symbol}: {str(e)}")
         return jsonify({"error": f"Analysis failed: {str(e)}"}), 500
 
+@app.route('/api/screen', methods=['POST'])
+def screen_universe():
+    data = request.json or {}
+    condition = data.get('condition')
+    
+    if not condition:
+        return jsonify({"error": "Condition is required"}), 400
+    
+    try:
+        # Screen the given symbols, or the configured universe by default
+        symbols = data.get('symbols') or get_screen_universe()
+        panel = screener.fetch_panel(api_wrapper, symbols, days=data.get('days', 400))
+        candidates = screener.screen(
+            panel,
+            condition,
+            rank_by=data.get('rank_by'),
+            ascending=data.get('ascending', False),
+            limit=data.get('limit')
+        )
+        
+        return jsonify({
+            "condition": condition,
+            "universe_size": len(panel),
+            "candidates": screener.to_records(candidates)
+        })
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error screening universe: {str(e)}")
+        return jsonify({"error": f"Screen failed: {str(e)}"}), 500
+
+def get_screen_universe():
+    """Symbols of SCREEN_UNIVERSE, or the watchlist when it is unset"""
+    return load_universe(SCREEN_UNIVERSE) or api_wrapper.get_watchlist()
+
+def get_trading_watchlist():
+    """Watchlist for the trading loop, screened from the universe by the WATCHLIST_SCREEN condition when it is set"""
+    condition = os.getenv("WATCHLIST_SCREEN")
+    if not condition:
+        return api_wrapper.get_watchlist()
+    
+    # The universe's histories are cached by the screener for the day
+    candidates = screener.screen(
+        screener.fetch_panel(api_wrapper, get_screen_universe()),
+        condition,
+        rank_by=os.getenv("WATCHLIST_RANK_BY"),
+        limit=int(os.getenv("WATCHLIST_LIMIT", "20"))
+    )
+    return list(candidates.index)
+
+def update_correlation_monitor(histories):
+    """Seed the correlation monitor for a new watchlist, or add the daily bars completed since the last update"""
+    global correlation_monitor
+    closes = {symbol: data['close'] for symbol, data in histories.items() if data is not None and not data.empty}
+    if not closes:
+        return
+    
+    # The newest bar may still be forming; only the bars before it have final closes
+    completed = pd.DataFrame(closes).sort_index().iloc[:-1]
+    if completed.empty:
+        return
+    
+    if correlation_monitor is None or set(correlation_monitor.symbols) != set(closes):
+        correlation_monitor = CorrelationMonitor(list(closes), window=CORRELATION_WINDOW)
+        correlation_monitor.seed(completed)
+    else:
+        correlation_monitor.update_many(completed)
+
+@app.route('/api/correlation', methods=['GET'])
+def get_correlation():
+    try:
+        if correlation_monitor is None:
+            watchlist = api_wrapper.get_watchlist()
+            update_correlation_monitor({symbol: api_wrapper.get_historical_data(symbol, days=120) for symbol in watchlist})
+        if correlation_monitor is None:
+            return jsonify({"error": "No data for the correlation monitor"}), 404
+        
+        threshold = float(request.args.get('threshold', CORRELATION_LIMIT))
+        return jsonify(correlation_monitor.to_dict(threshold))
+    
+    except Exception as e:
+        logger.error(f"Error getting correlation: {str(e)}")
+        return jsonify({"error": f"Correlation failed: {str(e)}"}), 500
+
+@app.route('/api/patterns', methods=['GET'])
+def get_patterns():
+    if pattern_engine is None:
+        return jsonify({"error": "Candlestick patterns need TA-Lib"}), 503
+    
+    try:
+        symbol = request.args.get('symbol')
+        limit = int(request.args.get('limit', 100))
+        detections = pattern_engine.detections
+        if symbol:
+            detections = detections[detections['symbol'] == symbol]
+        detections = detections.iloc[-limit:].astype({'bar': str})
+        return jsonify({"patterns": detections.to_dict(orient='records')})
+    
+    except Exception as e:
+        logger.error(f"Error getting candlestick patterns: {str(e)}")
+        return jsonify({"error": f"Pattern lookup failed: {str(e)}"}), 500
+
+@app.route('/api/multi_timeframe', methods=['GET'])
+def get_multi_timeframe():
+    symbol = request.args.get('symbol')
+    if not symbol:
+        return jsonify({"error": "Symbol is required"}), 400
+    
+    try:
+        timeframes = request.args.get('timeframes')
+        analysis = technical_analyzer.analyze_multi_timeframe(symbol, timeframes=timeframes.split(',') if timeframes else None)
+        if not analysis:
+            return jsonify({"error": f"No minute data for {symbol}"}), 404
+        for indicators in analysis['timeframes'].values():
+            indicators['bar_time'] = str(indicators['bar_time']) if indicators['bar_time'] is not None else None
+        return jsonify(analysis)
+    
+    except Exception as e:
+        logger.error(f"Error in multi-timeframe analysis for {symbol}: {str(e)}")
+        return jsonify({"error": f"Multi-timeframe analysis failed: {str(e)}"}), 500
+
+@app.route('/api/greeks', methods=['GET'])
+def get_greeks():
+    try:
+        symbol = request.args.get('symbol')
+        if not symbol:
+            # Aggregate Greeks of the current positions
+            return jsonify(option_analyzer.portfolio_greeks())
+        
+        greeks = option_analyzer.greeks(symbol)
+        if greeks is None:
+            option_analyzer.analyze(symbol)
+            greeks = option_analyzer.greeks(symbol)
+        if greeks is None:
+            return jsonify({"error": f"No option chain for {symbol}"}), 404
+        greeks = greeks.astype({'expiry': str}).astype(object).where(greeks.notna(), None)
+        return jsonify({"symbol": symbol, "greeks": greeks.to_dict(orient='records')})
+    
+    except Exception as e:
+        logger.error(f"Error getting Greeks: {str(e)}")
+        return jsonify({"error": f"Greeks failed: {str(e)}"}), 500
+
+@app.route('/api/oi_buildup', methods=['GET'])
+def get_oi_buildup():
+    try:
+        symbol = request.args.get('symbol')
+        buildup = option_analyzer.oi_buildup(symbol, changed_since=request.args.get('since'))
+        if buildup is None:
+            return jsonify({"error": f"No option chain analyzed for {symbol}"}), 404
+        return jsonify(buildup)
+    
+    except Exception as e:
+        logger.error(f"Error getting OI build-up: {str(e)}")
+        return jsonify({"error": f"OI build-up failed: {str(e)}"}), 500
+
+@app.route('/api/strategies', methods=['GET'])
+def get_strategies():
+    symbol = request.args.get('symbol')
+    if not symbol:
+        return jsonify({"error": "Symbol is required"}), 400
+    
+    try:
+        kinds = request.args.get('kinds')
+        strategies = option_analyzer.strategies(
+            symbol,
+            expiries=int(request.args.get('expiries', 1)),
+            kinds=kinds.split(',') if kinds else None,
+            rank_by=request.args.get('rank_by', 'expected_value'),
+            top=int(request.args.get('top', 20))
+        )
+        if strategies is None:
+            return jsonify({"error": f"No option chain analyzed for {symbol}"}), 404
+        strategies = strategies.replace([float('inf'), float('-inf')], float('nan'))
+        strategies = strategies.astype(object).where(strategies.notna(), None)
+        return jsonify({"symbol": symbol, "strategies": strategies.to_dict(orient='records')})
+    
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching option strategies for {symbol}: {str(e)}")
+        return jsonify({"error": f"Strategy search failed: {str(e)}"}), 500
+
 @app.route('/api/execute_trade', methods=['POST'])
 def execute_trade():
     data = request.json
@@ -182,14 +395,26 @@ def run_trading_bot():
         
         try:
             # Get watchlist
-            watchlist = api_wrapper.get_watchlist()
+            watchlist = get_trading_watchlist()
+            # Daily histories cached by the screener, with only their latest bars refetched
+            histories = screener.refresh(api_wrapper, watchlist)
+            watchlist = list(histories)
+            processed_histories = data_processor.process_many(histories, workers=PROCESS_WORKERS or None)
+            update_correlation_monitor(histories)
+            if pattern_engine is not None:
+                pattern_engine.scan({symbol: data for symbol, data in histories.items() if data is not None})
+            
+            # Option chains of every underlying and expiry in one concurrent fetch
+            # A watchlist symbol that is also an index underlying is fetched and recorded once
+            option_symbols = list(dict.fromkeys(OPTION_UNDERLYINGS + list(watchlist)))
+            option_panel = chain_fetcher.fetch(option_symbols)
+            option_analyses = option_analyzer.analyze_panel(option_panel, option_symbols)
             
             for symbol in watchlist:
                 # Analyze each stock
-                historical_data = api_wrapper.get_historical_data(symbol)
-                processed_data = data_processor.process(historical_data)
+                processed_data = processed_histories[symbol]
                 technical_indicators = technical_analyzer.analyze(processed_data)
-                option_chain_analysis = option_analyzer.analyze(symbol)
+                option_chain_analysis = option_analyses[symbol]
                 news_analysis = news_analyzer.analyze_for_symbol(symbol)
                 
                 ml_prediction = ml_model.predict(processed_data, technical_indicators)
@@ -212,22 +437,30 @@ def run_trading_bot():
                 # Execute trades with high confidence
                 if confidence_score > 0.85:  # High confidence for BUY
                     logger.info(f"High confidence BUY signal for {symbol}: {confidence_score}")
-                    api_wrapper.place_order(symbol, "BUY", 1)
+                    correlated = correlation_monitor.correlated_with(symbol, bought_symbols, CORRELATION_LIMIT) if correlation_monitor else []
+                    if correlated:
+                        # Avoid stacking the same risk through correlated symbols
+                        logger.warning(f"Skipping BUY for {symbol}: correlated with already bought {correlated}")
+                    else:
+                        api_wrapper.place_order(symbol, "BUY", 1)
+                        bought_symbols.add(symbol)
                 elif confidence_score < 0.15:  # High confidence for SELL
                     logger.info(f"High confidence SELL signal for {symbol}: {confidence_score}")
                     api_wrapper.place_order(symbol, "SELL", 1)
+                    bought_symbols.discard(symbol)
                 
                 # Store analysis
                 analyzed_stocks[symbol] = {
                     "symbol": symbol,
                     "confidence_score": confidence_score,
                     "trade_direction": "BUY" if confidence_score > 0.75 else "SELL" if confidence_score < 0.25 else "HOLD",
+                    "patterns": pattern_engine.latest(symbol)['pattern'].tolist() if pattern_engine is not None else [],
                     "timestamp": time.time()
                 }
                 
                 # Don't overwhelm the API
                 time.sleep(1)
-                
+        
         except Exception as e:
             logger.error(f"Error in trading job: {str(e)}")
     
@@ -238,6 +471,7 @@ def run_trading_bot():
         schedule.run_pending()
         time.sleep(1)
     
+    option_history.flush()
     logger.info("Trading bot stopped")
 
 if __name__ == '__main__':
@@ -3,15 +3,82 @@ import numpy as np
 import logging
 import time
 import os
+import threading
+import zlib
 from datetime import datetime, timedelta
 
+from app.utils.option_chain_analyzer import DEFAULT_RISK_FREE_RATE
+from app.utils.option_pricing import DAYS_PER_YEAR, EXPIRY_TIME, black_scholes_price, exchange_time, time_to_expiry
+
 logger = logging.getLogger(__name__)
 
+# Strikes per expiry, spaced about this fraction of the listing price apart
+MOCK_STRIKES = 201
+MOCK_STRIKE_SPACING = 0.005
+STRIKE_STEPS = (0.5, 1, 2.5, 5, 10, 20, 25, 50, 100, 250, 500)
+
+# Weekly and monthly expiries listed
+MOCK_WEEKLY_EXPIRIES = 4
+MOCK_MONTHLY_EXPIRIES = 3
+
+PRICE_TICK = 0.05
+
+
+def smile_volatility(log_moneyness, years, atm_volatility, skew, curvature):
+    """
+    Implied volatility of a smooth smile without static arbitrage
+    
+    Total variance is atm_volatility^2 * years * (1 + curvature * (skew * x +
+    sqrt(x^2 + 1) - 1)), with x the log-moneyness in standard deviations. It
+    grows with years at every x and only linearly in the wings, which keeps
+    calendar spreads and butterflies non-negative for the mild skews and
+    curvatures the mock draws.
+    
+    Args:
+        log_moneyness (array): log(strike / forward)
+        years (float): Years to expiry
+        atm_volatility (float): At-the-money volatility
+        skew (float): Correlation-like tilt in (-1, 1); negative for a put skew
+        curvature (float): Wing steepness in [0, 1)
+    
+    Returns:
+        numpy.ndarray: Implied volatilities
+    """
+    deviation = atm_volatility * np.sqrt(years)
+    x = np.asarray(log_moneyness, dtype=np.float64) / deviation
+    variance = deviation ** 2 * (1 + curvature * (skew * x + np.sqrt(x * x + 1) - 1))
+    return np.sqrt(variance / years)
+
+
+def mock_expiry_dates(now, weekly=MOCK_WEEKLY_EXPIRIES, monthly=MOCK_MONTHLY_EXPIRIES):
+    """
+    Weekly and monthly Thursday expiries that have not closed yet
+    
+    Args:
+        now (Timestamp): Current time
+        weekly (int): Coming Thursdays listed
+        monthly (int): Coming month-end Thursdays listed
+    
+    Returns:
+        list: Expiry dates (YYYY-MM-DD), nearest first
+    """
+    now = pd.Timestamp(now)
+    first = now.normalize()
+    if now > first + EXPIRY_TIME:
+        first += pd.Timedelta(days=1)
+    thursdays = pd.date_range(first, periods=weekly, freq='W-THU')
+    month_end = first + pd.offsets.MonthEnd(0)
+    month_ends = pd.DatetimeIndex([month_end + pd.offsets.MonthEnd(i) for i in range(monthly + 1)])
+    last_thursdays = month_ends - pd.to_timedelta((month_ends.dayofweek - 3) % 7, unit='D')
+    last_thursdays = last_thursdays[last_thursdays >= first][:monthly]
+    return [day.strftime('%Y-%m-%d') for day in thursdays.union(last_thursdays)]
+
+
 class MockAPIWrapper:
     """
     A mock implementation of the SmartAPIWrapper for testing without the actual API
     """
-    def __init__(self, api_key, secret_key, client_code, totp=None):
+    def __init__(self, api_key, secret_key, client_code, totp=None, seed=0, strikes=MOCK_STRIKES):
         """
         Initialize the Mock API wrapper with credentials
         
@@ -20,6 +87,8 @@ class MockAPIWrapper:
             secret_key (str): Secret key (not used)
             client_code (str): Client code (not used)
             totp (str, optional): Time-based One-Time Password (not used)
+            seed (int): Seed of the simulated underlyings and option chains
+            strikes (int): Strikes listed per expiry
         """
         self.api_key = api_key
         self.secret_key = secret_key
@@ -28,6 +97,12 @@ class MockAPIWrapper:
         self.session_token = "mock_session_token"
         self.refresh_token = "mock_refresh_token"
         self.feed_token = "mock_feed_token"
+        self.seed = seed
+        self.strikes = strikes
+        self._offset = pd.Timedelta(0)
+        self._underlyings = {}
+        self._chains = {}
+        self._lock = threading.Lock()
         self.user_profile = {
             "status": True,
             "data": {
@@ -98,57 +173,166 @@ class MockAPIWrapper:
         
         return df
     
+    def _underlying(self, symbol):
+        """
+        State of a symbol's simulated underlying, advanced to the mock clock
+        
+        The price follows a geometric Brownian motion at the risk-free drift,
+        stepped by the calendar time since the previous request. Strikes are
+        listed once, around the first price.
+        """
+        now = self.now()
+        state = self._underlyings.get(symbol)
+        if state is None:
+            rng = np.random.default_rng([self.seed, zlib.crc32(symbol.encode())])
+            price = rng.uniform(100, 5000)
+            target = price * MOCK_STRIKE_SPACING
+            step = min(STRIKE_STEPS, key=lambda candidate: abs(np.log(candidate / target)))
+            centre = round(price / step) * step
+            strikes = centre + step * (np.arange(self.strikes) - self.strikes // 2)
+            state = self._underlyings[symbol] = {
+                'rng': rng,
+                'price': price,
+                'time': now,
+                'volatility': rng.uniform(0.15, 0.45),
+                'skew': rng.uniform(-0.6, -0.2),
+                'curvature': rng.uniform(0.2, 0.5),
+                'strikes': strikes[strikes > 0],
+                'open_interest': rng.uniform(5e4, 5e5)
+            }
+            return state
+        
+        years = (now - state['time']) / pd.Timedelta(days=1) / DAYS_PER_YEAR
+        if years > 0:
+            volatility = state['volatility']
+            state['price'] *= np.exp((DEFAULT_RISK_FREE_RATE - 0.5 * volatility ** 2) * years
+                                     + volatility * np.sqrt(years) * state['rng'].standard_normal())
+            state['time'] = now
+        return state
+    
+    def now(self):
+        """Current exchange-local time of the mock market (naive)"""
+        return exchange_time().tz_localize(None) + self._offset
+    
+    def advance(self, seconds):
+        """
+        Move the mock market clock forward
+        
+        Args:
+            seconds (float): Simulated seconds to skip
+        """
+        with self._lock:
+            self._offset += pd.Timedelta(seconds=seconds)
+    
     def get_option_chain(self, symbol, expiry_date=None):
-        """Get mock option chain for a symbol"""
-        logger.info(f"Getting mock option chain for {symbol}")
+        """
+        Get a mock option chain for a symbol
         
-        # Generate mock option chain
-        current_price = self.get_ltp(symbol)
+        Options are priced with Black-Scholes from a smooth, arbitrage-free
+        smile at the current underlying price, so the chain moves with
+        get_ltp. Open interest changes now and then and volume accumulates
+        through the day, both concentrated around the underlying.
         
-        # Generate strike prices around current price
-        strike_prices = [round(current_price * (1 + i * 0.025), 1) for i in range(-10, 11)]
+        Args:
+            symbol (str): Underlying symbol
+            expiry_date (str, optional): Expiry date (defaults to the nearest)
         
-        # Generate mock option data
-        option_chain = []
-        for strike in strike_prices:
-            # Call option
-            call = {
-                "strike": strike,
-                "type": "CE",
-                "expiry": expiry_date or "2025-03-31",
-                "ltp": max(0, round(current_price - strike + np.random.uniform(5, 15), 2)),
-                "iv": round(np.random.uniform(20, 60), 2),
-                "volume": int(np.random.uniform(100, 10000)),
-                "oi": int(np.random.uniform(1000, 100000))
-            }
+        Returns:
+            dict: Rows with a call and a put per strike, the underlying price and the expiry dates
+        """
+        logger.info(f"Getting mock option chain for {symbol}")
+        expiry_dates = self.get_expiry_dates(symbol)
+        expiry = expiry_date or expiry_dates[0]
+        
+        with self._lock:
+            state = self._underlying(symbol)
+            now, spot, strikes = state['time'], state['price'], state['strikes']
+            years = float(time_to_expiry(expiry, now=now)[0])
+            forward = spot * np.exp(DEFAULT_RISK_FREE_RATE * years)
+            atm_volatility = state['volatility'] * (1 + 0.15 * np.exp(-12 * years))
+            iv = smile_volatility(np.log(strikes / forward), max(years, 1 / DAYS_PER_YEAR), atm_volatility,
+                                  state['skew'], state['curvature'])
+            
+            # Calls in the first row, puts in the second
+            is_call = np.array([[True], [False]])
+            prices = black_scholes_price(spot, strikes, years, iv, DEFAULT_RISK_FREE_RATE, 0.0, is_call)
+            prices = np.maximum(np.round(prices / PRICE_TICK) * PRICE_TICK, PRICE_TICK)
             
-            # Put option
-            put = {
+            # Trading concentrates within a couple of standard deviations of the underlying
+            deviation = np.log(strikes / spot) / (atm_volatility * np.sqrt(max(years, 1 / DAYS_PER_YEAR)))
+            activity = np.exp(-0.5 * (deviation / 1.5) ** 2)
+            activity = np.vstack([activity * (1 + 0.5 * (deviation > 0)), activity * (1 + 0.5 * (deviation < 0))])
+            oi, volume = self._activity(symbol, expiry, state, activity, now)
+        
+        def per_option(values):
+            # Call then put of every strike, as the feeds list them
+            return np.broadcast_to(values, prices.shape).T.ravel().tolist()
+        
+        rows = [
+            {
                 "strike": strike,
-                "type": "PE",
-                "expiry": expiry_date or "2025-03-31",
-                "ltp": max(0, round(strike - current_price + np.random.uniform(5, 15), 2)),
-                "iv": round(np.random.uniform(20, 60), 2),
-                "volume": int(np.random.uniform(100, 10000)),
-                "oi": int(np.random.uniform(1000, 100000))
+                "type": option_type,
+                "expiry": expiry,
+                "ltp": ltp,
+                "iv": option_iv,
+                "volume": option_volume,
+                "oi": option_oi
             }
-            
-            option_chain.append(call)
-            option_chain.append(put)
+            for strike, option_type, ltp, option_iv, option_volume, option_oi in zip(
+                per_option(np.round(strikes, 2)), per_option(np.where(is_call, 'CE', 'PE')),
+                per_option(np.round(prices, 2)), per_option(np.round(iv * 100, 2)),
+                per_option(volume), per_option(oi)
+            )
+        ]
         
         return {
-            "data": option_chain,
-            "underlying": current_price,
-            "expiry_dates": ["2025-03-31", "2025-04-30", "2025-05-31"]
+            "data": rows,
+            "underlying": round(spot, 2),
+            "expiry_dates": expiry_dates
         }
     
+    def _activity(self, symbol, expiry, state, activity, now):
+        """Open interest and the day's volume of one expiry, evolved to now"""
+        key = (symbol, expiry)
+        chain = self._chains.get(key)
+        rng = state['rng']
+        if chain is None or chain['oi'].shape != activity.shape:
+            oi = np.round(state['open_interest'] * activity * rng.lognormal(0, 0.3, activity.shape))
+            chain = self._chains[key] = {'oi': oi, 'volume': np.zeros(activity.shape), 'time': now}
+            
+        minutes = max((now - chain['time']) / pd.Timedelta(minutes=1), 0.0)
+        if now.date() != chain['time'].date():
+            chain['volume'] = np.zeros(activity.shape)
+        if minutes:
+            # Exchanges publish OI every few minutes, so only some options change
+            changed = rng.random(activity.shape) < 1 - np.exp(-minutes / 3)
+            change = np.round(chain['oi'] * rng.normal(0, 0.02, activity.shape) + rng.normal(0, 50, activity.shape))
+            chain['oi'] = np.maximum(chain['oi'] + np.where(changed, change, 0), 0)
+            chain['volume'] += rng.poisson(state['open_interest'] * 0.002 * activity * minutes)
+            chain['time'] = now
+        return chain['oi'].astype(np.int64), chain['volume'].astype(np.int64)
+    
+    def get_expiry_dates(self, symbol):
+        """
+        Get mock option expiry dates for a symbol
+        
+        Weekly expiries fall on the coming Thursdays and monthly ones on the
+        last Thursday of the coming months.
+        
+        Args:
+            symbol (str): Underlying symbol
+        
+        Returns:
+            list: Expiry dates (YYYY-MM-DD), nearest first
+        """
+        return mock_expiry_dates(self.now())
+    
     def get_ltp(self, symbol, exchange="NSE"):
-        """Get mock last traded price for a symbol"""
+        """Get mock last traded price for a symbol, following its simulated path"""
         logger.info(f"Getting mock LTP for {symbol}")
         
-        # Generate a consistent price based on the symbol
-        np.random.seed(hash(symbol) % 10000)
-        price = np.random.uniform(100, 5000)
+        with self._lock:
+            price = self._underlying(symbol)['price']
         
         return round(price, 2)
     
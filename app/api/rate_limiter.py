@@ -0,0 +1,49 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """
+    Token bucket limiting the request rate of every thread sharing it
+    
+    Tokens refill continuously at `rate` per second up to `burst`; each
+    request takes one, waiting for the refill when the bucket is empty.
+    Waiting threads are served in the order their tokens were reserved.
+    """
+    def __init__(self, rate=3.0, burst=None):
+        """
+        Args:
+            rate (float): Sustained requests per second
+            burst (int, optional): Requests allowed back to back (defaults to rate, at least 1)
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self, tokens=1):
+        """
+        Take tokens, sleeping until the bucket can supply them
+        
+        Args:
+            tokens (int): Number of requests about to be made
+        
+        Returns:
+            float: Seconds waited
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the tokens now, going into debt, so later callers queue behind this one
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait > 0:
+            time.sleep(wait)
+        return wait
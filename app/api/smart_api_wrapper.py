@@ -6,10 +6,12 @@ import os
 import pyotp
 from datetime import datetime, timedelta
 
+from app.api.rate_limiter import RateLimiter
+
 logger = logging.getLogger(__name__)
 
 class SmartAPIWrapper:
-    def __init__(self, api_key, secret_key, client_code, totp=None):
+    def __init__(self, api_key, secret_key, client_code, totp=None, rate_limiter=None):
         """
         Initialize the Smart API wrapper with credentials
         
@@ -18,11 +20,14 @@ class SmartAPIWrapper:
             secret_key (str): Angel One secret key
             client_code (str): Angel One client code
             totp (str, optional): Time-based One-Time Password for 2FA or TOTP secret
+            rate_limiter (RateLimiter, optional): Limiter shared by every API request
+                (defaults to API_RATE_LIMIT requests per second)
         """
         self.api_key = api_key
         self.secret_key = secret_key
         self.client_code = client_code
         self.totp = totp
+        self.rate_limiter = rate_limiter or RateLimiter(rate=float(os.getenv("API_RATE_LIMIT", "3")))
         self.smart_api = SmartConnect(api_key=api_key)
         self.session_token = None
         self.refresh_token = None
@@ -114,6 +119,7 @@ class SmartAPIWrapper:
                 "todate": to_date_str
             }
             
+            self.rate_limiter.acquire()
             resp = self.smart_api.getCandleData(historic_param)
             
             if resp['status']:
@@ -144,11 +150,12 @@ class SmartAPIWrapper:
         try:
             # If no expiry date is provided, get the nearest expiry
             if not expiry_date:
-                expiry_dates = self.smart_api.getExpiryDate(symbol, "NFO")
-                if expiry_dates['status']:
-                    expiry_date = expiry_dates['data'][0]
+                expiry_dates = self.get_expiry_dates(symbol)
+                if expiry_dates:
+                    expiry_date = expiry_dates[0]
             
             # Get option chain
+            self.rate_limiter.acquire()
             option_chain = self.smart_api.getOptionChain(symbol, expiry_date, "NFO")
             
             if option_chain['status']:
@@ -161,6 +168,30 @@ class SmartAPIWrapper:
             logger.error(f"Error getting option chain for {symbol}: {str(e)}")
             return {}
     
+    def get_expiry_dates(self, symbol):
+        """
+        Get the option expiry dates of a symbol
+        
+        Args:
+            symbol (str): Stock or index symbol
+        
+        Returns:
+            list: Expiry dates, nearest first
+        """
+        try:
+            self.rate_limiter.acquire()
+            expiry_dates = self.smart_api.getExpiryDate(symbol, "NFO")
+            
+            if expiry_dates['status']:
+                return list(expiry_dates['data'])
+            else:
+                logger.error(f"Failed to get expiry dates: {expiry_dates['message']}")
+                return []
+        
+        except Exception as e:
+            logger.error(f"Error getting expiry dates for {symbol}: {str(e)}")
+            return []
+    
     def get_ltp(self, symbol, exchange="NSE"):
         """Get last traded price for a symbol"""
         try:
@@ -170,6 +201,7 @@ class SmartAPIWrapper:
                 "tradingsymbol": symbol,
                 "symboltoken": token
             }
+            self.rate_limiter.acquire()
             resp = self.smart_api.ltpData(ltp_param)
             
             if resp['status']:
@@ -215,6 +247,7 @@ class SmartAPIWrapper:
                 "quantity": quantity
             }
             
+            self.rate_limiter.acquire()
             order_resp = self.smart_api.placeOrder(order_params)
             
             if order_resp['status']:
@@ -240,6 +273,7 @@ class SmartAPIWrapper:
     def get_order_status(self, order_id):
         """Get status of an order"""
         try:
+            self.rate_limiter.acquire()
             order_history = self.smart_api.orderBook()
             
             if order_history['status']:
@@ -259,6 +293,7 @@ class SmartAPIWrapper:
     def get_positions(self):
         """Get current positions"""
         try:
+            self.rate_limiter.acquire()
             positions = self.smart_api.position()
             
             if positions['status']:
@@ -280,6 +315,7 @@ class SmartAPIWrapper:
     def _get_token(self, symbol, exchange):
         """Get token for a symbol"""
         try:
+            self.rate_limiter.acquire()
             resp = self.smart_api.getScripMaster(exchange, symbol)
             if resp['status']:
                 for item in resp['data']:
@@ -287,6 +323,7 @@ class SmartAPIWrapper:
                         return item['token']
             
             # If not found, try to search
+            self.rate_limiter.acquire()
             search_resp = self.smart_api.searchScrip(exchange, symbol)
             if search_resp['status']:
                 return search_resp['data'][0]['token']
@@ -2,11 +2,11 @@ import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 import joblib
 import os
 import logging
+from app.utils.feature_normalizer import FeatureNormalizer
 
 logger = logging.getLogger(__name__)
 
@@ -19,8 +19,9 @@ class MLModel:
             model_path (str, optional): Path to saved model
         """
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None  # StandardScaler of models saved before the normalizer
         self.features = []
+        self.normalizer = None  # FeatureNormalizer fitted on the training rows, persisted with the model
         self.model_path = model_path or 'app/models/saved/ml_model.joblib'
         
         # Try to load pre-trained model if it exists
@@ -39,8 +40,10 @@ class MLModel:
         try:
             model_data = joblib.load(self.model_path)
             self.model = model_data['model']
-            self.scaler = model_data['scaler']
+            self.scaler = model_data.get('scaler')
             self.features = model_data['features']
+            if model_data.get('normalizer'):
+                self.normalizer = FeatureNormalizer.from_dict(model_data['normalizer'])
             logger.info(f"Loaded ML model from {self.model_path}")
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
@@ -59,8 +62,8 @@ class MLModel:
             
             model_data = {
                 'model': self.model,
-                'scaler': self.scaler,
-                'features': self.features
+                'features': self.features,
+                'normalizer': self.normalizer.to_dict() if self.normalizer else None
             }
             joblib.dump(model_data, self.model_path)
             logger.info(f"Saved ML model to {self.model_path}")
@@ -76,7 +79,7 @@ class MLModel:
             technical_indicators (dict, optional): Technical indicators
             
         Returns:
-            numpy.ndarray: Feature matrix
+            pandas.DataFrame: Unscaled features, one row per bar
         """
         # Create a copy to avoid modifying the original data
         df = data.copy()
@@ -121,16 +124,25 @@ class MLModel:
         # Drop NaN values
         df.dropna(inplace=True)
         
-        # Store feature names
-        self.features = [col for col in df.columns if col not in ['open', 'high', 'low', 'close', 'volume']]
-        
-        # Return feature matrix
-        X = df[self.features].values
+        return df[[col for col in df.columns if col not in ['open', 'high', 'low', 'close', 'volume']]]
+    
+    def _scale(self, features):
+        """
+        Scale features with the statistics fitted at training time
         
-        # Scale features
-        X = self.scaler.fit_transform(X)
+        Args:
+            features (pandas.DataFrame): Unscaled features
         
-        return X
+        Returns:
+            numpy.ndarray: Feature matrix in the trained feature order
+        """
+        features = features.reindex(columns=self.features)
+        if self.normalizer is not None:
+            return self.normalizer.transform(features).to_numpy(dtype=np.float64)
+        if self.scaler is not None:
+            # Models saved before the normalizer keep their fitted scaler
+            return self.scaler.transform(features.to_numpy(dtype=np.float64))
+        raise ValueError("ML model has no fitted feature statistics; train it first")
     
     def train(self, historical_data, labels, technical_indicators=None):
         """
@@ -146,11 +158,20 @@ class MLModel:
         """
         try:
             # Prepare features
-            X = self._prepare_features(historical_data, technical_indicators)
+            features = self._prepare_features(historical_data, technical_indicators)
+            self.features = list(features.columns)
             y = labels
             
             # Split data
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+            train_rows, test_rows, y_train, y_test = train_test_split(
+                np.arange(len(features)), y, test_size=0.2, random_state=42
+            )
+            
+            # Fit scaling statistics on the training rows only, so test and live data never leak into them
+            self.normalizer = FeatureNormalizer().fit(features.iloc[train_rows])
+            self.scaler = None
+            X = self._scale(features)
+            X_train, X_test = X[train_rows], X[test_rows]
             
             # Define parameter grid for hyperparameter tuning
             param_grid = {
@@ -209,10 +230,15 @@ class MLModel:
         """
         try:
             # Prepare features
-            X = self._prepare_features(data, technical_indicators)
+            features = self._prepare_features(data, technical_indicators)
             
-            # Get the most recent data point for prediction
-            X_pred = X[-1].reshape(1, -1)
+            # Scale only the most recent data point, with the training statistics
+            if self.normalizer is not None:
+                latest = features.iloc[-1]
+                normalized = self.normalizer.transform_row(latest)
+                X_pred = np.array([[normalized.get(col, latest.get(col, np.nan)) for col in self.features]])
+            else:
+                X_pred = self._scale(features.iloc[-1:])
             
             # Make prediction
             prediction = self.model.predict(X_pred)[0]
@@ -265,7 +291,7 @@ class MLModel:
         """
         try:
             # Prepare features
-            X_test = self._prepare_features(test_data, technical_indicators)
+            X_test = self._scale(self._prepare_features(test_data, technical_indicators))
             y_test = test_labels
             
             # Make predictions
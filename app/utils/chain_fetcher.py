@@ -0,0 +1,130 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+
+from app.utils.option_chain_analyzer import ChainPanel, OptionChain
+
+logger = logging.getLogger(__name__)
+
+# Index underlyings fetched alongside the stock F&O symbols
+DEFAULT_INDEX_UNDERLYINGS = ('NIFTY', 'BANKNIFTY')
+
+
+class ChainFetcher:
+    """
+    Fetches the option chains of many underlyings and expiries concurrently
+    
+    Every request (underlying price, expiry list and one chain per expiry)
+    runs on a thread pool; the API wrapper's shared rate limiter paces them,
+    so the pool only hides network latency. Expiry lists are cached for the
+    day. The chains are parsed as they arrive and combined into one
+    ChainPanel.
+    """
+    
+    def __init__(self, api_wrapper, expiries=2, workers=8):
+        """
+        Args:
+            api_wrapper: API wrapper with get_ltp, get_expiry_dates and get_option_chain
+            expiries (int): Nearest expiries fetched per underlying
+            workers (int): Concurrent requests
+        """
+        self.api_wrapper = api_wrapper
+        self.expiries = expiries
+        self.workers = workers
+        self._expiry_dates = {}
+    
+    def expiry_dates(self, symbol):
+        """
+        Nearest expiries of a symbol, cached until the date changes
+        
+        Args:
+            symbol (str): Underlying symbol
+        
+        Returns:
+            list: Up to `expiries` expiry dates; [None] (the API's default
+                expiry) when the wrapper cannot list them
+        """
+        today = date.today()
+        cached = self._expiry_dates.get(symbol)
+        if cached is not None and cached[0] == today:
+            return cached[1]
+        
+        dates = []
+        if hasattr(self.api_wrapper, 'get_expiry_dates'):
+            dates = list(self.api_wrapper.get_expiry_dates(symbol) or [])[:self.expiries]
+        if not dates:
+            return [None]
+        self._expiry_dates[symbol] = (today, dates)
+        return dates
+    
+    def _prepare(self, symbol):
+        """Underlying price and expiries of one symbol"""
+        return self.api_wrapper.get_ltp(symbol), self.expiry_dates(symbol)
+    
+    def _fetch_chain(self, symbol, expiry):
+        """Parsed chain of one symbol and expiry"""
+        response = self.api_wrapper.get_option_chain(symbol, expiry)
+        if not response:
+            return None
+        chain = OptionChain.from_response(response)
+        if expiry is not None and len(chain):
+            # Feeds that omit the expiry on every row still need it to group options
+            missing = np.array([label is None for label in chain.expiry], dtype=bool)
+            chain.expiry[missing] = expiry
+        return chain
+    
+    def fetch(self, symbols):
+        """
+        Fetch the chains of all configured expiries for a list of underlyings
+        
+        Args:
+            symbols (list): Underlying symbols (indices and F&O stocks)
+        
+        Returns:
+            ChainPanel: Combined chains, in the order of symbols; symbols
+                without a price or any chain are left out
+        """
+        symbols = list(dict.fromkeys(symbols))
+        prices, requested, parts = {}, {}, {symbol: [] for symbol in symbols}
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            pending = {executor.submit(self._prepare, symbol): symbol for symbol in symbols}
+            chain_requests = {}
+            for future in as_completed(pending):
+                symbol = pending[future]
+                try:
+                    price, expiries = future.result()
+                except Exception as e:
+                    logger.error(f"Error preparing option chain fetch for {symbol}: {str(e)}")
+                    continue
+                if not price:
+                    logger.warning(f"Could not get current price for {symbol}")
+                    continue
+                prices[symbol] = float(price)
+                requested[symbol] = expiries
+                for expiry in expiries:
+                    chain_requests[executor.submit(self._fetch_chain, symbol, expiry)] = (symbol, expiry)
+            
+            for future in as_completed(chain_requests):
+                symbol, expiry = chain_requests[future]
+                try:
+                    chain = future.result()
+                except Exception as e:
+                    logger.error(f"Error fetching option chain for {symbol} {expiry}: {str(e)}")
+                    continue
+                if chain is None or not len(chain):
+                    logger.warning(f"Could not get option chain for {symbol} {expiry}")
+                    continue
+                parts[symbol].append((expiry, chain))
+        
+        chains = {}
+        for symbol in symbols:
+            if symbol in prices and parts[symbol]:
+                # Requested expiry order, whatever order the responses arrived in
+                order = {expiry: i for i, expiry in enumerate(requested[symbol])}
+                ordered = sorted(parts[symbol], key=lambda part: order.get(part[0], len(order)))
+                chains[symbol] = OptionChain.concatenate([chain for _, chain in ordered], underlying=prices[symbol])
+        logger.info(f"Fetched option chains of {len(chains)}/{len(symbols)} underlyings, "
+                    f"{sum(len(chain) for chain in chains.values())} options")
+        return ChainPanel(chains)
@@ -0,0 +1,341 @@
+import logging
+import os
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from app.utils.option_chain_analyzer import OptionChain
+
+logger = logging.getLogger(__name__)
+
+# Quote fields stored per option; iv is the feed's quoted IV
+FIELDS = ('ltp', 'iv', 'volume', 'oi')
+
+# Snapshots per segment; every segment starts with a full snapshot
+DEFAULT_SEGMENT_LENGTH = 30
+
+# Decoded segments kept in memory for repeated queries
+SEGMENT_CACHE_SIZE = 8
+
+
+def _differs(previous, current):
+    """Elementwise inequality treating NaN as equal to NaN"""
+    return ~((previous == current) | (np.isnan(previous) & np.isnan(current)))
+
+
+def _timestamp_ns(timestamp):
+    """Timestamp (or now) as int64 nanoseconds"""
+    return int((pd.Timestamp.now() if timestamp is None else pd.Timestamp(timestamp)).value)
+
+
+class _OpenSegment:
+    """Segment being written: the options seen so far, their last values and the change log"""
+    
+    def __init__(self, start):
+        self.start = start
+        self.keys = {}
+        self.strike, self.is_call, self.expiry = [], [], []
+        self.state = {field: np.zeros(0) for field in FIELDS}
+        self.present = np.zeros(0, dtype=bool)
+        self.times, self.underlying = [], []
+        self.changes, self.removals = [], []
+        self._last_chain = None
+        self._last_ids = None
+    
+    def __len__(self):
+        return len(self.times)
+    
+    def _ids(self, chain):
+        """Option ids of the chain's options, registering new ones"""
+        last = self._last_chain
+        if (last is not None and len(last) == len(chain) and np.array_equal(last.strike, chain.strike)
+                and np.array_equal(last.is_call, chain.is_call) and np.array_equal(last.expiry, chain.expiry)):
+            return self._last_ids
+        ids = np.empty(len(chain), dtype=np.int64)
+        for i, key in enumerate(zip(chain.expiry, chain.strike.tolist(), chain.is_call.tolist())):
+            option = self.keys.get(key)
+            if option is None:
+                option = self.keys[key] = len(self.strike)
+                self.strike.append(key[1])
+                self.is_call.append(key[2])
+                self.expiry.append('' if key[0] is None else str(key[0]))
+            ids[i] = option
+        grow = len(self.strike) - len(self.present)
+        if grow:
+            for field in FIELDS:
+                self.state[field] = np.r_[self.state[field], np.full(grow, np.nan)]
+            self.present = np.r_[self.present, np.zeros(grow, dtype=bool)]
+        return ids
+    
+    def add(self, chain, timestamp):
+        """Append the options of chain that changed since the last snapshot"""
+        ids = self._ids(chain)
+        values = {field: getattr(chain, 'quoted_iv' if field == 'iv' else field) for field in FIELDS}
+        changed = ~self.present[ids]
+        for field in FIELDS:
+            changed |= _differs(self.state[field][ids], values[field])
+        current = np.zeros(len(self.present), dtype=bool)
+        current[ids] = True
+        removed = np.flatnonzero(self.present & ~current)
+        
+        rows = np.flatnonzero(changed)
+        self.changes.append((ids[rows], {field: values[field][rows] for field in FIELDS}))
+        self.removals.append(removed)
+        for field in FIELDS:
+            self.state[field][ids[rows]] = values[field][rows]
+        self.present = current
+        self.times.append(timestamp)
+        self.underlying.append(chain.underlying)
+        self._last_chain, self._last_ids = chain, ids
+        return len(rows)
+    
+    def arrays(self):
+        """Segment as flat arrays, the layout written to disk"""
+        return {
+            'times': np.array(self.times, dtype=np.int64),
+            'underlying': np.array(self.underlying, dtype=np.float64),
+            'strike': np.array(self.strike, dtype=np.float64),
+            'is_call': np.array(self.is_call, dtype=bool),
+            'expiry': np.array(self.expiry, dtype=str),
+            'offsets': np.r_[0, np.cumsum([len(ids) for ids, _ in self.changes])].astype(np.int64),
+            'option': np.concatenate([ids for ids, _ in self.changes]).astype(np.int32),
+            **{field: np.concatenate([values[field] for _, values in self.changes]) for field in FIELDS},
+            'removed_offsets': np.r_[0, np.cumsum([len(ids) for ids in self.removals])].astype(np.int64),
+            'removed': np.concatenate(self.removals).astype(np.int32)
+        }
+
+
+def _last_changes(option, offsets, count, n_options):
+    """
+    Last of the first `count` records touching each option
+    
+    Returns:
+        tuple: (record index, row in the change arrays), -1 for untouched options
+    """
+    record = np.full(n_options, -1, dtype=np.int64)
+    row = np.full(n_options, -1, dtype=np.int64)
+    upto = offsets[count]
+    if upto:
+        # First occurrence in the reversed log is the last write
+        touched, position = np.unique(option[:upto][::-1], return_index=True)
+        row[touched] = upto - 1 - position
+        record[touched] = np.searchsorted(offsets, row[touched], side='right') - 1
+    return record, row
+
+
+def _replay(segment, timestamp):
+    """
+    Chain state at a timestamp from a segment's change log
+    
+    Returns:
+        tuple: (OptionChain, timestamp of the snapshot used), (None, None) before the segment
+    """
+    count = int(np.searchsorted(segment['times'], timestamp, side='right'))
+    if not count:
+        return None, None
+    n_options = len(segment['strike'])
+    changed, rows = _last_changes(segment['option'], segment['offsets'], count, n_options)
+    removed, _ = _last_changes(segment['removed'], segment['removed_offsets'], count, n_options)
+    options = np.flatnonzero(changed > removed)
+    rows = rows[options]
+    
+    expiry = segment['expiry'][options].astype(object)
+    expiry[expiry == ''] = None
+    chain = OptionChain(
+        strike=segment['strike'][options],
+        is_call=segment['is_call'][options],
+        ltp=segment['ltp'][rows],
+        iv=segment['iv'][rows],
+        volume=segment['volume'][rows],
+        oi=segment['oi'][rows],
+        expiry=expiry,
+        underlying=segment['underlying'][count - 1]
+    )
+    return chain, pd.Timestamp(int(segment['times'][count - 1]))
+
+
+class ChainHistory:
+    """
+    Delta-encoded history of option chain snapshots per symbol
+    
+    Snapshots are grouped into segments of `segment_length`. A segment
+    starts with the full chain and then logs, per snapshot, only the options
+    whose price, quoted IV, volume or OI changed (plus the ones that
+    disappeared). Closed segments are written as compressed .npz files and
+    dropped from memory. Reconstructing the chain at any time loads one
+    segment and replays at most `segment_length` snapshots, vectorized.
+    """
+    
+    def __init__(self, directory=None, segment_length=DEFAULT_SEGMENT_LENGTH):
+        """
+        Args:
+            directory (str, optional): Where segments are stored; history stays
+                in memory when omitted
+            segment_length (int): Snapshots per segment
+        """
+        self.directory = directory
+        self.segment_length = segment_length
+        self._open = {}
+        self._closed = {}
+        self._cache = OrderedDict()
+    
+    def record(self, symbol, chain, timestamp=None):
+        """
+        Add a snapshot of a symbol's chain
+        
+        Args:
+            symbol (str): Underlying symbol
+            chain (OptionChain): Chain at the snapshot time
+            timestamp (Timestamp, optional): Snapshot time (defaults to now)
+        
+        Returns:
+            int: Number of options stored for this snapshot
+        """
+        timestamp = _timestamp_ns(timestamp)
+        segment = self._open.get(symbol)
+        if segment is not None and segment.times and timestamp <= segment.times[-1]:
+            logger.warning(f"Ignoring out-of-order option chain snapshot for {symbol}")
+            return 0
+        if segment is not None and len(segment) >= self.segment_length:
+            self._close(symbol)
+            segment = None
+        if segment is None:
+            segment = self._open[symbol] = _OpenSegment(timestamp)
+        return segment.add(chain, timestamp)
+    
+    def _path(self, symbol, start):
+        return os.path.join(self.directory, symbol, f"{start}.npz")
+    
+    def _close(self, symbol):
+        """Move the open segment of a symbol to storage"""
+        segment = self._open.pop(symbol, None)
+        if segment is None or not len(segment):
+            return
+        arrays = segment.arrays()
+        if self.directory:
+            self._write(symbol, segment.start, arrays)
+            self._closed.setdefault(symbol, {})[segment.start] = None
+        else:
+            self._closed.setdefault(symbol, {})[segment.start] = arrays
+    
+    def _write(self, symbol, start, arrays):
+        try:
+            path = self._path(symbol, start)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.savez_compressed(path, **arrays)
+        except Exception as e:
+            logger.error(f"Error writing option chain history for {symbol}: {str(e)}")
+    
+    def flush(self):
+        """Write the open segments to disk too (they stay open for further snapshots)"""
+        if not self.directory:
+            return
+        for symbol, segment in self._open.items():
+            if len(segment):
+                self._write(symbol, segment.start, segment.arrays())
+    
+    def _segment_starts(self, symbol):
+        """Start times of the stored segments of a symbol, including ones on disk from earlier runs"""
+        starts = set(self._closed.get(symbol, {}))
+        if self.directory and os.path.isdir(os.path.join(self.directory, symbol)):
+            for name in os.listdir(os.path.join(self.directory, symbol)):
+                if name.endswith('.npz') and name[:-4].lstrip('-').isdigit():
+                    starts.add(int(name[:-4]))
+        open_segment = self._open.get(symbol)
+        if open_segment is not None:
+            starts.discard(open_segment.start)
+        return sorted(starts)
+    
+    def _load(self, symbol, start):
+        """Arrays of a stored segment, through a small LRU cache"""
+        arrays = self._closed.get(symbol, {}).get(start)
+        if arrays is not None:
+            return arrays
+        key = (symbol, start)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        with np.load(self._path(symbol, start)) as data:
+            arrays = {name: data[name] for name in data.files}
+        self._cache[key] = arrays
+        if len(self._cache) > SEGMENT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return arrays
+    
+    def snapshot(self, symbol, timestamp=None, with_time=False):
+        """
+        Chain of a symbol as of a timestamp
+        
+        Args:
+            symbol (str): Underlying symbol
+            timestamp (Timestamp, optional): Time of interest (defaults to the latest snapshot)
+            with_time (bool): Also return the time of the snapshot used
+        
+        Returns:
+            OptionChain: Last recorded chain at or before timestamp, None if
+                there is none (and its timestamp when with_time is set)
+        """
+        target = np.iinfo(np.int64).max if timestamp is None else _timestamp_ns(timestamp)
+        chain, at = None, None
+        open_segment = self._open.get(symbol)
+        if open_segment is not None and open_segment.start <= target:
+            chain, at = _replay(open_segment.arrays(), target)
+        else:
+            starts = [start for start in self._segment_starts(symbol) if start <= target]
+            if starts:
+                chain, at = _replay(self._load(symbol, starts[-1]), target)
+        return (chain, at) if with_time else chain
+    
+    def timestamps(self, symbol):
+        """
+        Times of all recorded snapshots of a symbol
+        
+        Returns:
+            pandas.DatetimeIndex: Snapshot times, oldest first
+        """
+        times = [self._load(symbol, start)['times'] for start in self._segment_starts(symbol)]
+        if symbol in self._open:
+            times.append(np.array(self._open[symbol].times, dtype=np.int64))
+        return pd.to_datetime(np.concatenate(times) if times else np.zeros(0, dtype=np.int64))
+    
+    def oi_change(self, symbol, start, end=None):
+        """
+        Open interest change of every option between two times
+        
+        Args:
+            symbol (str): Underlying symbol
+            start (Timestamp): Beginning of the window
+            end (Timestamp, optional): End of the window (defaults to the latest snapshot)
+        
+        Returns:
+            pandas.DataFrame: strike, type, expiry, oi_start, oi_end, oi_change,
+                oi_change_pct and ltp_change per option in the end snapshot;
+                empty when the symbol has no snapshot at the end
+        """
+        columns = ['strike', 'type', 'expiry', 'oi_start', 'oi_end', 'oi_change', 'oi_change_pct', 'ltp_change']
+        last = self.snapshot(symbol, end)
+        if last is None:
+            return pd.DataFrame(columns=columns)
+        first = self.snapshot(symbol, start)
+        
+        oi_start = np.full(len(last), np.nan)
+        ltp_start = np.full(len(last), np.nan)
+        if first is not None and len(first):
+            index = first.locate(last)
+            known = index >= 0
+            oi_start[known] = first.oi[index[known]]
+            ltp_start[known] = first.ltp[index[known]]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = last.oi - oi_start
+            pct = np.where(oi_start > 0, change / oi_start * 100.0, np.nan)
+        return pd.DataFrame({
+            'strike': last.strike,
+            'type': np.where(last.is_call, 'CE', 'PE'),
+            'expiry': last.expiry,
+            'oi_start': oi_start,
+            'oi_end': last.oi,
+            'oi_change': change,
+            'oi_change_pct': pct,
+            'ltp_change': last.ltp - ltp_start
+        }, columns=columns)
@@ -0,0 +1,242 @@
+import logging
+import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class CorrelationMonitor:
+    def __init__(self, symbols, window=60, refresh_every=1000):
+        """
+        Initialize a rolling correlation/covariance monitor
+        
+        The monitor keeps the last window returns of every symbol together
+        with their running sum and sum of outer products. Each new bar adds
+        the new return vector and removes the one leaving the window as a
+        rank-2 update, O(symbols^2) instead of O(window * symbols^2) for a
+        recomputation. The sums are rebuilt from the window every
+        refresh_every bars to keep rounding errors from accumulating.
+        
+        Args:
+            symbols (list): Symbols to monitor
+            window (int): Number of returns in the rolling window
+            refresh_every (int): Bars between exact recomputations of the sums
+        """
+        self.symbols = list(symbols)
+        self.window = window
+        self.refresh_every = refresh_every
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._reset()
+    
+    def _reset(self):
+        n = len(self.symbols)
+        self._returns = np.zeros((self.window, n))
+        self._sum = np.zeros(n)
+        self._outer = np.zeros((n, n))
+        self._scratch = np.zeros((n, n))
+        self._next = 0
+        self.count = 0
+        self._updates = 0
+        self.last_prices = np.full(n, np.nan)
+        self.last_bar_time = None
+    
+    @property
+    def is_ready(self):
+        """Whether the window holds at least two returns"""
+        return self.count >= 2
+    
+    def seed(self, closes):
+        """
+        Fill the window from historical closes
+        
+        Args:
+            closes (pandas.DataFrame or dict): Close prices with one column
+                (or Series) per symbol
+        """
+        frame = pd.DataFrame(closes).reindex(columns=self.symbols).sort_index().ffill()
+        returns = frame.pct_change().iloc[1:].fillna(0.0).to_numpy(dtype=np.float64)[-self.window:]
+        
+        self._reset()
+        self._returns[:len(returns)] = returns
+        self.count = len(returns)
+        self._next = self.count % self.window
+        self._recompute()
+        
+        if not frame.empty:
+            self.last_prices = frame.iloc[-1].to_numpy(dtype=np.float64)
+            self.last_bar_time = frame.index[-1]
+        logger.info(f"Seeded correlation monitor with {self.count} returns for {len(self.symbols)} symbols")
+    
+    def update(self, prices, bar_time=None):
+        """
+        Add a new bar of prices
+        
+        Args:
+            prices (dict or array-like): Latest price per symbol; symbols
+                without a price keep their previous price (zero return)
+            bar_time (optional): Time of the bar; a repeated bar time is ignored
+        
+        Returns:
+            bool: Whether a return vector was added to the window
+        """
+        if bar_time is not None and self.last_bar_time is not None and bar_time <= self.last_bar_time:
+            return False
+        
+        if isinstance(prices, dict):
+            current = self.last_prices.copy()
+            for symbol, price in prices.items():
+                if symbol in self._positions:
+                    current[self._positions[symbol]] = price
+        else:
+            current = np.asarray(prices, dtype=np.float64)
+        current = np.where(np.isnan(current), self.last_prices, current)
+        
+        previous = self.last_prices
+        self.last_prices = current
+        if bar_time is not None:
+            self.last_bar_time = bar_time
+        if np.isnan(previous).all():
+            return False
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = current / previous - 1
+        self.update_returns(np.where(np.isfinite(returns), returns, 0.0))
+        return True
+    
+    def update_many(self, closes):
+        """
+        Add every bar of a close panel newer than the last bar added
+        
+        Args:
+            closes (pandas.DataFrame or dict): Close prices with one column
+                (or Series) per symbol, indexed by bar time
+        
+        Returns:
+            int: Number of bars added
+        """
+        frame = pd.DataFrame(closes).reindex(columns=self.symbols).sort_index()
+        if self.last_bar_time is not None:
+            frame = frame[frame.index > self.last_bar_time]
+        
+        added = 0
+        for bar_time, prices in zip(frame.index, frame.to_numpy(dtype=np.float64)):
+            added += self.update(prices, bar_time)
+        return added
+    
+    def update_returns(self, returns):
+        """
+        Add one return vector to the window with a rank-2 update of the sums
+        
+        Args:
+            returns (array-like): Return of every symbol for the new bar
+        """
+        new = np.asarray(returns, dtype=np.float64)
+        if self.count == self.window:
+            old = self._returns[self._next]
+            # new new^T - old old^T as one (n x 2) @ (2 x n) product
+            np.matmul(np.column_stack([new, old]), np.vstack([new, -old]), out=self._scratch)
+            self._outer += self._scratch
+            self._sum += new - old
+        else:
+            np.outer(new, new, out=self._scratch)
+            self._outer += self._scratch
+            self._sum += new
+            self.count += 1
+        
+        self._returns[self._next] = new
+        self._next = (self._next + 1) % self.window
+        self._updates += 1
+        if self._updates % self.refresh_every == 0:
+            self._recompute()
+    
+    def _recompute(self):
+        """Rebuild the running sums exactly from the returns in the window"""
+        window = self._returns[:self.count] if self.count < self.window else self._returns
+        self._sum = window.sum(axis=0)
+        self._outer = window.T @ window
+    
+    def covariance_matrix(self):
+        """Sample covariance of the returns in the window as an array"""
+        n = self.count
+        if n < 2:
+            return np.full(self._outer.shape, np.nan)
+        return (self._outer - np.outer(self._sum, self._sum) / n) / (n - 1)
+    
+    def correlation_matrix(self):
+        """Correlation of the returns in the window as an array (NaN for flat series)"""
+        cov = self.covariance_matrix()
+        std = np.sqrt(np.maximum(np.diag(cov), 0.0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[:, std == 0] = np.nan
+        corr[std == 0, :] = np.nan
+        np.clip(corr, -1.0, 1.0, out=corr)
+        np.fill_diagonal(corr, np.where(std > 0, 1.0, np.nan))
+        return corr
+    
+    def covariance(self):
+        """Covariance matrix labelled by symbol"""
+        return pd.DataFrame(self.covariance_matrix(), index=self.symbols, columns=self.symbols)
+    
+    def correlation(self):
+        """Correlation matrix labelled by symbol"""
+        return pd.DataFrame(self.correlation_matrix(), index=self.symbols, columns=self.symbols)
+    
+    def correlated_pairs(self, threshold=0.8):
+        """
+        Pairs of symbols whose correlation is at least threshold
+        
+        Returns:
+            list: (symbol, symbol, correlation) tuples, most correlated first
+        """
+        corr = self.correlation_matrix()
+        rows, cols = np.triu_indices(len(self.symbols), k=1)
+        values = corr[rows, cols]
+        with np.errstate(invalid='ignore'):
+            selected = np.flatnonzero(values >= threshold)
+        selected = selected[np.argsort(-values[selected], kind='stable')]
+        return [(self.symbols[rows[i]], self.symbols[cols[i]], float(values[i])) for i in selected]
+    
+    def correlated_with(self, symbol, others, threshold=0.8):
+        """
+        Symbols among others whose correlation with symbol is at least threshold
+        
+        Args:
+            symbol (str): Candidate symbol
+            others (iterable): Symbols already held or signalled
+            threshold (float): Correlation limit
+        
+        Returns:
+            list: (symbol, correlation) tuples, most correlated first
+        """
+        if symbol not in self._positions or not self.is_ready:
+            return []
+        others = [other for other in others if other in self._positions and other != symbol]
+        if not others:
+            return []
+        
+        # One row of the correlation matrix is enough
+        i = self._positions[symbol]
+        columns = [self._positions[other] for other in others]
+        n = self.count
+        cov = (self._outer[i, columns] - self._sum[i] * self._sum[columns] / n) / (n - 1)
+        variances = (np.diag(self._outer) - self._sum ** 2 / n) / (n - 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = cov / np.sqrt(variances[i] * variances[columns])
+        
+        matches = [(other, float(value)) for other, value in zip(others, corr) if value >= threshold]
+        return sorted(matches, key=lambda match: -match[1])
+    
+    def to_dict(self, threshold=0.8):
+        """Serializable summary for the dashboard"""
+        corr = self.correlation_matrix()
+        return {
+            'symbols': self.symbols,
+            'window': self.window,
+            'observations': self.count,
+            'last_bar_time': None if self.last_bar_time is None else str(self.last_bar_time),
+            'correlation': [[None if np.isnan(value) else round(float(value), 4) for value in row] for row in corr],
+            'correlated_pairs': [
+                {'pair': [first, second], 'correlation': round(value, 4)}
+                for first, second, value in self.correlated_pairs(threshold)
+            ]
+        }
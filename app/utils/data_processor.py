@@ -1,15 +1,83 @@
 import pandas as pd
 import numpy as np
 import logging
+import os
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from datetime import datetime, timedelta
 import ta
+from app.utils.feature_normalizer import FeatureNormalizer
+from app.utils.rolling_kernels import rolling_moments, rolling_mean, rolling_rank
 
 logger = logging.getLogger(__name__)
 
+# Columns packed into shared memory for multi-symbol processing
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Calendar features and their compact integer dtypes for float32 mode
+DATE_FEATURE_DTYPES = {
+    'day_of_week': 'int8',
+    'month': 'int8',
+    'is_month_end': 'int8',
+    'is_quarter_end': 'int8',
+    'day_of_month': 'int8',
+    'week_of_year': 'int8',
+    'minute_of_day': 'int16',
+    'bar_of_session': 'int16',
+    'time_bucket': 'int8'
+}
+
+# Trading days per year used to annualize volatility
+TRADING_DAYS_PER_YEAR = 252
+
+# Intraday time-of-day buckets as minutes since the session open:
+# opening 30 minutes, morning, midday, afternoon, closing 30 minutes
+TIME_BUCKET_EDGES = [30, 135, 285, 345]
+
+# Running totals that lose integer precision in float32 and stay 64-bit
+ACCUMULATOR_COLUMNS = ['obv', 'acc_dist_index']
+
 class DataProcessor:
-    def __init__(self):
-        """Initialize the data processor"""
-        pass
+    def __init__(self, precision='float64', mode='daily', bars_per_session=None, session_start='09:15', rank_features=None):
+        """
+        Initialize the data processor
+        
+        Args:
+            precision (str): 'float64' (default) or 'float32'. In float32 mode
+                features are computed in float64 and stored as float32, with
+                compact integer calendar features and 64-bit accumulators.
+            mode (str): 'daily' (default) or 'intraday'. Intraday mode resets
+                VWAP every session, adds time-of-day features and annualizes
+                volatility by the number of bars per session.
+            bars_per_session (int, optional): Bars in a full intraday session
+                (e.g. 375 for NSE minute bars); inferred from the data if omitted
+            session_start (str): Session open time (HH:MM) for intraday mode
+            rank_features (dict, optional): Column -> list of windows for
+                rolling percentile-rank features named {column}_rank_{window},
+                e.g. {'volume': [250]}
+        """
+        if precision not in ('float64', 'float32'):
+            raise ValueError(f"Unsupported precision: {precision}")
+        if mode not in ('daily', 'intraday'):
+            raise ValueError(f"Unsupported mode: {mode}")
+        self.precision = precision
+        self.mode = mode
+        self.bars_per_session = bars_per_session
+        self.session_start = session_start
+        self.rank_features = rank_features or {}
+        # Output columns and dtypes per input dtype signature, for process_many
+        self._schemas = {}
+    
+    def _config(self):
+        """Constructor arguments reproducing this processor"""
+        return {
+            'precision': self.precision,
+            'mode': self.mode,
+            'bars_per_session': self.bars_per_session,
+            'session_start': self.session_start,
+            'rank_features': {column: list(windows) for column, windows in self.rank_features.items()}
+        }
     
     def process(self, data):
         """
@@ -57,18 +125,296 @@ class DataProcessor:
             # Add volume features
             self._add_volume_features(df)
             
+            # Add rolling percentile-rank features
+            if self.rank_features:
+                self._add_rank_features(df)
+            
             # Add date features
             self._add_date_features(df)
             
+            # Add session features for intraday bars
+            if self.mode == 'intraday':
+                self._add_session_features(df)
+            
             # Drop NaN values
             df.dropna(inplace=True)
             
+            if self.precision == 'float32':
+                df = self._downcast(df)
+            
             return df
             
         except Exception as e:
             logger.error(f"Error processing data: {str(e)}")
             return data
     
+    def _downcast(self, df):
+        """Store float features as float32 and calendar features as compact integers"""
+        dtypes = {}
+        for col, dtype in df.dtypes.items():
+            if col in ACCUMULATOR_COLUMNS:
+                continue
+            if col in DATE_FEATURE_DTYPES:
+                dtypes[col] = DATE_FEATURE_DTYPES[col]
+            elif pd.api.types.is_float_dtype(dtype):
+                dtypes[col] = 'float32'
+        return df.astype(dtypes)
+    
+    def precision_report(self, data):
+        """
+        Compare float32 output against the float64 path for the same data
+        
+        Args:
+            data (pandas.DataFrame): Raw historical data
+            
+        Returns:
+            dict: Memory usage of both paths, bytes saved and maximum deviations
+        """
+        # Same settings as this processor, so mode-specific and rank features are compared too
+        config = self._config()
+        full = DataProcessor(**dict(config, precision='float64')).process(data)
+        lean = DataProcessor(**dict(config, precision='float32')).process(data)
+        
+        full_bytes = int(full.memory_usage(deep=True).sum())
+        lean_bytes = int(lean.memory_usage(deep=True).sum())
+        
+        column_deviation = {}
+        for col in full.columns:
+            if col not in lean.columns or not pd.api.types.is_numeric_dtype(full[col]):
+                continue
+            reference = full[col].to_numpy(dtype=np.float64)
+            diff = np.abs(lean[col].to_numpy(dtype=np.float64) - reference)
+            if diff.size == 0:
+                continue
+            scale = np.maximum(np.abs(reference), np.finfo(np.float32).tiny)
+            column_deviation[col] = {
+                'max_abs': float(np.nanmax(diff)),
+                'max_rel': float(np.nanmax(diff / scale))
+            }
+        
+        worst_column = max(column_deviation, key=lambda col: column_deviation[col]['max_rel'], default=None)
+        
+        return {
+            'float64_bytes': full_bytes,
+            'float32_bytes': lean_bytes,
+            'bytes_saved': full_bytes - lean_bytes,
+            'saved_pct': 100.0 * (full_bytes - lean_bytes) / full_bytes if full_bytes else 0.0,
+            'max_abs_deviation': max((dev['max_abs'] for dev in column_deviation.values()), default=0.0),
+            'max_rel_deviation': max((dev['max_rel'] for dev in column_deviation.values()), default=0.0),
+            'worst_column': worst_column,
+            'column_deviation': column_deviation
+        }
+    
+    def process_many(self, data_by_symbol, workers=None, chunking='rows', chunk_size=None):
+        """
+        Process raw historical data for many symbols across a process pool
+        
+        OHLCV inputs and feature outputs are exchanged through
+        multiprocessing.shared_memory blocks, so DataFrames are never
+        pickled between processes; workers receive only the processor's
+        configuration. Only the OHLCV columns of each input frame are
+        processed, restored to their own dtypes and timezone per symbol.
+        Frames with non-numeric OHLCV columns are processed serially.
+        
+        Args:
+            data_by_symbol (dict): Mapping of symbol to raw historical DataFrame
+            workers (int, optional): Number of worker processes (defaults to CPU count)
+            chunking (str): 'rows' to balance chunks by bar count, 'symbols' to
+                split the watchlist into equal-sized groups
+            chunk_size (int, optional): Symbols per chunk for 'symbols' chunking;
+                for 'rows' chunking the number of chunks is derived from it
+            
+        Returns:
+            dict: Mapping of symbol to processed DataFrame
+        """
+        workers = workers or os.cpu_count() or 1
+        results = {}
+        frames = {}
+        
+        for symbol, data in data_by_symbol.items():
+            df = self._prepare_shared_input(data)
+            if df is None:
+                # Let process() handle (and log) anything that cannot be packed
+                results[symbol] = self.process(data)
+            else:
+                frames[symbol] = df
+        
+        if workers <= 1 or len(frames) < 2:
+            for symbol, df in frames.items():
+                results[symbol] = self.process(df)
+            return results
+        
+        symbols = list(frames.keys())
+        lengths = np.array([len(frames[symbol]) for symbol in symbols], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        total_rows = int(lengths.sum())
+        signatures = {symbol: self._input_signature(frames[symbol]) for symbol in symbols}
+        schemas = {signature: self._feature_schema(signature) for signature in set(signatures.values())}
+        columns = self._feature_schema(signatures[symbols[0]])[0]
+        
+        blocks = []
+        try:
+            # Input block: OHLCV values and timestamps
+            values_shm = self._create_shared_block(total_rows * len(OHLCV_COLUMNS) * 8, blocks)
+            index_shm = self._create_shared_block(total_rows * 8, blocks)
+            values = np.ndarray((total_rows, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=values_shm.buf)
+            index = np.ndarray((total_rows,), dtype=np.int64, buffer=index_shm.buf)
+            for symbol, offset in zip(symbols, offsets):
+                df = frames[symbol]
+                values[offset:offset + len(df)] = df[OHLCV_COLUMNS].to_numpy(dtype=np.float64)
+                index[offset:offset + len(df)] = df.index.asi8
+            
+            # Output block: features, surviving timestamps and row counts
+            out_shm = self._create_shared_block(max(total_rows * len(columns) * 8, 1), blocks)
+            out_index_shm = self._create_shared_block(total_rows * 8, blocks)
+            out_lengths_shm = self._create_shared_block(len(symbols) * 8, blocks)
+            out_lengths = np.ndarray((len(symbols),), dtype=np.int64, buffer=out_lengths_shm.buf)
+            out_lengths[:] = -1
+            
+            base_spec = {
+                'config': self._config(),
+                'values': values_shm.name,
+                'index': index_shm.name,
+                'out': out_shm.name,
+                'out_index': out_index_shm.name,
+                'out_lengths': out_lengths_shm.name,
+                'total_rows': total_rows,
+                'n_symbols': len(symbols),
+                'columns': columns
+            }
+            
+            chunks = self._make_chunks(lengths, workers, chunking, chunk_size)
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                futures = []
+                for chunk in chunks:
+                    spec = dict(base_spec)
+                    spec['tasks'] = [
+                        (int(i), int(offsets[i]), int(lengths[i]), dict(signatures[symbols[i]][0]), signatures[symbols[i]][1])
+                        for i in chunk
+                    ]
+                    futures.append(executor.submit(_process_shared_chunk, spec))
+                for future in futures:
+                    future.result()
+            
+            out = np.ndarray((total_rows, len(columns)), dtype=np.float64, buffer=out_shm.buf)
+            out_index = np.ndarray((total_rows,), dtype=np.int64, buffer=out_index_shm.buf)
+            for i, symbol in enumerate(symbols):
+                n = int(out_lengths[i])
+                if n < 0:
+                    # Worker could not produce the standard feature set
+                    results[symbol] = self.process(frames[symbol])
+                    continue
+                start = int(offsets[i])
+                # Timestamps are stored as UTC nanoseconds; restore each symbol's own timezone
+                df_index = pd.DatetimeIndex(out_index[start:start + n].copy())
+                tz = signatures[symbol][1]
+                if tz is not None:
+                    df_index = df_index.tz_localize('UTC').tz_convert(tz)
+                df_index.name = frames[symbol].index.name
+                df = pd.DataFrame(out[start:start + n].copy(), index=df_index, columns=columns)
+                results[symbol] = df.astype(schemas[signatures[symbol]][1])
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in parallel processing, falling back to serial: {str(e)}")
+            for symbol, df in frames.items():
+                if symbol not in results:
+                    results[symbol] = self.process(df)
+            return results
+            
+        finally:
+            # Drop array views into the blocks before releasing them
+            values = index = out = out_index = out_lengths = None
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+    
+    def _prepare_shared_input(self, data):
+        """Return an OHLCV frame with a DatetimeIndex, or None if it cannot be packed"""
+        if data is None or data.empty:
+            return None
+        if not all(col in data.columns for col in OHLCV_COLUMNS):
+            return None
+        if not all(pd.api.types.is_numeric_dtype(data[col]) and not pd.api.types.is_bool_dtype(data[col])
+                   for col in OHLCV_COLUMNS):
+            return None
+        df = data
+        if not isinstance(df.index, pd.DatetimeIndex):
+            if 'timestamp' not in df.columns:
+                return None
+            df = df.set_index(pd.to_datetime(df['timestamp']))
+        return df[OHLCV_COLUMNS]
+    
+    @staticmethod
+    def _input_signature(df):
+        """Hashable OHLCV dtypes and timezone of a packed input frame"""
+        dtypes = tuple((col, str(df[col].dtype)) for col in OHLCV_COLUMNS)
+        return dtypes, str(df.index.tz) if df.index.tz is not None else None
+    
+    def _feature_schema(self, signature=None):
+        """Output columns and dtypes of process() for inputs of a signature, derived from a synthetic series"""
+        dtypes = dict(signature[0]) if signature is not None else {}
+        key = tuple(sorted(dtypes.items()))
+        if key not in self._schemas:
+            rng = np.random.default_rng(0)
+            n = 300
+            close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+            sample = pd.DataFrame({
+                'open': close * (1 + rng.normal(0, 0.002, n)),
+                'high': close * 1.01,
+                'low': close * 0.99,
+                'close': close,
+                'volume': rng.integers(1000, 100000, n)
+            }, index=pd.date_range('2020-01-01', periods=n, freq='D')).astype(dtypes)
+            processed = self.process(sample)
+            self._schemas[key] = (list(processed.columns), processed.dtypes.to_dict())
+        return self._schemas[key]
+    
+    @staticmethod
+    def _create_shared_block(size, blocks):
+        """Create a shared memory block and register it for cleanup"""
+        shm = shared_memory.SharedMemory(create=True, size=max(int(size), 1))
+        blocks.append(shm)
+        return shm
+    
+    @staticmethod
+    def _make_chunks(lengths, workers, chunking='rows', chunk_size=None):
+        """
+        Split symbol positions into chunks for the process pool
+        
+        Args:
+            lengths (numpy.ndarray): Number of bars per symbol
+            workers (int): Number of worker processes
+            chunking (str): 'rows' or 'symbols'
+            chunk_size (int, optional): Symbols per chunk
+            
+        Returns:
+            list: Lists of symbol positions
+        """
+        n = len(lengths)
+        if chunk_size:
+            n_chunks = max(1, -(-n // int(chunk_size)))
+        else:
+            # A few chunks per worker keeps the pool busy when symbols differ in length
+            n_chunks = min(n, workers * 4)
+        
+        if chunking == 'symbols':
+            size = -(-n // n_chunks)
+            return [list(range(i, min(i + size, n))) for i in range(0, n, size)]
+        
+        if chunking != 'rows':
+            raise ValueError(f"Unknown chunking strategy: {chunking}")
+        
+        # Longest-first greedy assignment balances total bars per chunk
+        heap = [(0, i) for i in range(n_chunks)]
+        chunks = [[] for _ in range(n_chunks)]
+        for pos in np.argsort(-lengths, kind='stable'):
+            load, i = heapq.heappop(heap)
+            chunks[i].append(int(pos))
+            heapq.heappush(heap, (load + int(lengths[pos]), i))
+        return [sorted(chunk) for chunk in chunks if chunk]
+    
     def _add_basic_features(self, df):
         """Add basic price features"""
         # Returns
@@ -88,9 +434,10 @@ class DataProcessor:
     
     def _add_technical_indicators(self, df):
         """Add technical indicators"""
-        # Moving Averages
+        # Moving Averages and Bollinger statistics from one shared prefix sum
+        close_means, close_stds = rolling_moments(df['close'], [5, 10, 20, 50, 100, 200], std_windows=[20])
         for window in [5, 10, 20, 50, 100, 200]:
-            df[f'ma_{window}'] = df['close'].rolling(window=window).mean()
+            df[f'ma_{window}'] = close_means[window]
             df[f'ma_ratio_{window}'] = df['close'] / df[f'ma_{window}']
         
         # Exponential Moving Averages
@@ -108,16 +455,16 @@ class DataProcessor:
         gain = delta.where(delta > 0, 0)
         loss = -delta.where(delta < 0, 0)
         
-        avg_gain = gain.rolling(window=14).mean()
-        avg_loss = loss.rolling(window=14).mean()
+        avg_gain = rolling_mean(gain, [14])[14]
+        avg_loss = rolling_mean(loss, [14])[14]
         
         rs = avg_gain / avg_loss
         df['rsi_14'] = 100 - (100 / (1 + rs))
         
         # Bollinger Bands
         for window in [20]:
-            df[f'bb_middle_{window}'] = df['close'].rolling(window=window).mean()
-            df[f'bb_std_{window}'] = df['close'].rolling(window=window).std()
+            df[f'bb_middle_{window}'] = close_means[window]
+            df[f'bb_std_{window}'] = close_stds[window]
             df[f'bb_upper_{window}'] = df[f'bb_middle_{window}'] + 2 * df[f'bb_std_{window}']
             df[f'bb_lower_{window}'] = df[f'bb_middle_{window}'] - 2 * df[f'bb_std_{window}']
             df[f'bb_width_{window}'] = (df[f'bb_upper_{window}'] - df[f'bb_lower_{window}']) / df[f'bb_middle_{window}']
@@ -163,8 +510,9 @@ class DataProcessor:
     def _add_volatility_features(self, df):
         """Add volatility features"""
         # Historical volatility
+        _, return_stds = rolling_moments(df['returns'], [], std_windows=[5, 10, 20, 30])
         for window in [5, 10, 20, 30]:
-            df[f'volatility_{window}'] = df['returns'].rolling(window=window).std() * np.sqrt(252)  # Annualized
+            df[f'volatility_{window}'] = return_stds[window] * np.sqrt(self._periods_per_year(df))  # Annualized
         
         # True Range
         df['true_range'] = np.maximum(
@@ -176,7 +524,7 @@ class DataProcessor:
         )
         
         # Average True Range
-        df['atr_14'] = df['true_range'].rolling(window=14).mean()
+        df['atr_14'] = rolling_mean(df['true_range'], [14])[14]
         df['atr_ratio_14'] = df['atr_14'] / df['close']
     
     def _add_momentum_features(self, df):
@@ -195,8 +543,9 @@ class DataProcessor:
         df['volume_change'] = df['volume'].pct_change()
         
         # Volume moving averages
+        volume_means = rolling_mean(df['volume'], [5, 10, 20, 50])
         for window in [5, 10, 20, 50]:
-            df[f'volume_ma_{window}'] = df['volume'].rolling(window=window).mean()
+            df[f'volume_ma_{window}'] = volume_means[window]
             df[f'volume_ratio_{window}'] = df['volume'] / df[f'volume_ma_{window}']
         
         # On-Balance Volume (OBV)
@@ -205,6 +554,16 @@ class DataProcessor:
         df.loc[df['close'] < df['close'].shift(1), 'obv'] = -df['volume']
         df['obv'] = df['obv'].cumsum()
     
+    def _add_rank_features(self, df):
+        """Add rolling percentile ranks of the configured columns"""
+        for column, windows in self.rank_features.items():
+            if column not in df.columns:
+                logger.warning(f"Cannot add rank features for missing column {column}")
+                continue
+            values = df[column].to_numpy(dtype=np.float64)
+            for window in windows:
+                df[f'{column}_rank_{window}'] = rolling_rank(values, window)
+    
     def _add_date_features(self, df):
         """Add date-based features"""
         if isinstance(df.index, pd.DatetimeIndex):
@@ -226,37 +585,205 @@ class DataProcessor:
             # Week of year
             df['week_of_year'] = df.index.isocalendar().week
     
-    def normalize_features(self, df):
+    def _periods_per_year(self, df):
+        """Bars per year used to annualize volatility"""
+        if self.mode != 'intraday':
+            return TRADING_DAYS_PER_YEAR
+        return TRADING_DAYS_PER_YEAR * self._resolve_bars_per_session(df.index)
+    
+    def _resolve_bars_per_session(self, index):
+        """Configured bars per session, or the median bar count of the sessions in index"""
+        if self.bars_per_session:
+            return self.bars_per_session
+        if not isinstance(index, pd.DatetimeIndex) or len(index) == 0:
+            return 1
+        _, counts = np.unique(index.normalize().asi8, return_counts=True)
+        return max(int(np.median(counts)), 1)
+    
+    def _add_session_features(self, df):
+        """Add per-session VWAP and time-of-day features for intraday bars"""
+        if not isinstance(df.index, pd.DatetimeIndex):
+            return
+        
+        # Session id per bar and the position where each session starts
+        session_days = df.index.normalize().asi8
+        starts = np.flatnonzero(np.r_[True, session_days[1:] != session_days[:-1]])
+        session_start_pos = np.repeat(starts, np.diff(np.r_[starts, len(df)]))
+        
+        # VWAP that resets every session: cumulative sums minus the sums before the session open
+        typical_price = ((df['high'] + df['low'] + df['close']) / 3).to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        price_volume = np.concatenate(([0.0], np.cumsum(typical_price * volume)))
+        cum_volume = np.concatenate(([0.0], np.cumsum(volume)))
+        end = np.arange(1, len(df) + 1)
+        session_volume = cum_volume[end] - cum_volume[session_start_pos]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df['session_vwap'] = (price_volume[end] - price_volume[session_start_pos]) / session_volume
+        df['session_vwap_ratio'] = df['close'] / df['session_vwap']
+        
+        # Time of day
+        open_hour, open_minute = (int(part) for part in self.session_start.split(':'))
+        minute_of_day = (df.index.hour * 60 + df.index.minute - (open_hour * 60 + open_minute)).to_numpy()
+        df['minute_of_day'] = minute_of_day
+        df['bar_of_session'] = np.arange(len(df)) - session_start_pos
+        df['time_bucket'] = np.searchsorted(TIME_BUCKET_EDGES, minute_of_day, side='right')
+    
+    def iter_process_chunks(self, data, chunk_sessions=20, warmup_bars=1200):
+        """
+        Process a long intraday history session-chunk by session-chunk
+        
+        Each chunk is processed together with the preceding warmup_bars bars so
+        that rolling and exponential indicators are warmed up, and running
+        totals (obv, acc_dist_index) are re-based onto the previous chunk. Only
+        one chunk plus its warm-up is held in memory at a time.
+        
+        Args:
+            data (pandas.DataFrame): Raw historical data with a DatetimeIndex
+            chunk_sessions (int): Sessions per chunk
+            warmup_bars (int): Bars of history prepended to each chunk, at
+                least the longest rank feature window
+            
+        Yields:
+            pandas.DataFrame: Processed rows of each chunk
+        """
+        if data.empty or not isinstance(data.index, pd.DatetimeIndex):
+            yield self.process(data)
+            return
+        
+        # Fix annualization across chunks so partial sessions do not change it
+        config = self._config()
+        config['bars_per_session'] = self._resolve_bars_per_session(data.index)
+        processor = DataProcessor(**config)
+        # Rank windows longer than the warm-up would start every chunk with NaN ranks
+        warmup_bars = max([warmup_bars] + [window for windows in self.rank_features.values() for window in windows])
+        
+        session_days = data.index.normalize().asi8
+        starts = np.flatnonzero(np.r_[True, session_days[1:] != session_days[:-1]])
+        chunk_starts = starts[::max(int(chunk_sessions), 1)]
+        chunk_ends = np.r_[chunk_starts[1:], len(data)]
+        
+        previous_row = None
+        for start, end in zip(chunk_starts, chunk_ends):
+            warm_start = max(0, start - warmup_bars)
+            processed = processor.process(data.iloc[warm_start:end])
+            chunk = processed[processed.index >= data.index[start]]
+            
+            if previous_row is not None:
+                chunk = self._rebase_accumulators(chunk, processed, previous_row)
+            
+            if not chunk.empty:
+                previous_row = chunk.iloc[-1]
+            yield chunk
+    
+    def process_chunked(self, data, chunk_sessions=20, warmup_bars=1200):
+        """
+        Process a long history in session chunks with bounded working memory
+        
+        Args:
+            data (pandas.DataFrame): Raw historical data with a DatetimeIndex
+            chunk_sessions (int): Sessions per chunk
+            warmup_bars (int): Bars of history prepended to each chunk
+            
+        Returns:
+            pandas.DataFrame: Processed data for the whole history
+        """
+        chunks = [chunk for chunk in self.iter_process_chunks(data, chunk_sessions, warmup_bars) if not chunk.empty]
+        if not chunks:
+            return self.process(data.iloc[:0]) if not data.empty else data
+        return pd.concat(chunks)
+    
+    @staticmethod
+    def _rebase_accumulators(chunk, processed, previous_row):
+        """Shift running totals of a chunk so they continue from the previous chunk"""
+        if previous_row.name not in processed.index:
+            logger.warning("Warm-up too short to align running totals across chunks")
+            return chunk
+        
+        chunk = chunk.copy()
+        for col in ACCUMULATOR_COLUMNS:
+            if col in chunk.columns:
+                offset = previous_row[col] - processed.at[previous_row.name, col]
+                chunk[col] = (chunk[col] + offset).astype(chunk[col].dtype)
+        return chunk
+    
+    def normalize_features(self, df, normalizer=None):
         """
         Normalize features to [0, 1] range
         
         Args:
             df (pandas.DataFrame): DataFrame with features
+            normalizer (FeatureNormalizer, optional): Fitted normalizer whose
+                statistics are applied instead of the min/max of df itself.
+                Use this for live data and anything after the training window.
             
         Returns:
             pandas.DataFrame: Normalized DataFrame
         """
         try:
-            # Create a copy
-            normalized_df = df.copy()
-            
-            # Get numerical columns
-            numerical_cols = df.select_dtypes(include=['float64', 'int64']).columns
+            if normalizer is not None:
+                return normalizer.transform(df)
             
-            # Skip certain columns
-            skip_cols = ['day_of_week', 'month', 'is_month_end', 'is_quarter_end', 'day_of_month', 'week_of_year']
-            cols_to_normalize = [col for col in numerical_cols if col not in skip_cols]
-            
-            # Normalize each column
-            for col in cols_to_normalize:
-                min_val = normalized_df[col].min()
-                max_val = normalized_df[col].max()
-                
-                if max_val > min_val:
-                    normalized_df[col] = (normalized_df[col] - min_val) / (max_val - min_val)
-            
-            return normalized_df
+            # Statistics from the data being transformed
+            return FeatureNormalizer().fit_transform(df)
             
         except Exception as e:
             logger.error(f"Error normalizing features: {str(e)}")
-            return df
\ No newline at end of file
+            return df
+    
+    def fit_normalizer(self, df):
+        """
+        Fit a normalizer on training features
+        
+        Args:
+            df (pandas.DataFrame): Processed training data
+            
+        Returns:
+            FeatureNormalizer: Normalizer to persist with the model and reuse
+        """
+        return FeatureNormalizer().fit(df)
+
+
+def _process_shared_chunk(spec):
+    """
+    Process a chunk of symbols in a worker process
+    
+    Reads OHLCV rows from the input shared memory block and writes processed
+    features, surviving timestamps and row counts into the output blocks.
+    
+    Args:
+        spec (dict): Processor configuration, shared block names, shapes and
+            (position, offset, length, input dtypes, timezone) tasks
+    """
+    processor = DataProcessor(**spec['config'])
+    columns = spec['columns']
+    total_rows = spec['total_rows']
+    attached = [shared_memory.SharedMemory(name=spec[key]) for key in ('values', 'index', 'out', 'out_index', 'out_lengths')]
+    try:
+        values_shm, index_shm, out_shm, out_index_shm, out_lengths_shm = attached
+        values = np.ndarray((total_rows, len(OHLCV_COLUMNS)), dtype=np.float64, buffer=values_shm.buf)
+        index = np.ndarray((total_rows,), dtype=np.int64, buffer=index_shm.buf)
+        out = np.ndarray((total_rows, len(columns)), dtype=np.float64, buffer=out_shm.buf)
+        out_index = np.ndarray((total_rows,), dtype=np.int64, buffer=out_index_shm.buf)
+        out_lengths = np.ndarray((spec['n_symbols'],), dtype=np.int64, buffer=out_lengths_shm.buf)
+        
+        for pos, offset, length, input_dtypes, tz in spec['tasks']:
+            try:
+                df_index = pd.DatetimeIndex(index[offset:offset + length])
+                if tz is not None:
+                    df_index = df_index.tz_localize('UTC').tz_convert(tz)
+                df = pd.DataFrame(values[offset:offset + length], index=df_index, columns=OHLCV_COLUMNS).astype(input_dtypes)
+                processed = processor.process(df)
+                if list(processed.columns) != columns:
+                    continue
+                n = len(processed)
+                out[offset:offset + n] = processed.to_numpy(dtype=np.float64, na_value=np.nan)
+                out_index[offset:offset + n] = processed.index.asi8
+                out_lengths[pos] = n
+            except Exception as e:
+                logger.error(f"Error processing symbol in worker: {str(e)}")
+        
+        # Release views before closing the blocks
+        del values, index, out, out_index, out_lengths
+    finally:
+        for shm in attached:
+            shm.close()
@@ -0,0 +1,178 @@
+import pandas as pd
+import numpy as np
+import joblib
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Calendar and time-of-day features are categorical and are never scaled
+SKIP_COLUMNS = ['day_of_week', 'month', 'is_month_end', 'is_quarter_end', 'day_of_month', 'week_of_year',
+                'minute_of_day', 'bar_of_session', 'time_bucket']
+
+class FeatureNormalizer:
+    def __init__(self, skip_columns=None):
+        """
+        Initialize a min/max feature normalizer
+        
+        Statistics are fitted once (or updated incrementally with partial_fit)
+        and then applied to new rows, so live data is scaled with the same
+        statistics the model was trained on.
+        
+        Args:
+            skip_columns (list, optional): Columns to leave unscaled
+        """
+        self.skip_columns = list(SKIP_COLUMNS if skip_columns is None else skip_columns)
+        self.columns = []
+        self.min_ = None
+        self.max_ = None
+        self.n_samples = 0
+    
+    @property
+    def is_fitted(self):
+        return self.min_ is not None
+    
+    def _select_columns(self, df):
+        """Numerical columns to normalize"""
+        numerical_cols = df.select_dtypes(include=['float64', 'float32', 'int64']).columns
+        return [col for col in numerical_cols if col not in self.skip_columns]
+    
+    def fit(self, df):
+        """
+        Compute per-column min/max in a single vectorized pass
+        
+        Args:
+            df (pandas.DataFrame): Training features
+        
+        Returns:
+            FeatureNormalizer: self
+        """
+        self.columns = self._select_columns(df)
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        
+        with np.errstate(invalid='ignore'):
+            # All-NaN columns give NaN statistics and are left unscaled
+            with_values = ~np.isnan(values).all(axis=0) if len(values) else np.zeros(len(self.columns), dtype=bool)
+            self.min_ = np.full(len(self.columns), np.nan)
+            self.max_ = np.full(len(self.columns), np.nan)
+            if with_values.any():
+                self.min_[with_values] = np.nanmin(values[:, with_values], axis=0)
+                self.max_[with_values] = np.nanmax(values[:, with_values], axis=0)
+        
+        self.n_samples = len(values)
+        return self
+    
+    def partial_fit(self, df):
+        """
+        Update running min/max with new rows
+        
+        Args:
+            df (pandas.DataFrame): New feature rows
+        
+        Returns:
+            FeatureNormalizer: self
+        """
+        if not self.is_fitted:
+            return self.fit(df)
+        
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        if len(values):
+            # fmin/fmax ignore NaN on either side
+            self.min_ = np.fmin(self.min_, np.fmin.reduce(values, axis=0))
+            self.max_ = np.fmax(self.max_, np.fmax.reduce(values, axis=0))
+            self.n_samples += len(values)
+        return self
+    
+    def transform(self, df):
+        """
+        Scale features to [0, 1] with the fitted statistics
+        
+        Values outside the fitted range map outside [0, 1]; call partial_fit
+        first to widen the range with new data.
+        
+        Args:
+            df (pandas.DataFrame): Features to normalize
+        
+        Returns:
+            pandas.DataFrame: Normalized copy of the features
+        """
+        if not self.is_fitted:
+            raise ValueError("FeatureNormalizer must be fitted before transform")
+        
+        normalized_df = df.copy()
+        columns = [col for col in self.columns if col in df.columns]
+        if not columns:
+            return normalized_df
+        
+        positions = [self.columns.index(col) for col in columns] if len(columns) != len(self.columns) else slice(None)
+        min_val = self.min_[positions]
+        scale = self.max_[positions] - min_val
+        scaled = scale > 0
+        
+        values = df[columns].to_numpy(dtype=np.float64)
+        values[:, scaled] = (values[:, scaled] - min_val[scaled]) / scale[scaled]
+        
+        for i, col in enumerate(columns):
+            if scaled[i]:
+                dtype = df[col].dtype
+                normalized_df[col] = values[:, i].astype(dtype) if pd.api.types.is_float_dtype(dtype) else values[:, i]
+        
+        return normalized_df
+    
+    def fit_transform(self, df):
+        """Fit on df and return it normalized"""
+        return self.fit(df).transform(df)
+    
+    def transform_row(self, row):
+        """
+        Normalize a single row of features in O(columns)
+        
+        Args:
+            row (dict or pandas.Series): Latest feature values
+        
+        Returns:
+            dict: Normalized values for the fitted columns
+        """
+        if not self.is_fitted:
+            raise ValueError("FeatureNormalizer must be fitted before transform")
+        
+        values = np.array([row.get(col, np.nan) for col in self.columns], dtype=np.float64)
+        scale = self.max_ - self.min_
+        scaled = scale > 0
+        values[scaled] = (values[scaled] - self.min_[scaled]) / scale[scaled]
+        return dict(zip(self.columns, values.tolist()))
+    
+    def to_dict(self):
+        """Serializable statistics"""
+        return {
+            'skip_columns': self.skip_columns,
+            'columns': self.columns,
+            'min': None if self.min_ is None else self.min_.tolist(),
+            'max': None if self.max_ is None else self.max_.tolist(),
+            'n_samples': self.n_samples
+        }
+    
+    @classmethod
+    def from_dict(cls, state):
+        """Rebuild a normalizer from to_dict() output"""
+        normalizer = cls(skip_columns=state.get('skip_columns'))
+        normalizer.columns = list(state.get('columns', []))
+        if state.get('min') is not None:
+            normalizer.min_ = np.array(state['min'], dtype=np.float64)
+            normalizer.max_ = np.array(state['max'], dtype=np.float64)
+        normalizer.n_samples = state.get('n_samples', 0)
+        return normalizer
+    
+    def save(self, path):
+        """Save fitted statistics to disk"""
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            joblib.dump(self.to_dict(), path)
+            logger.info(f"Saved feature normalizer to {path}")
+        except Exception as e:
+            logger.error(f"Error saving feature normalizer: {str(e)}")
+    
+    @classmethod
+    def load(cls, path):
+        """Load fitted statistics from disk"""
+        return cls.from_dict(joblib.load(path))
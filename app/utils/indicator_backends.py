@@ -0,0 +1,233 @@
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from app.utils import indicator_kernels as kernels
+
+logger = logging.getLogger(__name__)
+
+# TA-Lib needs a native build; without it the NumPy backend is used
+try:
+    import talib
+except ImportError:
+    talib = None
+
+INDICATORS = ['sma', 'ema', 'rsi', 'macd', 'bbands', 'stoch', 'adx', 'obv']
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=np.float64)
+
+
+def _columnwise(func, *arrays, **kwargs):
+    """
+    Apply a 1-D indicator function to every column of (bars x symbols) inputs
+    
+    Args:
+        func (callable): Indicator taking 1-D arrays
+        *arrays: Input arrays, all of shape (T,) or (T, N)
+        **kwargs: Indicator parameters
+    
+    Returns:
+        numpy.ndarray or tuple: Output(s) with the shape of the inputs
+    """
+    arrays = [_as_array(values) for values in arrays]
+    if arrays[0].ndim == 1:
+        return func(*arrays, **kwargs)
+    
+    outputs = [func(*(values[:, j] for values in arrays), **kwargs) for j in range(arrays[0].shape[1])]
+    if not outputs:
+        return np.full(arrays[0].shape, np.nan)
+    if isinstance(outputs[0], tuple):
+        return tuple(np.column_stack(parts) for parts in zip(*outputs))
+    return np.column_stack(outputs)
+
+
+class IndicatorBackend(ABC):
+    """
+    Interface of an indicator backend
+    
+    Every method takes price arrays of shape (T,) or (T, N) (one column per
+    symbol), uses TA-Lib's parameter names and defaults, and returns float64
+    arrays of the same shape with NaN where TA-Lib has no output. A backend
+    missing any indicator cannot be instantiated.
+    """
+    name = None
+    
+    @abstractmethod
+    def sma(self, close, timeperiod=30):
+        """Simple moving average"""
+    
+    @abstractmethod
+    def ema(self, close, timeperiod=30):
+        """Exponential moving average"""
+    
+    @abstractmethod
+    def rsi(self, close, timeperiod=14):
+        """Relative Strength Index"""
+    
+    @abstractmethod
+    def macd(self, close, fastperiod=12, slowperiod=26, signalperiod=9):
+        """Returns (macd, signal, histogram)"""
+    
+    @abstractmethod
+    def bbands(self, close, timeperiod=5, nbdev=2.0):
+        """Returns (upper, middle, lower)"""
+    
+    @abstractmethod
+    def stoch(self, high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+        """Returns (slow %K, slow %D)"""
+    
+    @abstractmethod
+    def adx(self, high, low, close, timeperiod=14):
+        """Average Directional Index"""
+    
+    @abstractmethod
+    def obv(self, close, volume):
+        """On-Balance Volume"""
+
+
+class NumpyBackend(IndicatorBackend):
+    """Vectorized NumPy implementations from indicator_kernels"""
+    name = 'numpy'
+    
+    def sma(self, close, timeperiod=30):
+        return kernels.sma(close, timeperiod)
+    
+    def ema(self, close, timeperiod=30):
+        return kernels.ema(close, timeperiod)
+    
+    def rsi(self, close, timeperiod=14):
+        return kernels.rsi(close, timeperiod)
+    
+    def macd(self, close, fastperiod=12, slowperiod=26, signalperiod=9):
+        return kernels.macd(close, fastperiod, slowperiod, signalperiod)
+    
+    def bbands(self, close, timeperiod=5, nbdev=2.0):
+        return kernels.bbands(close, timeperiod, nbdev)
+    
+    def stoch(self, high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+        return kernels.stoch(high, low, close, fastk_period, slowk_period, slowd_period)
+    
+    def adx(self, high, low, close, timeperiod=14):
+        return kernels.adx(high, low, close, timeperiod)
+    
+    def obv(self, close, volume):
+        return kernels.obv(close, volume)
+
+
+class TalibBackend(IndicatorBackend):
+    """TA-Lib's C implementations, applied column by column to 2-D inputs"""
+    name = 'talib'
+    
+    def __init__(self):
+        if talib is None:
+            raise ImportError("TA-Lib is not installed; use the 'numpy' indicator backend")
+    
+    def sma(self, close, timeperiod=30):
+        return _columnwise(talib.SMA, close, timeperiod=timeperiod)
+    
+    def ema(self, close, timeperiod=30):
+        return _columnwise(talib.EMA, close, timeperiod=timeperiod)
+    
+    def rsi(self, close, timeperiod=14):
+        return _columnwise(talib.RSI, close, timeperiod=timeperiod)
+    
+    def macd(self, close, fastperiod=12, slowperiod=26, signalperiod=9):
+        return _columnwise(talib.MACD, close, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
+    
+    def bbands(self, close, timeperiod=5, nbdev=2.0):
+        return _columnwise(talib.BBANDS, close, timeperiod=timeperiod, nbdevup=nbdev, nbdevdn=nbdev)
+    
+    def stoch(self, high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+        return _columnwise(
+            talib.STOCH, high, low, close,
+            fastk_period=fastk_period, slowk_period=slowk_period, slowd_period=slowd_period
+        )
+    
+    def adx(self, high, low, close, timeperiod=14):
+        return _columnwise(talib.ADX, high, low, close, timeperiod=timeperiod)
+    
+    def obv(self, close, volume):
+        return _columnwise(talib.OBV, close, volume)
+
+
+class CompositeBackend(IndicatorBackend):
+    """Backend that routes each indicator to its own backend"""
+    
+    def __init__(self, default, overrides):
+        """
+        Args:
+            default (IndicatorBackend): Backend for indicators without an override
+            overrides (dict): Indicator name -> IndicatorBackend
+        """
+        self.routes = {indicator: overrides.get(indicator, default) for indicator in INDICATORS}
+        self.name = '+'.join(sorted({backend.name for backend in self.routes.values()}))
+    
+    def sma(self, close, timeperiod=30):
+        return self.routes['sma'].sma(close, timeperiod=timeperiod)
+    
+    def ema(self, close, timeperiod=30):
+        return self.routes['ema'].ema(close, timeperiod=timeperiod)
+    
+    def rsi(self, close, timeperiod=14):
+        return self.routes['rsi'].rsi(close, timeperiod=timeperiod)
+    
+    def macd(self, close, fastperiod=12, slowperiod=26, signalperiod=9):
+        return self.routes['macd'].macd(close, fastperiod=fastperiod, slowperiod=slowperiod, signalperiod=signalperiod)
+    
+    def bbands(self, close, timeperiod=5, nbdev=2.0):
+        return self.routes['bbands'].bbands(close, timeperiod=timeperiod, nbdev=nbdev)
+    
+    def stoch(self, high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+        return self.routes['stoch'].stoch(
+            high, low, close,
+            fastk_period=fastk_period, slowk_period=slowk_period, slowd_period=slowd_period
+        )
+    
+    def adx(self, high, low, close, timeperiod=14):
+        return self.routes['adx'].adx(high, low, close, timeperiod=timeperiod)
+    
+    def obv(self, close, volume):
+        return self.routes['obv'].obv(close, volume)
+
+
+BACKENDS = {
+    'numpy': NumpyBackend,
+    'talib': TalibBackend
+}
+
+
+def available_backends():
+    """Names of the backends usable on this host"""
+    return [name for name in BACKENDS if name != 'talib' or talib is not None]
+
+
+def get_backend(name='auto', overrides=None):
+    """
+    Create an indicator backend
+    
+    Args:
+        name (str): 'talib', 'numpy', or 'auto' for TA-Lib when it is installed
+            and NumPy otherwise
+        overrides (dict, optional): Indicator name -> backend name, to pick
+            the fastest backend per indicator
+    
+    Returns:
+        IndicatorBackend: The backend
+    """
+    if name == 'auto':
+        name = 'talib' if talib is not None else 'numpy'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend: {name}")
+    backend = BACKENDS[name]()
+    
+    if overrides:
+        unknown = set(overrides) - set(INDICATORS)
+        if unknown:
+            raise ValueError(f"Unknown indicators in backend overrides: {sorted(unknown)}")
+        backend = CompositeBackend(backend, {
+            indicator: get_backend(backend_name) for indicator, backend_name in overrides.items()
+        })
+    
+    logger.debug(f"Using {backend.name} indicator backend")
+    return backend
@@ -0,0 +1,284 @@
+import logging
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from app.utils.rolling_kernels import rolling_moments
+
+logger = logging.getLogger(__name__)
+
+# Largest growth factor allowed inside one block of the closed-form recursion
+_MAX_BLOCK_GROWTH = 1e12
+
+
+def _as_2d(values):
+    """View a 1-D series as a single column; returns the array and whether it was 1-D"""
+    x = np.asarray(values, dtype=np.float64)
+    if x.ndim == 1:
+        return x[:, None], True
+    return x, False
+
+
+def _restore_shape(values, was_1d):
+    return values[:, 0] if was_1d else values
+
+
+def _latest_shape(values, was_1d):
+    return values[0] if was_1d else values
+
+
+def first_valid(x):
+    """Row of the first non-NaN value in each column (len(x) if there is none)"""
+    valid = ~np.isnan(x)
+    return np.where(valid.any(axis=0), valid.argmax(axis=0), len(x))
+
+
+def linear_filter(u, decay):
+    """
+    Evaluate y[t] = decay * y[t - 1] + u[t] along axis 0, with y[-1] = 0
+    
+    The recursion is evaluated in closed form block by block,
+    y[s + j] = decay ** j * (decay * y[s - 1] + sum(u[s + i] * decay ** -i)),
+    with blocks short enough that decay ** -j stays well conditioned. Every
+    block is a handful of vectorized operations across all columns.
+    
+    Args:
+        u (numpy.ndarray): Inputs, shape (T,) or (T, N)
+        decay (float): Recursion factor in [0, 1)
+    
+    Returns:
+        numpy.ndarray: Filtered values with the shape of u
+    """
+    u = np.asarray(u, dtype=np.float64)
+    if decay <= 0:
+        return u.copy()
+    
+    block = max(1, int(np.log(_MAX_BLOCK_GROWTH) / -np.log(decay)))
+    steps = np.arange(block, dtype=np.float64).reshape((-1,) + (1,) * (u.ndim - 1))
+    growth = decay ** -steps
+    shrink = decay ** steps
+    
+    y = np.empty_like(u)
+    prev = np.zeros(u.shape[1:])
+    for start in range(0, len(u), block):
+        segment = u[start:start + block]
+        out = y[start:start + block]
+        np.multiply(segment, growth[:len(segment)], out=out)
+        np.cumsum(out, axis=0, out=out)
+        out += decay * prev
+        out *= shrink[:len(segment)]
+        prev = out[-1]
+    return y
+
+
+def window_sum_at(x, end_row, window):
+    """
+    Sum of the window ending at end_row in each column
+    
+    Args:
+        x (numpy.ndarray): Values, shape (T, N)
+        end_row (numpy.ndarray): Last row of the window per column
+        window (int): Window length
+    
+    Returns:
+        numpy.ndarray: Sums, NaN where the window is out of range or contains NaN
+    """
+    rows = end_row[None, :] - np.arange(window)[:, None]
+    in_range = (end_row < len(x)) & (end_row - window + 1 >= 0)
+    rows = np.clip(rows, 0, max(len(x) - 1, 0))
+    sums = x[rows, np.arange(x.shape[1])[None, :]].sum(axis=0) if len(x) else np.zeros(x.shape[1])
+    return np.where(in_range, sums, np.nan)
+
+
+def _seeded_filter(x, seed, seed_row, decay, weight, latest=False):
+    """
+    Recursive smoothing seeded per column: y[seed_row] = seed and
+    y[t] = decay * y[t - 1] + weight * x[t] afterwards, NaN before the seed
+    
+    With latest=True only the last row is returned, as one weighted sum of
+    the inputs instead of the whole recursion.
+    """
+    rows = np.arange(len(x))[:, None]
+    before = rows <= seed_row
+    nan = np.isnan(x)
+    u = weight * x
+    np.copyto(u, 0.0, where=before | nan)
+    seeded = np.flatnonzero(seed_row < len(x))
+    u[seed_row[seeded], seeded] = seed[seeded]
+    # Values after a NaN input stay NaN, as with a plain recursion
+    undefined = nan & ~before
+    if latest:
+        powers = decay ** np.arange(len(x) - 1, -1, -1, dtype=np.float64)
+        last = powers @ u
+        last[(seed_row >= len(x)) | undefined.any(axis=0)] = np.nan
+        return last
+    y = linear_filter(u, decay)
+    np.copyto(y, np.nan, where=(rows < seed_row) | undefined)
+    return y
+
+
+def rolling_sum(values, window):
+    """Rolling sum along axis 0; windows containing NaN are NaN"""
+    return rolling_moments(values, [window])[0][window] * window
+
+
+def sma(values, period=30):
+    """Simple moving average (TA-Lib SMA)"""
+    return rolling_moments(values, [period])[0][period]
+
+
+def ema(values, period=30, latest=False):
+    """
+    Exponential moving average seeded with the SMA of the first period values (TA-Lib EMA)
+    
+    Args:
+        values (numpy.ndarray): Prices, shape (T,) or (T, N)
+        period (int): EMA period
+        latest (bool): Return only the last row
+    
+    Returns:
+        numpy.ndarray: EMA values, or the latest value per column
+    """
+    x, was_1d = _as_2d(values)
+    k = 2.0 / (period + 1)
+    seed_row = first_valid(x) + period - 1
+    seed = window_sum_at(x, seed_row, period) / period
+    out = _seeded_filter(x, seed, seed_row, 1 - k, k, latest=latest)
+    return _latest_shape(out, was_1d) if latest else _restore_shape(out, was_1d)
+
+
+def rsi(values, period=14, latest=False):
+    """Relative Strength Index with Wilder smoothing (TA-Lib RSI); latest=True returns the last row only"""
+    x, was_1d = _as_2d(values)
+    change = np.vstack([np.full((1, x.shape[1]), np.nan), np.diff(x, axis=0)])
+    gain = np.where(change > 0, change, 0.0)
+    loss = np.where(change < 0, -change, 0.0)
+    gain[np.isnan(change)] = np.nan
+    loss[np.isnan(change)] = np.nan
+    
+    seed_row = first_valid(x) + period
+    decay = (period - 1) / period
+    avg_gain, avg_loss = (
+        _seeded_filter(move, window_sum_at(move, seed_row, period) / period, seed_row, decay, 1.0 / period, latest)
+        for move in (gain, loss)
+    )
+    
+    total = avg_gain + avg_loss
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out = np.where(np.abs(total) < 1e-14, 0.0, 100.0 * avg_gain / total)
+    out[np.isnan(total)] = np.nan
+    return _latest_shape(out, was_1d) if latest else _restore_shape(out, was_1d)
+
+
+def macd(values, fast_period=12, slow_period=26, signal_period=9, latest=False):
+    """
+    MACD line, signal and histogram (TA-Lib MACD)
+    
+    As in TA-Lib the fast EMA is seeded so that it starts on the same bar as
+    the slow EMA, and all outputs start once the signal line is defined.
+    With latest=True only the last row of each output is returned.
+    """
+    x, was_1d = _as_2d(values)
+    rows = np.arange(len(x))[:, None]
+    start = first_valid(x)
+    fast_input = np.where(rows < start + (slow_period - fast_period), np.nan, x)
+    
+    line = ema(fast_input, fast_period) - ema(x, slow_period)
+    signal = ema(line, signal_period, latest=latest)
+    if latest:
+        line = np.where(np.isnan(signal), np.nan, line[-1])
+        return tuple(_latest_shape(out, was_1d) for out in (line, signal, line - signal))
+    line = np.where(np.isnan(signal), np.nan, line)
+    hist = line - signal
+    return tuple(_restore_shape(out, was_1d) for out in (line, signal, hist))
+
+
+def bbands(values, period=5, nbdev=2.0):
+    """Bollinger Bands with a population standard deviation (TA-Lib BBANDS)"""
+    x, was_1d = _as_2d(values)
+    # Deviations come from sums re-anchored on each block's mean; raw sums of
+    # squared prices cancel catastrophically at index levels
+    means, stds = rolling_moments(x, [period], std_windows=[period], ddof=0)
+    middle = means[period]
+    deviation = nbdev * stds[period]
+    return tuple(_restore_shape(out, was_1d) for out in (middle + deviation, middle, middle - deviation))
+
+
+def _rolling_extreme(x, window, reducer):
+    out = np.full(x.shape, np.nan)
+    if 0 < window <= len(x):
+        out[window - 1:] = reducer(sliding_window_view(x, window, axis=0), axis=-1)
+    return out
+
+
+def stoch(high, low, close, fastk_period=5, slowk_period=3, slowd_period=3):
+    """Slow stochastic %K and %D with SMA smoothing (TA-Lib STOCH defaults)"""
+    h, was_1d = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, _ = _as_2d(close)
+    highest = _rolling_extreme(h, fastk_period, np.max)
+    lowest = _rolling_extreme(l, fastk_period, np.min)
+    diff = (highest - lowest) / 100.0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fastk = np.where(diff != 0, (c - lowest) / diff, 0.0)
+    fastk[np.isnan(diff)] = np.nan
+    
+    slowk = sma(fastk, slowk_period)
+    slowd = sma(slowk, slowd_period)
+    slowk = np.where(np.isnan(slowd), np.nan, slowk)
+    return _restore_shape(slowk, was_1d), _restore_shape(slowd, was_1d)
+
+
+def adx(high, low, close, period=14, latest=False):
+    """
+    Average Directional Index with Wilder smoothing (TA-Lib ADX)
+    
+    Bars whose smoothed true range or DI sum is zero contribute a DX of zero.
+    With latest=True only the last row is returned.
+    """
+    h, was_1d = _as_2d(high)
+    l, _ = _as_2d(low)
+    c, _ = _as_2d(close)
+    n = h.shape[1]
+    # Directional movements and true range side by side, one block per series
+    raw = np.full((len(c), 3 * n), np.nan)
+    if len(c) > 1:
+        diff_plus = h[1:] - h[:-1]
+        diff_minus = l[:-1] - l[1:]
+        prev_close = c[:-1]
+        raw[1:, :n] = np.where((diff_plus > 0) & (diff_plus > diff_minus), diff_plus, 0.0)
+        raw[1:, n:2 * n] = np.where((diff_minus > 0) & (diff_minus > diff_plus), diff_minus, 0.0)
+        raw[1:, 2 * n:] = np.maximum(h[1:] - l[1:], np.maximum(np.abs(h[1:] - prev_close), np.abs(l[1:] - prev_close)))
+        missing = np.isnan(raw[:, 2 * n:])
+        raw[:, :n][missing] = np.nan
+        raw[:, n:2 * n][missing] = np.nan
+    
+    # Smoothed sums are seeded with the first period - 1 movements
+    seed_row = first_valid(c) + period - 1
+    decay = 1 - 1.0 / period
+    raw_seed_row = np.tile(seed_row, 3)
+    smoothed = _seeded_filter(raw, window_sum_at(raw, raw_seed_row, period - 1), raw_seed_row, decay, 1.0)
+    plus_sum, minus_sum, tr_sum = smoothed[:, :n], smoothed[:, n:2 * n], smoothed[:, 2 * n:]
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        plus_di = 100.0 * plus_sum / tr_sum
+        minus_di = 100.0 * minus_sum / tr_sum
+        di_total = plus_di + minus_di
+        dx = 100.0 * np.abs(minus_di - plus_di) / di_total
+    dx = np.where((np.abs(tr_sum) < 1e-14) | (np.abs(di_total) < 1e-14), 0.0, dx)
+    dx[np.arange(len(c))[:, None] <= seed_row] = np.nan
+    
+    adx_seed_row = seed_row + period
+    out = _seeded_filter(dx, window_sum_at(dx, adx_seed_row, period) / period, adx_seed_row, decay, 1.0 / period, latest)
+    return _latest_shape(out, was_1d) if latest else _restore_shape(out, was_1d)
+
+
+def obv(close, volume):
+    """On-Balance Volume starting from the first bar's volume (TA-Lib OBV)"""
+    c, was_1d = _as_2d(close)
+    v, _ = _as_2d(volume)
+    rows = np.arange(len(c))[:, None]
+    start = first_valid(c)
+    change = np.vstack([np.zeros((1, c.shape[1])), np.sign(np.diff(c, axis=0))])
+    increments = np.where(rows == start, v, np.where(rows > start, np.nan_to_num(change) * v, 0.0))
+    out = np.cumsum(np.nan_to_num(increments), axis=0)
+    out[rows < start] = np.nan
+    return _restore_shape(out, was_1d)
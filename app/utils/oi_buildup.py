@@ -0,0 +1,208 @@
+import logging
+import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Build-up codes, in code order
+BUILDUP_LABELS = ('neutral', 'long_buildup', 'short_buildup', 'short_covering', 'long_unwinding')
+NEUTRAL, LONG_BUILDUP, SHORT_BUILDUP, SHORT_COVERING, LONG_UNWINDING = range(len(BUILDUP_LABELS))
+
+
+def classify_buildup(price_change, oi_change):
+    """
+    Classify price and open interest moves
+    
+    Price up with OI up is a long build-up, price down with OI up a short
+    build-up, price up with OI down short covering and price down with OI
+    down long unwinding; anything with a flat or missing move is neutral.
+    
+    Args:
+        price_change (float or array): Price change
+        oi_change (float or array): Open interest change
+    
+    Returns:
+        numpy.ndarray: Codes indexing BUILDUP_LABELS (int8)
+    """
+    price_change = np.nan_to_num(np.asarray(price_change, dtype=np.float64))
+    oi_change = np.nan_to_num(np.asarray(oi_change, dtype=np.float64))
+    codes = np.select(
+        [(price_change > 0) & (oi_change > 0), (price_change < 0) & (oi_change > 0),
+         (price_change > 0) & (oi_change < 0), (price_change < 0) & (oi_change < 0)],
+        [LONG_BUILDUP, SHORT_BUILDUP, SHORT_COVERING, LONG_UNWINDING],
+        NEUTRAL
+    )
+    return codes.astype(np.int8)
+
+
+class OIBuildupTracker:
+    """
+    Open interest build-up of every option and underlying, updated per chain refresh
+    
+    Exchanges publish OI less often than prices, so an option is
+    reclassified only when its OI changes: the OI change and its price
+    change are measured from the snapshot of its previous OI change. Options
+    whose OI did not move keep their classification, and only the changed
+    rows are written. The underlying is classified the same way from its
+    price and the chain's total OI.
+    """
+    
+    def __init__(self):
+        self._state = {}
+    
+    def update(self, symbol, chain, timestamp=None):
+        """
+        Fold a new chain snapshot into the classification
+        
+        Args:
+            symbol (str): Underlying symbol
+            chain (OptionChain): Latest chain with its underlying price
+            timestamp (Timestamp, optional): Snapshot time (defaults to now)
+        
+        Returns:
+            int: Number of options reclassified
+        """
+        timestamp = pd.Timestamp.now() if timestamp is None else pd.Timestamp(timestamp)
+        oi = np.nan_to_num(chain.oi)
+        state = self._state.get(symbol)
+        if state is None:
+            self._state[symbol] = {
+                'chain': chain,
+                'reference_oi': oi.copy(),
+                'reference_ltp': chain.ltp.copy(),
+                'code': np.zeros(len(chain), dtype=np.int8),
+                'oi_change': np.zeros(len(chain)),
+                'ltp_change': np.zeros(len(chain)),
+                'updated': np.full(len(chain), timestamp.value, dtype=np.int64),
+                'total_oi': float(oi.sum()),
+                'reference_total_oi': float(oi.sum()),
+                'reference_underlying': chain.underlying,
+                'underlying_code': NEUTRAL,
+                'underlying_oi_change': 0.0,
+                'underlying_price_change': 0.0,
+                'timestamp': timestamp
+            }
+            return 0
+        
+        previous = state['chain']
+        index = previous.locate(chain)
+        if len(index) != len(previous) or (index != np.arange(len(index))).any():
+            self._realign(state, previous, chain, index, timestamp)
+        
+        rows = np.flatnonzero(oi != state['reference_oi'])
+        if len(rows):
+            oi_change = oi[rows] - state['reference_oi'][rows]
+            ltp_change = chain.ltp[rows] - state['reference_ltp'][rows]
+            state['code'][rows] = classify_buildup(ltp_change, oi_change)
+            state['oi_change'][rows] = oi_change
+            state['ltp_change'][rows] = ltp_change
+            state['updated'][rows] = timestamp.value
+            state['reference_oi'][rows] = oi[rows]
+            state['reference_ltp'][rows] = chain.ltp[rows]
+            state['total_oi'] += float(oi_change.sum())
+        
+        # The underlying moves on its own price against the chain's total OI
+        total_change = state['total_oi'] - state['reference_total_oi']
+        if total_change:
+            price_change = chain.underlying - state['reference_underlying']
+            state['underlying_code'] = int(classify_buildup(price_change, total_change))
+            state['underlying_oi_change'] = total_change
+            state['underlying_price_change'] = float(np.nan_to_num(price_change))
+            state['reference_total_oi'] = state['total_oi']
+            state['reference_underlying'] = chain.underlying
+        state['chain'] = chain
+        state['timestamp'] = timestamp
+        return len(rows)
+    
+    @staticmethod
+    def _realign(state, previous, chain, index, timestamp):
+        """Carry the per-option state over to a chain with a different option layout"""
+        known = index >= 0
+        source = np.maximum(index, 0)
+        oi = np.nan_to_num(chain.oi)
+        for name in ('reference_oi', 'reference_ltp', 'code', 'oi_change', 'ltp_change', 'updated'):
+            values = state[name][source] if len(previous) else np.zeros(len(chain), dtype=state[name].dtype)
+            state[name] = values
+        # New options start from their first snapshot
+        new = ~known
+        state['reference_oi'][new] = oi[new]
+        state['reference_ltp'][new] = chain.ltp[new]
+        state['code'][new] = NEUTRAL
+        state['oi_change'][new] = 0.0
+        state['ltp_change'][new] = 0.0
+        state['updated'][new] = timestamp.value
+        # Dropped options leave the total; new ones enter it without counting as a change
+        dropped = np.ones(len(previous), dtype=bool)
+        dropped[index[known]] = False
+        removed_oi = float(np.nan_to_num(previous.oi[dropped]).sum())
+        added_oi = float(oi[new].sum())
+        state['total_oi'] += added_oi - removed_oi
+        state['reference_total_oi'] += added_oi - removed_oi
+    
+    def table(self, symbol, changed_since=None):
+        """
+        Build-up of every option of a symbol
+        
+        Args:
+            symbol (str): Underlying symbol
+            changed_since (Timestamp, optional): Only options reclassified after this time
+        
+        Returns:
+            pandas.DataFrame: strike, type, expiry, oi, oi_change, ltp_change,
+                buildup (categorical) and updated; None if the symbol is unknown
+        """
+        state = self._state.get(symbol)
+        if state is None:
+            return None
+        chain = state['chain']
+        rows = np.arange(len(chain))
+        if changed_since is not None:
+            rows = np.flatnonzero(state['updated'] > pd.Timestamp(changed_since).value)
+        return pd.DataFrame({
+            'strike': chain.strike[rows],
+            'type': np.where(chain.is_call[rows], 'CE', 'PE'),
+            'expiry': chain.expiry[rows],
+            'oi': chain.oi[rows],
+            'oi_change': state['oi_change'][rows],
+            'ltp_change': state['ltp_change'][rows],
+            'buildup': pd.Categorical.from_codes(state['code'][rows], BUILDUP_LABELS),
+            'updated': pd.to_datetime(state['updated'][rows])
+        })
+    
+    def underlying(self, symbol):
+        """
+        Build-up of an underlying and the option classification counts
+        
+        Args:
+            symbol (str): Underlying symbol
+        
+        Returns:
+            dict: Underlying price, total OI, their last changes, the build-up
+                label, and per-label counts of calls and puts; None if unknown
+        """
+        state = self._state.get(symbol)
+        if state is None:
+            return None
+        chain = state['chain']
+        calls = np.bincount(state['code'][chain.is_call], minlength=len(BUILDUP_LABELS))
+        puts = np.bincount(state['code'][~chain.is_call], minlength=len(BUILDUP_LABELS))
+        return {
+            'symbol': symbol,
+            'underlying': None if np.isnan(chain.underlying) else float(chain.underlying),
+            'price_change': state['underlying_price_change'],
+            'total_oi': state['total_oi'],
+            'oi_change': state['underlying_oi_change'],
+            'buildup': BUILDUP_LABELS[state['underlying_code']],
+            'calls': dict(zip(BUILDUP_LABELS, calls.tolist())),
+            'puts': dict(zip(BUILDUP_LABELS, puts.tolist())),
+            'timestamp': state['timestamp'].isoformat()
+        }
+    
+    def summary(self):
+        """
+        Build-up of every tracked underlying
+        
+        Returns:
+            list: underlying() of each symbol
+        """
+        return [self.underlying(symbol) for symbol in self._state]
@@ -2,84 +2,593 @@ import logging
 import pandas as pd
 import numpy as np
 
+from app.utils.option_pricing import implied_volatility, time_to_expiry
+from app.utils.option_greeks import GreeksSurface, portfolio_greeks, position_field
+from app.utils.volatility_smile import VolatilitySmile
+from app.utils.oi_buildup import OIBuildupTracker
+from app.utils.option_strategies import StrategyEngine
+
 logger = logging.getLogger(__name__)
 
+# Field names used by the supported chain formats, canonical name first
+FIELD_ALIASES = {
+    'strike': ('strike', 'strikePrice', 'strike_price'),
+    'type': ('type', 'optionType', 'option_type', 'instrumentType'),
+    'ltp': ('ltp', 'lastPrice', 'last_price'),
+    'iv': ('iv', 'impliedVolatility', 'implied_volatility'),
+    'volume': ('volume', 'totalTradedVolume', 'tradeVolume'),
+    'oi': ('oi', 'openInterest', 'open_interest'),
+    'expiry': ('expiry', 'expiryDate', 'expiry_date')
+}
+
+CALL_TYPES = frozenset(['CE', 'CALL', 'C'])
+
+# Distance from the underlying, as a fraction, of the strikes compared for the IV skew
+SKEW_MONEYNESS = 0.05
+
+# Annual risk-free rate used to solve implied volatilities (roughly the Indian T-bill yield)
+DEFAULT_RISK_FREE_RATE = 0.065
+
+
+def _field(row, name, default=None):
+    """Read a chain field under any of its known names"""
+    for alias in FIELD_ALIASES[name]:
+        if alias in row:
+            return row[alias]
+    return default
+
+
+def _flat_rows(rows):
+    """
+    Expand rows holding both legs of a strike ({strikePrice, CE: {...}, PE: {...}})
+    into one row per option
+    """
+    flat = []
+    for row in rows:
+        if 'CE' in row or 'PE' in row:
+            strike = _field(row, 'strike')
+            expiry = _field(row, 'expiry')
+            for option_type in ('CE', 'PE'):
+                leg = row.get(option_type)
+                if leg:
+                    flat.append(dict(leg, strike=_field(leg, 'strike', strike), type=option_type,
+                                     expiry=_field(leg, 'expiry', expiry)))
+        else:
+            flat.append(row)
+    return flat
+
+
+def _as_float(values):
+    """Float array with missing entries (None or empty strings) as NaN"""
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([np.nan if value is None or value == '' else value for value in values], dtype=np.float64)
+
+
+class OptionChain:
+    """
+    Option chain stored as parallel numpy arrays, one entry per option
+    
+    Attributes:
+        strike, ltp, iv, volume, oi (numpy.ndarray): float64 columns, NaN when missing;
+            iv is a decimal fraction
+        quoted_iv (numpy.ndarray): IV as quoted by the feed; iv holds the same
+            values until solve_iv replaces them
+        is_call (numpy.ndarray): True for calls, False for puts
+        expiry (numpy.ndarray): Expiry label of every option
+        underlying (float): Underlying price, NaN when unknown
+    """
+    
+    def __init__(self, strike, is_call, ltp, iv, volume, oi, expiry=None, underlying=np.nan):
+        self.strike = np.asarray(strike, dtype=np.float64)
+        self.is_call = np.asarray(is_call, dtype=bool)
+        self.ltp = np.asarray(ltp, dtype=np.float64)
+        self.iv = np.asarray(iv, dtype=np.float64)
+        self.quoted_iv = self.iv
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.oi = np.asarray(oi, dtype=np.float64)
+        self.expiry = np.asarray(expiry if expiry is not None else [None] * len(self.strike), dtype=object)
+        self.underlying = float(underlying) if underlying is not None else np.nan
+        self._expiries = None
+    
+    def __len__(self):
+        return len(self.strike)
+    
+    @classmethod
+    def from_response(cls, response, underlying=None):
+        """
+        Parse an API option chain response once into columns
+        
+        Accepts {'data': rows, 'underlying': price}, a bare list of rows, flat
+        rows with a CE/PE type, and rows holding both legs of a strike. IVs
+        quoted in percent (as most feeds do) are converted to fractions.
+        
+        Args:
+            response (dict or list): Option chain from the API wrapper
+            underlying (float, optional): Underlying price, overriding the response
+        
+        Returns:
+            OptionChain: Parsed chain
+        """
+        rows = response
+        if isinstance(response, dict):
+            rows = response.get('data', [])
+            if underlying is None:
+                underlying = response.get('underlying', response.get('underlyingValue'))
+        rows = rows or []
+        if rows and any('CE' in row or 'PE' in row for row in rows):
+            rows = _flat_rows(rows)
+        
+        if rows and all(key in rows[0] for key in ('strike', 'type', 'ltp', 'iv', 'volume', 'oi')):
+            # Canonical rows: one tuple per row instead of alias lookups
+            columns = list(zip(*[
+                (row['strike'], row['type'], row['ltp'], row['iv'], row['volume'], row['oi'], row.get('expiry'))
+                for row in rows
+            ]))
+        else:
+            columns = list(zip(*[
+                tuple(_field(row, name) for name in ('strike', 'type', 'ltp', 'iv', 'volume', 'oi', 'expiry'))
+                for row in rows
+            ])) or [()] * 7
+        strike, option_type, ltp, iv, volume, oi, expiry = columns
+        
+        iv = _as_float(iv)
+        iv[iv <= 0] = np.nan
+        quoted = iv[np.isfinite(iv)]
+        if len(quoted) and np.median(quoted) > 3:
+            iv /= 100.0
+        ltp = _as_float(ltp)
+        ltp[ltp < 0] = np.nan
+        
+        return cls(
+            strike=_as_float(strike),
+            is_call=np.array([value in CALL_TYPES or str(value).upper() in CALL_TYPES for value in option_type], dtype=bool),
+            ltp=ltp,
+            iv=iv,
+            volume=_as_float(volume),
+            oi=_as_float(oi),
+            expiry=list(expiry),
+            underlying=np.nan if underlying is None else underlying
+        )
+    
+    @classmethod
+    def concatenate(cls, chains, underlying=None):
+        """
+        Join chains of one underlying (e.g. one per expiry) into a single chain
+        
+        Args:
+            chains (list): OptionChain objects
+            underlying (float, optional): Underlying price (defaults to the first known one)
+        
+        Returns:
+            OptionChain: Combined chain
+        """
+        if underlying is None:
+            underlying = next((chain.underlying for chain in chains if not np.isnan(chain.underlying)), np.nan)
+        if not chains:
+            return cls([], [], [], [], [], [], expiry=[], underlying=underlying)
+        return cls(
+            strike=np.concatenate([chain.strike for chain in chains]),
+            is_call=np.concatenate([chain.is_call for chain in chains]),
+            ltp=np.concatenate([chain.ltp for chain in chains]),
+            iv=np.concatenate([chain.quoted_iv for chain in chains]),
+            volume=np.concatenate([chain.volume for chain in chains]),
+            oi=np.concatenate([chain.oi for chain in chains]),
+            expiry=np.concatenate([chain.expiry for chain in chains]),
+            underlying=underlying
+        )
+    
+    def solve_iv(self, rate=0.0, dividend=0.0, initial=None, now=None):
+        """
+        Replace the quoted IVs with the ones implied by the last traded prices
+        
+        Options whose IV cannot be solved (no price, no parseable expiry, or a
+        price outside the no-arbitrage bounds) keep the quoted IV.
+        
+        Args:
+            rate (float): Annual risk-free rate
+            dividend (float): Annual dividend yield of the underlying
+            initial (numpy.ndarray, optional): Starting IVs, e.g. from
+                previous.aligned_iv for the previous snapshot of the chain
+            now (Timestamp, optional): Valuation time
+        
+        Returns:
+            numpy.ndarray: Solved IVs, NaN where no IV could be solved
+        """
+        solved = implied_volatility(
+            self.ltp, self.underlying, self.strike, time_to_expiry(self.expiry, now=now),
+            rate=rate, dividend=dividend, is_call=self.is_call, initial=initial
+        )
+        self.iv = np.where(np.isnan(solved), self.quoted_iv, solved)
+        return solved
+    
+    def locate(self, chain):
+        """
+        Positions in this chain of the options of another chain
+        
+        Args:
+            chain (OptionChain): Chain whose options are looked up (typically a
+                newer snapshot of the same underlying)
+        
+        Returns:
+            numpy.ndarray: Index into this chain of every option of chain, -1
+                when it is not in this one
+        """
+        if (len(chain) == len(self) and np.array_equal(chain.strike, self.strike)
+                and np.array_equal(chain.is_call, self.is_call) and np.array_equal(chain.expiry, self.expiry)):
+            return np.arange(len(self))
+        known = {key: i for i, key in enumerate(zip(self.expiry, self.strike, self.is_call))}
+        return np.array([known.get(key, -1) for key in zip(chain.expiry, chain.strike, chain.is_call)],
+                        dtype=np.int64)
+    
+    def aligned_iv(self, chain):
+        """
+        This chain's IVs for the options of another chain
+        
+        Args:
+            chain (OptionChain): Chain whose options are looked up
+        
+        Returns:
+            numpy.ndarray: IV of every option of chain, NaN when it is not in this one
+        """
+        index = self.locate(chain)
+        return np.where(index >= 0, self.iv[np.maximum(index, 0)] if len(self) else np.nan, np.nan)
+    
+    def put_call_ratios(self):
+        """
+        Put-call ratios by open interest and by volume
+        
+        Returns:
+            tuple: (PCR by OI, PCR by volume), NaN when there is no call interest
+        """
+        calls = self.is_call
+        call_oi, put_oi = np.nansum(self.oi[calls]), np.nansum(self.oi[~calls])
+        call_volume, put_volume = np.nansum(self.volume[calls]), np.nansum(self.volume[~calls])
+        pcr_oi = float(put_oi / call_oi) if call_oi else np.nan
+        pcr_volume = float(put_volume / call_volume) if call_volume else np.nan
+        return pcr_oi, pcr_volume
+    
+    def _smile(self, calls):
+        """Strikes and IVs of one option type, sorted by strike, without missing IVs"""
+        mask = (self.is_call == calls) & ~np.isnan(self.iv) & ~np.isnan(self.strike)
+        strikes, ivs = self.strike[mask], self.iv[mask]
+        order = np.argsort(strikes, kind='stable')
+        return strikes[order], ivs[order]
+    
+    def atm_iv(self):
+        """
+        At-the-money implied volatility
+        
+        The mean of the call and put IV at each strike, linearly interpolated
+        between the two strikes around the underlying.
+        
+        Returns:
+            tuple: (ATM IV, strike closest to the underlying)
+        """
+        if not len(self) or np.isnan(self.underlying):
+            return np.nan, np.nan
+        strikes = np.unique(self.strike[~np.isnan(self.strike)])
+        if not len(strikes):
+            return np.nan, np.nan
+        atm_strike = float(strikes[np.argmin(np.abs(strikes - self.underlying))])
+        
+        call_strikes, call_ivs = self._smile(True)
+        put_strikes, put_ivs = self._smile(False)
+        values = []
+        if len(call_strikes):
+            values.append(np.interp(self.underlying, call_strikes, call_ivs))
+        if len(put_strikes):
+            values.append(np.interp(self.underlying, put_strikes, put_ivs))
+        return (float(np.mean(values)) if values else np.nan), atm_strike
+    
+    def iv_skew(self, moneyness=SKEW_MONEYNESS):
+        """
+        Put-minus-call IV of out-of-the-money options equally far from the underlying
+        
+        Args:
+            moneyness (float): Distance of the compared strikes from the
+                underlying, as a fraction of it
+        
+        Returns:
+            float: IV of the put at underlying * (1 - moneyness) minus IV of the
+                call at underlying * (1 + moneyness); positive for a put skew
+        """
+        if np.isnan(self.underlying):
+            return np.nan
+        call_strikes, call_ivs = self._smile(True)
+        put_strikes, put_ivs = self._smile(False)
+        if not len(call_strikes) or not len(put_strikes):
+            return np.nan
+        put_iv = np.interp(self.underlying * (1 - moneyness), put_strikes, put_ivs)
+        call_iv = np.interp(self.underlying * (1 + moneyness), call_strikes, call_ivs)
+        return float(put_iv - call_iv)
+    
+    def expiries(self):
+        """
+        Expiry labels of the chain, nearest first
+        
+        Labels that parse as dates are ordered by date, others by label after them.
+        
+        Returns:
+            tuple: (ordered labels, numpy.ndarray with each option's position in them)
+        """
+        if self._expiries is not None:
+            return self._expiries
+        codes, labels = pd.factorize(self.expiry)
+        labels = list(labels)
+        if (codes < 0).any():
+            # Options without an expiry label form their own group
+            codes = np.where(codes < 0, len(labels), codes)
+            labels.append(None)
+        
+        def sort_key(label):
+            try:
+                return (0, pd.Timestamp(label), '')
+            except (TypeError, ValueError):
+                return (1, pd.Timestamp.min, str(label))
+        
+        order = sorted(range(len(labels)), key=lambda i: sort_key(labels[i]))
+        rank = np.empty(len(labels), dtype=np.int64)
+        rank[order] = np.arange(len(labels))
+        self._expiries = ([labels[i] for i in order], rank[codes])
+        return self._expiries
+    
+    def max_pains(self):
+        """
+        Max pain strike of every expiry
+        
+        Returns:
+            dict: Expiry label -> max pain strike, nearest expiry first
+        """
+        labels, groups = self.expiries()
+        group_ids, strikes, _ = max_pain_by_group(self.strike, self.oi, self.is_call, groups)
+        return {labels[group]: float(strike) for group, strike in zip(group_ids, strikes)}
+    
+    def max_pain(self):
+        """
+        Strike at which option holders' total intrinsic value is smallest
+        
+        Returns:
+            float: Max pain strike of the nearest expiry, NaN without open interest
+        """
+        pains = self.max_pains()
+        return next(iter(pains.values())) if pains else np.nan
+
+
+class ChainPanel:
+    """
+    Option chains of several underlyings stored as one set of columns
+    
+    The options of every symbol are contiguous, so a symbol's chain is a
+    slice (numpy views) of the panel columns.
+    
+    Attributes:
+        symbols (list): Symbols in panel order
+        offsets (numpy.ndarray): Start of every symbol's options, plus the total
+        underlyings (numpy.ndarray): Underlying price of every symbol
+        symbol (numpy.ndarray): Symbol of every option
+        strike, is_call, ltp, iv, volume, oi, expiry (numpy.ndarray): As in OptionChain
+    """
+    
+    COLUMNS = ('strike', 'is_call', 'ltp', 'iv', 'volume', 'oi', 'expiry')
+    
+    def __init__(self, chains):
+        """
+        Args:
+            chains (dict): Symbol -> OptionChain
+        """
+        self.symbols = list(chains)
+        sizes = [len(chain) for chain in chains.values()]
+        self.offsets = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+        self.underlyings = np.array([chain.underlying for chain in chains.values()], dtype=np.float64)
+        self.symbol = np.repeat(np.array(self.symbols, dtype=object), sizes)
+        for column in self.COLUMNS:
+            source = 'quoted_iv' if column == 'iv' else column
+            parts = [getattr(chain, source) for chain in chains.values()]
+            dtype = bool if column == 'is_call' else object if column == 'expiry' else np.float64
+            setattr(self, column, np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype=dtype))
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+    
+    def __len__(self):
+        return len(self.strike)
+    
+    def __contains__(self, symbol):
+        return symbol in self._positions
+    
+    def chain(self, symbol):
+        """
+        Option chain of one symbol
+        
+        Args:
+            symbol (str): Underlying symbol
+        
+        Returns:
+            OptionChain: Chain viewing the panel's columns, None if the symbol is not in the panel
+        """
+        position = self._positions.get(symbol)
+        if position is None:
+            return None
+        rows = slice(self.offsets[position], self.offsets[position + 1])
+        return OptionChain(
+            strike=self.strike[rows], is_call=self.is_call[rows], ltp=self.ltp[rows], iv=self.iv[rows],
+            volume=self.volume[rows], oi=self.oi[rows], expiry=self.expiry[rows],
+            underlying=self.underlyings[position]
+        )
+    
+    def to_frame(self):
+        """
+        All options as one DataFrame
+        
+        Returns:
+            pandas.DataFrame: symbol, underlying, strike, type, expiry, ltp, iv, volume and oi
+        """
+        return pd.DataFrame({
+            'symbol': self.symbol,
+            'underlying': np.repeat(self.underlyings, np.diff(self.offsets)),
+            'strike': self.strike,
+            'type': np.where(self.is_call, 'CE', 'PE'),
+            'expiry': self.expiry,
+            'ltp': self.ltp,
+            'iv': self.iv,
+            'volume': self.volume,
+            'oi': self.oi
+        })
+
+
+def _segment_cumsum(values, starts, lengths):
+    """Cumulative sums restarting at every segment start"""
+    totals = np.cumsum(values)
+    return totals - np.repeat(totals[starts] - values[starts], lengths)
+
+
+def max_pain_by_group(strike, oi, is_call, groups):
+    """
+    Max pain strike of several option groups (expiries) at once
+    
+    For candidate strikes K_1 < ... < K_n of a group the pain at K_i is
+        sum_j call_oi_j * max(K_i - K_j, 0) + put_oi_j * max(K_j - K_i, 0)
+        = K_i * C_i - CK_i + (PK - PK_i) - K_i * (P - P_i)
+    with C_i, CK_i, P_i and PK_i prefix sums of call OI, call OI x strike, put
+    OI and put OI x strike, and P, PK their group totals. After one sort by
+    (group, strike) every group is evaluated in linear time.
+    
+    Args:
+        strike, oi (numpy.ndarray): Strike and open interest of every option
+        is_call (numpy.ndarray): Call flag of every option
+        groups (numpy.ndarray): Non-negative integer group (expiry) of every option
+    
+    Returns:
+        tuple: (group ids with open interest, max pain strike, total pain), one
+            entry per group in ascending group order
+    """
+    valid = ~np.isnan(strike) & (np.nan_to_num(oi) > 0)
+    if not valid.any():
+        empty = np.array([])
+        return empty.astype(np.int64), empty, empty
+    strike, oi, is_call, groups = strike[valid], oi[valid], is_call[valid], groups[valid]
+    
+    # Sort by (group, strike) through one composite key
+    span = np.max(strike) - np.min(strike) + 1.0
+    order = np.argsort(groups * span + (strike - np.min(strike)), kind='stable')
+    strike, oi, is_call, groups = strike[order], oi[order], is_call[order], groups[order]
+    
+    # One candidate per distinct (group, strike), with its call and put OI
+    distinct = np.empty(len(strike), dtype=bool)
+    distinct[0] = True
+    distinct[1:] = (groups[1:] != groups[:-1]) | (strike[1:] != strike[:-1])
+    points = np.flatnonzero(distinct)
+    call_oi = np.add.reduceat(np.where(is_call, oi, 0.0), points)
+    put_oi = np.add.reduceat(np.where(is_call, 0.0, oi), points)
+    candidates, candidate_groups = strike[points], groups[points]
+    
+    starts = np.flatnonzero(np.r_[True, candidate_groups[1:] != candidate_groups[:-1]])
+    lengths = np.diff(np.r_[starts, len(candidates)])
+    group_of = np.repeat(np.arange(len(starts)), lengths)
+    
+    calls_below = _segment_cumsum(call_oi, starts, lengths)
+    call_strikes_below = _segment_cumsum(call_oi * candidates, starts, lengths)
+    puts_below = _segment_cumsum(put_oi, starts, lengths)
+    put_strikes_below = _segment_cumsum(put_oi * candidates, starts, lengths)
+    puts_total = np.add.reduceat(put_oi, starts)[group_of]
+    put_strikes_total = np.add.reduceat(put_oi * candidates, starts)[group_of]
+    
+    pain = (candidates * calls_below - call_strikes_below
+            + (put_strikes_total - put_strikes_below) - candidates * (puts_total - puts_below))
+    
+    # Lowest pain per group; ties go to the lowest strike
+    best = np.lexsort((pain, group_of))[starts]
+    return candidate_groups[best], candidates[best], pain[best]
+
+
 class OptionChainAnalyzer:
-    def __init__(self, api_wrapper):
+    def __init__(self, api_wrapper, solve_iv=True, risk_free_rate=DEFAULT_RISK_FREE_RATE, dividend_yield=0.0,
+                 history=None):
         """
         Initialize the Option Chain Analyzer
         
         Args:
             api_wrapper: API wrapper for fetching option chain data
+            solve_iv (bool): Solve IVs from option prices instead of trusting the quoted ones
+            risk_free_rate (float): Annual risk-free rate for the IV solver
+            dividend_yield (float): Annual dividend yield for the IV solver
+            history (ChainHistory, optional): Store receiving a snapshot of every analyzed chain
         """
         self.api_wrapper = api_wrapper
+        self.solve_iv = solve_iv
+        self.risk_free_rate = risk_free_rate
+        self.dividend_yield = dividend_yield
+        self.history = history
+        # Last chain of every symbol, to warm-start the IV solver and search strategies
+        self._chains = {}
+        # Greeks of the last chain of every symbol
+        self._greeks = {}
+        # Fitted IV smiles of every symbol
+        self._smiles = {}
+        # OI build-up of every option and underlying across refreshes
+        self.buildup = OIBuildupTracker()
+        self.strategy_engine = StrategyEngine(rate=risk_free_rate, dividend=dividend_yield)
     
-    def analyze(self, symbol):
+    def analyze(self, symbol, chain=None):
         """
         Analyze option chain for a symbol
         
         Args:
             symbol (str): Stock symbol
-            
+            chain (OptionChain, optional): Already fetched chain with its
+                underlying price; fetched from the API wrapper when omitted
+        
         Returns:
             dict: Option chain analysis
         """
         try:
-            # Get current price
-            current_price = self.api_wrapper.get_ltp(symbol)
+            if chain is None:
+                # Get current price
+                current_price = self.api_wrapper.get_ltp(symbol)
             
-            if not current_price:
-                logger.warning(f"Could not get current price for {symbol}")
-                return {
-                    "summary": "Option chain analysis not available",
-                    "put_call_ratio": 0,
-                    "implied_volatility": 0,
-                    "max_pain": 0
-                }
+                if not current_price:
+                    logger.warning(f"Could not get current price for {symbol}")
+                    return self._empty_analysis()
             
-            # Get option chain
-            option_chain = self.api_wrapper.get_option_chain(symbol)
+                # Get option chain
+                option_chain = self.api_wrapper.get_option_chain(symbol)
             
-            if not option_chain:
-                logger.warning(f"Could not get option chain for {symbol}")
-                return {
-                    "summary": "Option chain analysis not available",
-                    "put_call_ratio": 0,
-                    "implied_volatility": 0,
-                    "max_pain": 0
-                }
+                if not option_chain:
+                    logger.warning(f"Could not get option chain for {symbol}")
+                    return self._empty_analysis()
             
-            # Calculate put-call ratio (mock implementation)
-            put_call_ratio = 1.2  # Mock value
+                chain = OptionChain.from_response(option_chain, underlying=current_price)
             
-            # Calculate implied volatility (mock implementation)
-            implied_volatility = 0.25  # Mock value
+            if not len(chain):
+                logger.warning(f"Empty option chain for {symbol}")
+                return self._empty_analysis()
             
-            # Calculate max pain (mock implementation)
-            max_pain = current_price * 0.98  # Mock value
+            if self.history is not None:
+                self.history.record(symbol, chain)
+            self.buildup.update(symbol, chain)
             
-            # Determine bullish/bearish sentiment
-            if put_call_ratio < 0.8:
-                sentiment = "Bullish"
-            elif put_call_ratio > 1.2:
-                sentiment = "Bearish"
-            else:
-                sentiment = "Neutral"
+            if self.solve_iv:
+                previous = self._chains.get(symbol)
+                chain.solve_iv(
+                    rate=self.risk_free_rate, dividend=self.dividend_yield,
+                    initial=previous.aligned_iv(chain) if previous is not None else None
+                )
+            self._chains[symbol] = chain
             
-            # Create summary
-            summary = f"Option chain analysis: {sentiment}. "
-            summary += f"Put-Call Ratio: {put_call_ratio:.2f}, "
-            summary += f"Implied Volatility: {implied_volatility:.2f}, "
-            summary += f"Max Pain: {max_pain:.2f}"
+            surface = self._greeks.get(symbol)
+            if surface is None:
+                surface = self._greeks[symbol] = GreeksSurface(rate=self.risk_free_rate, dividend=self.dividend_yield)
+            surface.update(chain)
             
-            return {
-                "summary": summary,
-                "put_call_ratio": put_call_ratio,
-                "implied_volatility": implied_volatility,
-                "max_pain": max_pain,
-                "sentiment": sentiment
-            }
+            smile = self._smiles.get(symbol)
+            if smile is None:
+                smile = self._smiles[symbol] = VolatilitySmile(rate=self.risk_free_rate, dividend=self.dividend_yield)
+            smile.fit(chain)
             
+            analysis = self.analyze_chain(chain)
+            analysis["oi_buildup"] = self.buildup.underlying(symbol)['buildup']
+            return analysis
+        
         except Exception as e:
             logger.error(f"Error analyzing option chain for {symbol}: {str(e)}")
             return {
@@ -87,4 +596,170 @@ class OptionChainAnalyzer:
                 "put_call_ratio": 0,
                 "implied_volatility": 0,
                 "max_pain": 0
-            }
\ No newline at end of file
+            }
+    
+    def analyze_chain(self, chain):
+        """
+        Analyze a parsed option chain
+        
+        Args:
+            chain (OptionChain): Columnar option chain with its underlying price
+        
+        Returns:
+            dict: Put-call ratios, ATM IV, skew, max pain and sentiment
+        """
+        put_call_ratio, put_call_ratio_volume = chain.put_call_ratios()
+        implied_volatility, atm_strike = chain.atm_iv()
+        iv_skew = chain.iv_skew()
+        max_pains = chain.max_pains()
+        max_pain = next(iter(max_pains.values())) if max_pains else np.nan
+        
+        # Determine bullish/bearish sentiment
+        if put_call_ratio < 0.8:
+            sentiment = "Bullish"
+        elif put_call_ratio > 1.2:
+            sentiment = "Bearish"
+        else:
+            sentiment = "Neutral"
+        
+        # Create summary
+        summary = f"Option chain analysis: {sentiment}. "
+        summary += f"Put-Call Ratio: {put_call_ratio:.2f}, "
+        summary += f"Implied Volatility: {implied_volatility:.2f}, "
+        summary += f"Max Pain: {max_pain:.2f}"
+        
+        analysis = {
+            "summary": summary,
+            "put_call_ratio": put_call_ratio,
+            "put_call_ratio_volume": put_call_ratio_volume,
+            "implied_volatility": implied_volatility,
+            "atm_strike": atm_strike,
+            "iv_skew": iv_skew,
+            "max_pain": max_pain,
+            "underlying": chain.underlying,
+            "sentiment": sentiment
+        }
+        if len(max_pains) > 1:
+            analysis["max_pain_by_expiry"] = {str(expiry): strike for expiry, strike in max_pains.items()}
+        
+        # Missing values as None so the analysis stays valid JSON
+        return {key: None if isinstance(value, float) and np.isnan(value) else value for key, value in analysis.items()}
+    
+    def analyze_panel(self, panel, symbols=None):
+        """
+        Analyze the option chains of many symbols fetched together
+        
+        Args:
+            panel (ChainPanel): Chains of several underlyings
+            symbols (list, optional): Symbols to analyze (defaults to the
+                panel's); symbols missing from the panel get an empty analysis
+        
+        Returns:
+            dict: Symbol -> option chain analysis
+        """
+        analyses = {}
+        for symbol in (panel.symbols if symbols is None else symbols):
+            chain = panel.chain(symbol)
+            if chain is None:
+                logger.warning(f"No option chain fetched for {symbol}")
+                analyses[symbol] = self._empty_analysis()
+            else:
+                analyses[symbol] = self.analyze(symbol, chain=chain)
+        return analyses
+    
+    def oi_buildup(self, symbol=None, changed_since=None):
+        """
+        OI build-up table of a symbol, or the summary of every underlying
+        
+        Args:
+            symbol (str, optional): Stock symbol; all underlyings when omitted
+            changed_since (Timestamp, optional): Only options reclassified after this time
+        
+        Returns:
+            dict: 'underlying' summary and per-option 'strikes' records for a
+                symbol (None if it was not analyzed), or 'underlyings' for all
+        """
+        if symbol is None:
+            return {"underlyings": self.buildup.summary()}
+        table = self.buildup.table(symbol, changed_since=changed_since)
+        if table is None:
+            return None
+        table = table.astype({'buildup': str, 'expiry': str, 'updated': str})
+        table = table.astype(object).where(table.notna(), None)
+        return {"underlying": self.buildup.underlying(symbol), "strikes": table.to_dict(orient='records')}
+    
+    def greeks(self, symbol):
+        """
+        Greeks of every option in the last analyzed chain of a symbol
+        
+        Args:
+            symbol (str): Stock symbol
+        
+        Returns:
+            pandas.DataFrame: One row per option, None if the symbol was not analyzed
+        """
+        surface = self._greeks.get(symbol)
+        return surface.to_frame() if surface is not None else None
+    
+    def smile(self, symbol):
+        """
+        Fitted IV smile of a symbol's last analyzed chain
+        
+        Args:
+            symbol (str): Stock symbol
+        
+        Returns:
+            VolatilitySmile: Smile answering iv(strike, expiry) and
+                iv_at_delta(delta, expiry) queries, None if the symbol was not analyzed
+        """
+        return self._smiles.get(symbol)
+    
+    def strategies(self, symbol, expiries=1, kinds=None, rank_by='expected_value', top=20):
+        """
+        Best multi-leg strategies on a symbol's last analyzed chain
+        
+        Args:
+            symbol (str): Stock symbol
+            expiries (int): Nearest expiries searched
+            kinds (list, optional): Strategy types searched (defaults to all STRATEGIES)
+            rank_by (str): One of RANK_METRICS
+            top (int): Strategies returned
+        
+        Returns:
+            pandas.DataFrame: Ranked strategies, None if the symbol was not analyzed
+        """
+        chain = self._chains.get(symbol)
+        if chain is None:
+            return None
+        return self.strategy_engine.search(chain, smile=self._smiles.get(symbol), expiries=expiries, kinds=kinds,
+                                           rank_by=rank_by, top=top)
+    
+    def portfolio_greeks(self, positions=None):
+        """
+        Aggregate Greeks of the current positions
+        
+        Option positions on symbols without an analyzed chain are analyzed first.
+        
+        Args:
+            positions (list, optional): Position dicts; fetched from the API
+                wrapper when omitted
+        
+        Returns:
+            dict: Total and per-symbol Greeks, and the unmatched positions
+        """
+        if positions is None:
+            positions = self.api_wrapper.get_positions() or []
+        for position in positions:
+            symbol = position_field(position, 'symbol')
+            if symbol and position_field(position, 'type') and symbol not in self._greeks:
+                self.analyze(symbol)
+        return portfolio_greeks(positions, self._greeks)
+    
+    @staticmethod
+    def _empty_analysis():
+        return {
+            "summary": "Option chain analysis not available",
+            "put_call_ratio": 0,
+            "implied_volatility": 0,
+            "max_pain": 0
+        }
@@ -0,0 +1,225 @@
+import logging
+import pandas as pd
+import numpy as np
+
+from app.utils.option_pricing import DAYS_PER_YEAR, black_scholes_greeks, time_to_expiry
+
+logger = logging.getLogger(__name__)
+
+GREEKS = ('delta', 'gamma', 'vega', 'theta')
+
+# Width of the time-to-expiry buckets; an option's Greeks are recomputed when it enters a new one
+DEFAULT_TIME_BUCKET_MINUTES = 5
+
+# Field names of position rows, canonical name first (Angel One positions use the later ones)
+POSITION_FIELDS = {
+    'symbol': ('symbol', 'symbolname', 'name', 'tradingsymbol'),
+    'strike': ('strike', 'strikeprice', 'strike_price'),
+    'type': ('type', 'optiontype', 'option_type'),
+    'expiry': ('expiry', 'expirydate', 'expiry_date'),
+    'quantity': ('quantity', 'netqty', 'net_quantity')
+}
+
+OPTION_TYPES = {'CE': True, 'CALL': True, 'C': True, 'PE': False, 'PUT': False, 'P': False}
+
+
+def position_field(position, name):
+    """Read a position field under any of its known names"""
+    for alias in POSITION_FIELDS[name]:
+        value = position.get(alias)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _expiry_key(label):
+    """Expiry label as a date, so '27MAR2025' and '2025-03-27' match"""
+    try:
+        return pd.Timestamp(label).normalize()
+    except (TypeError, ValueError):
+        return label
+
+
+def _differs(previous, current):
+    """Elementwise inequality treating NaN as equal to NaN"""
+    return ~((previous == current) | (np.isnan(previous) & np.isnan(current)))
+
+
+class GreeksSurface:
+    """
+    Delta, gamma, vega and theta of every option of a chain, cached by quote
+    
+    Each update compares the chain with the previous one and recomputes only
+    the options that are new or whose last price, quoted IV or time-to-expiry
+    bucket changed; a move of the underlying recomputes everything.
+    
+    Attributes:
+        chain (OptionChain): Chain of the last update
+        values (dict): Greek name -> array aligned with chain; vega is per
+            volatility point and theta per calendar day
+        recomputed (int): Number of options recomputed by the last update
+    """
+    
+    def __init__(self, rate=0.0, dividend=0.0, time_bucket=DEFAULT_TIME_BUCKET_MINUTES):
+        """
+        Args:
+            rate (float): Annual risk-free rate
+            dividend (float): Annual dividend yield of the underlying
+            time_bucket (float): Width of the time-to-expiry buckets in minutes
+        """
+        self.rate = rate
+        self.dividend = dividend
+        self.time_bucket = time_bucket
+        self.chain = None
+        self.values = {}
+        self.recomputed = 0
+        self._bucket = None
+        self._keys = None
+    
+    def update(self, chain, now=None):
+        """
+        Bring the Greeks up to date with a new snapshot of the chain
+        
+        Args:
+            chain (OptionChain): Latest chain, with its IVs solved or quoted
+            now (Timestamp, optional): Valuation time
+        
+        Returns:
+            dict: Greek name -> array aligned with chain
+        """
+        time = time_to_expiry(chain.expiry, now=now)
+        bucket = np.floor(time * (DAYS_PER_YEAR * 24 * 60 / self.time_bucket))
+        
+        previous = self.chain
+        if previous is None or not len(previous) or _differs(np.float64(previous.underlying), np.float64(chain.underlying)):
+            changed = np.ones(len(chain), dtype=bool)
+            values = {greek: np.full(len(chain), np.nan) for greek in GREEKS}
+        else:
+            index = previous.locate(chain)
+            known = index >= 0
+            index = np.maximum(index, 0)
+            changed = (~known | _differs(previous.ltp[index], chain.ltp)
+                       | _differs(previous.quoted_iv[index], chain.quoted_iv) | _differs(self._bucket[index], bucket))
+            values = {greek: self.values[greek][index] for greek in GREEKS}
+        
+        rows = np.flatnonzero(changed)
+        if len(rows):
+            fresh = black_scholes_greeks(
+                chain.underlying, chain.strike[rows], time[rows], chain.iv[rows],
+                rate=self.rate, dividend=self.dividend, is_call=chain.is_call[rows]
+            )
+            for greek in GREEKS:
+                values[greek][rows] = fresh[greek]
+        
+        self.chain = chain
+        self.values = values
+        self.recomputed = len(rows)
+        self._bucket = bucket
+        self._keys = None
+        return values
+    
+    def find(self, strike, is_call, expiry=None):
+        """
+        Position of an option in the chain
+        
+        Args:
+            strike (float): Strike price
+            is_call (bool): True for a call, False for a put
+            expiry (optional): Expiry label in any date format; the nearest
+                expiry when omitted
+        
+        Returns:
+            int: Index into the Greek arrays, -1 when the option is not in the chain
+        """
+        if self.chain is None:
+            return -1
+        if self._keys is None:
+            self._keys = {
+                (_expiry_key(label), float(option_strike), bool(call)): i
+                for i, (label, option_strike, call) in enumerate(zip(self.chain.expiry, self.chain.strike, self.chain.is_call))
+            }
+        if expiry is None:
+            labels, _ = self.chain.expiries()
+            expiry = labels[0] if labels else None
+        return self._keys.get((_expiry_key(expiry), float(strike), bool(is_call)), -1)
+    
+    def to_frame(self):
+        """
+        Greeks of every option as a DataFrame
+        
+        Returns:
+            pandas.DataFrame: strike, type, expiry, ltp, iv and one column per Greek
+        """
+        if self.chain is None:
+            return pd.DataFrame(columns=['strike', 'type', 'expiry', 'ltp', 'iv', *GREEKS])
+        chain = self.chain
+        frame = pd.DataFrame({
+            'strike': chain.strike,
+            'type': np.where(chain.is_call, 'CE', 'PE'),
+            'expiry': chain.expiry,
+            'ltp': chain.ltp,
+            'iv': chain.iv
+        })
+        for greek in GREEKS:
+            frame[greek] = self.values[greek]
+        return frame
+
+
+def portfolio_greeks(positions, surfaces):
+    """
+    Aggregate Greeks of a set of positions
+    
+    Positions without a strike and option type are taken as positions in the
+    underlying itself (delta 1 per unit).
+    
+    Args:
+        positions (list): Position dicts with symbol, quantity and, for options,
+            strike, type and expiry (Angel One position fields are understood)
+        surfaces (dict): Symbol -> GreeksSurface of its option chain
+    
+    Returns:
+        dict: 'total' and 'by_symbol' Greeks (quantity weighted, plus
+            'delta_value', the delta in units of the underlying's currency),
+            and 'unmatched' positions whose option was not found
+    """
+    total = dict.fromkeys(GREEKS + ('delta_value',), 0.0)
+    by_symbol = {}
+    unmatched = []
+    
+    for position in positions:
+        symbol = position_field(position, 'symbol')
+        try:
+            quantity = float(position_field(position, 'quantity') or 0)
+        except (TypeError, ValueError):
+            unmatched.append(position)
+            continue
+        if not quantity:
+            continue
+        
+        surface = surfaces.get(symbol)
+        option_type = str(position_field(position, 'type') or '').upper()
+        strike = position_field(position, 'strike')
+        if option_type in OPTION_TYPES and strike is not None:
+            row = -1
+            if surface is not None:
+                try:
+                    row = surface.find(float(strike), OPTION_TYPES[option_type], position_field(position, 'expiry'))
+                except (TypeError, ValueError):
+                    row = -1
+            if row < 0:
+                unmatched.append(position)
+                continue
+            exposure = {greek: quantity * float(surface.values[greek][row]) for greek in GREEKS}
+            exposure['delta_value'] = exposure['delta'] * surface.chain.underlying
+        else:
+            # Position in the underlying
+            price = surface.chain.underlying if surface is not None else position_field(position, 'ltp')
+            exposure = {'delta': quantity, 'gamma': 0.0, 'vega': 0.0, 'theta': 0.0,
+                        'delta_value': quantity * float(price) if price is not None else np.nan}
+        
+        totals = by_symbol.setdefault(symbol, dict.fromkeys(GREEKS + ('delta_value',), 0.0))
+        for name, value in exposure.items():
+            totals[name] += value
+            total[name] += value
+    
+    return {'total': total, 'by_symbol': by_symbol, 'unmatched': unmatched}
@@ -0,0 +1,307 @@
+import logging
+import pandas as pd
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SciPy's normal CDF is used when available; the fallback below matches it to
+# about 1e-16 absolute error
+try:
+    from scipy.special import ndtr
+except ImportError:
+    ndtr = None
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+# Volatility bracket of the implied-volatility solver
+MIN_VOLATILITY = 1e-4
+MAX_VOLATILITY = 5.0
+
+# Fallback first guess when no warm start or approximation is available
+DEFAULT_VOLATILITY = 0.3
+
+DAYS_PER_YEAR = 365.0
+
+# NSE options expire at the close of the expiry day, in exchange time
+EXPIRY_TIME = pd.Timedelta(hours=15, minutes=30)
+EXCHANGE_TZ = 'Asia/Kolkata'
+
+
+def norm_pdf(x):
+    """Standard normal density"""
+    return np.exp(-0.5 * np.square(x)) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """
+    Standard normal cumulative distribution
+    
+    Uses scipy.special.ndtr when SciPy is installed, otherwise Hart's double
+    precision rational approximation (as given by West, 2005).
+    """
+    if ndtr is not None:
+        return ndtr(x)
+    
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x)
+    gaussian = np.exp(-0.5 * z * z)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        numerator = ((((((3.52624965998911e-02 * z + 0.700383064443688) * z + 6.37396220353165) * z
+                        + 33.912866078383) * z + 112.079291497871) * z + 221.213596169931) * z + 220.206867912376)
+        denominator = (((((((8.83883476483184e-02 * z + 1.75566716318264) * z + 16.064177579207) * z
+                            + 86.7807322029461) * z + 296.564248779674) * z + 637.333633378831) * z
+                        + 793.826512519948) * z + 440.413735824752)
+        # Continued fraction for the far tail
+        fraction = z + 0.65
+        for k in (4.0, 3.0, 2.0, 1.0):
+            fraction = z + k / fraction
+        tail = np.where(z < 7.07106781186547, gaussian * numerator / denominator, gaussian / fraction / SQRT_2PI)
+    tail = np.where(z > 37.0, 0.0, tail)
+    return np.where(x > 0, 1.0 - tail, tail)
+
+
+def _d1_d2(spot, strike, time, volatility, rate, dividend):
+    """Black-Scholes d1 and d2"""
+    deviation = volatility * np.sqrt(time)
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * volatility * volatility) * time) / deviation
+    return d1, d1 - deviation
+
+
+def black_scholes_price(spot, strike, time, volatility, rate=0.0, dividend=0.0, is_call=True):
+    """
+    Black-Scholes price of European options
+    
+    Args:
+        spot (float or array): Underlying price
+        strike (float or array): Strike price
+        time (float or array): Time to expiry in years
+        volatility (float or array): Annualized volatility as a fraction
+        rate (float or array): Continuously compounded risk-free rate
+        dividend (float or array): Continuous dividend yield
+        is_call (bool or array): True for calls, False for puts
+    
+    Returns:
+        numpy.ndarray: Option prices
+    """
+    spot, strike, time, volatility, rate, dividend, is_call = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (spot, strike, time, volatility, rate, dividend)),
+        np.asarray(is_call, dtype=bool)
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d1, d2 = _d1_d2(spot, strike, time, volatility, rate, dividend)
+        discounted_spot = spot * np.exp(-dividend * time)
+        discounted_strike = strike * np.exp(-rate * time)
+        call = discounted_spot * norm_cdf(d1) - discounted_strike * norm_cdf(d2)
+        # Put-call parity
+        return np.where(is_call, call, call - discounted_spot + discounted_strike)
+
+
+def black_scholes_vega(spot, strike, time, volatility, rate=0.0, dividend=0.0):
+    """Sensitivity of the Black-Scholes price to volatility (per 1.00 of volatility)"""
+    spot, strike, time, volatility = (np.asarray(value, dtype=np.float64) for value in (spot, strike, time, volatility))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d1, _ = _d1_d2(spot, strike, time, volatility, rate, dividend)
+        return spot * np.exp(-dividend * time) * norm_pdf(d1) * np.sqrt(time)
+
+
+def black_scholes_greeks(spot, strike, time, volatility, rate=0.0, dividend=0.0, is_call=True):
+    """
+    Black-Scholes delta, gamma, vega and theta of European options
+    
+    Args:
+        spot, strike, time, volatility, rate, dividend, is_call: As in black_scholes_price
+    
+    Returns:
+        dict: 'delta', 'gamma', 'vega' (per volatility point, i.e. 0.01) and
+            'theta' (per calendar day) arrays
+    """
+    spot, strike, time, volatility, rate, dividend, is_call = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (spot, strike, time, volatility, rate, dividend)),
+        np.asarray(is_call, dtype=bool)
+    )
+    with np.errstate(invalid='ignore', divide='ignore'):
+        d1, d2 = _d1_d2(spot, strike, time, volatility, rate, dividend)
+        spot_discount = np.exp(-dividend * time)
+        strike_discount = strike * np.exp(-rate * time)
+        density = norm_pdf(d1)
+        root_time = np.sqrt(time)
+        sign = np.where(is_call, 1.0, -1.0)
+        # N(d) for calls and -N(-d) for puts
+        signed_d1 = sign * norm_cdf(sign * d1)
+        signed_d2 = sign * norm_cdf(sign * d2)
+        
+        decay = -spot * spot_discount * density * volatility / (2.0 * root_time)
+        theta = decay - rate * strike_discount * signed_d2 + dividend * spot * spot_discount * signed_d1
+        return {
+            'delta': spot_discount * signed_d1,
+            'gamma': spot_discount * density / (spot * volatility * root_time),
+            'vega': spot * spot_discount * density * root_time / 100.0,
+            'theta': theta / DAYS_PER_YEAR
+        }
+
+
+def _approximate_volatility(call_price, discounted_spot, discounted_strike, time):
+    """Corrado-Miller closed-form approximation of the implied volatility of a call"""
+    total = discounted_spot + discounted_strike
+    half_moneyness = 0.5 * (discounted_spot - discounted_strike)
+    excess = call_price - half_moneyness
+    with np.errstate(invalid='ignore', divide='ignore'):
+        root = np.sqrt(np.maximum(excess * excess - (discounted_spot - discounted_strike) ** 2 / np.pi, 0.0))
+        return SQRT_2PI / total * (excess + root) / np.sqrt(time)
+
+
+def implied_volatility(price, spot, strike, time, rate=0.0, dividend=0.0, is_call=True,
+                       initial=None, tol=1e-6, max_iter=100, return_iterations=False):
+    """
+    Black-Scholes implied volatility of a whole array of options
+    
+    Newton-Raphson steps on every unconverged option at once, each kept
+    inside a per-option bracket that shrinks as prices are evaluated; a
+    step leaving the bracket (or a vanishing vega) falls back to bisection.
+    Puts are solved as calls through put-call parity. Converged options
+    drop out of the active set, so a warm start from the previous
+    snapshot's IVs settles a quiet chain in one or two iterations.
+    
+    Args:
+        price (array): Option prices
+        spot, strike, time, rate, dividend (float or array): As in black_scholes_price
+        is_call (bool or array): True for calls, False for puts
+        initial (array, optional): Starting volatilities (e.g. the previous
+            snapshot's solution); NaN entries start from a closed-form approximation
+        tol (float): Convergence threshold on the volatility step
+        max_iter (int): Maximum number of iterations
+        return_iterations (bool): Also return the iterations used per option
+    
+    Returns:
+        numpy.ndarray: Implied volatilities, NaN where the price is outside the
+            no-arbitrage bounds or the inputs are invalid (and the per-option
+            iteration counts when return_iterations is set)
+    """
+    price, spot, strike, time, rate, dividend, is_call = np.broadcast_arrays(
+        *(np.asarray(value, dtype=np.float64) for value in (price, spot, strike, time, rate, dividend)),
+        np.asarray(is_call, dtype=bool)
+    )
+    shape = price.shape
+    price, spot, strike, time, rate, dividend, is_call = (
+        value.ravel() for value in (price, spot, strike, time, rate, dividend, is_call)
+    )
+    volatility = np.full(price.shape, np.nan)
+    iterations = np.zeros(price.shape, dtype=np.int64)
+    
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        discounted_spot = spot * np.exp(-dividend * time)
+        discounted_strike = strike * np.exp(-rate * time)
+        call_price = np.where(is_call, price, price + discounted_spot - discounted_strike)
+        
+        # Prices strictly between the no-arbitrage bounds have a unique volatility
+        lower = np.maximum(discounted_spot - discounted_strike, 0.0)
+        solvable = (
+            np.isfinite(call_price) & np.isfinite(discounted_spot) & np.isfinite(discounted_strike)
+            & (time > 0) & (strike > 0) & (spot > 0)
+            & (call_price > lower) & (call_price < discounted_spot)
+        )
+        active = np.flatnonzero(solvable)
+        
+        guess = _approximate_volatility(call_price[active], discounted_spot[active], discounted_strike[active], time[active])
+        if initial is not None:
+            warm = np.broadcast_to(np.asarray(initial, dtype=np.float64), shape).ravel()[active]
+            guess = np.where(np.isfinite(warm), warm, guess)
+        guess = np.where(np.isfinite(guess), guess, DEFAULT_VOLATILITY)
+        sigma = np.clip(guess, MIN_VOLATILITY, MAX_VOLATILITY)
+        
+        target = call_price[active]
+        s, k, t = discounted_spot[active], discounted_strike[active], time[active]
+        log_moneyness = np.log(s / k)
+        root_time = np.sqrt(t)
+        low = np.full(len(active), MIN_VOLATILITY)
+        high = np.full(len(active), MAX_VOLATILITY)
+        
+        for iteration in range(1, max_iter + 1):
+            if not len(active):
+                break
+            deviation = sigma * root_time
+            d1 = log_moneyness / deviation + 0.5 * deviation
+            model = s * norm_cdf(d1) - k * norm_cdf(d1 - deviation)
+            difference = model - target
+            vega = s * norm_pdf(d1) * root_time
+            
+            # The call price increases with volatility, so the sign of the error narrows the bracket
+            above = difference > 0
+            high = np.where(above, sigma, high)
+            low = np.where(above, low, sigma)
+            
+            step = sigma - difference / vega
+            done = (difference == 0) | (np.abs(step - sigma) < tol)
+            # Converged options keep their Newton step; the rest fall back to bisection when it leaves the bracket
+            outside = ~done & (~np.isfinite(step) | (step <= low) | (step >= high))
+            sigma = np.where(outside, 0.5 * (low + high), np.where(difference == 0, sigma, step))
+            if done.any():
+                finished = active[done]
+                volatility[finished] = sigma[done]
+                iterations[finished] = iteration
+                keep = ~done
+                active, sigma, target, s, k, t = active[keep], sigma[keep], target[keep], s[keep], k[keep], t[keep]
+                log_moneyness, root_time, low, high = log_moneyness[keep], root_time[keep], low[keep], high[keep]
+        
+        if len(active):
+            logger.warning(f"Implied volatility did not converge for {len(active)} options in {max_iter} iterations")
+            volatility[active] = sigma
+            iterations[active] = max_iter
+    
+    volatility = volatility.reshape(shape)
+    if return_iterations:
+        return volatility, iterations.reshape(shape)
+    return volatility
+
+
+def exchange_time(moment=None):
+    """
+    A time in the exchange's time zone
+    
+    Args:
+        moment (str or Timestamp, optional): Time to convert; naive values are
+            taken as exchange-local (defaults to the current time)
+    
+    Returns:
+        pandas.Timestamp: Timezone-aware timestamp in EXCHANGE_TZ
+    """
+    if moment is None:
+        return pd.Timestamp.now(tz=EXCHANGE_TZ)
+    moment = pd.Timestamp(moment)
+    return moment.tz_localize(EXCHANGE_TZ) if moment.tz is None else moment.tz_convert(EXCHANGE_TZ)
+
+
+def time_to_expiry(expiry, now=None):
+    """
+    Years from now until the close of each expiry day
+    
+    Both sides are compared in exchange time, so the result does not depend
+    on the host's time zone.
+    
+    Args:
+        expiry (str, Timestamp or array-like): Expiry dates; date-only values
+            expire at EXPIRY_TIME on that day
+        now (Timestamp, optional): Valuation time; naive values are taken as
+            exchange-local (defaults to the current time)
+    
+    Returns:
+        numpy.ndarray: Time to expiry in years, NaN for unparseable labels,
+            and zero once the expiry has passed
+    """
+    now = exchange_time(now)
+    labels = np.atleast_1d(np.asarray(expiry, dtype=object))
+    codes, unique = pd.factorize(labels)
+    
+    years = []
+    for label in unique:
+        try:
+            moment = exchange_time(label)
+        except (TypeError, ValueError):
+            years.append(np.nan)
+            continue
+        if moment == moment.normalize():
+            moment += EXPIRY_TIME
+        years.append(max((moment - now) / pd.Timedelta(days=1), 0.0) / DAYS_PER_YEAR)
+    
+    years = np.append(np.asarray(years, dtype=np.float64), np.nan)
+    return years[codes]
@@ -0,0 +1,465 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.utils.option_pricing import norm_cdf
+from app.utils.volatility_smile import VolatilitySmile
+
+logger = logging.getLogger(__name__)
+
+# Strategy types, in code order
+STRATEGIES = (
+    'bull_call_spread', 'bear_call_spread', 'bull_put_spread', 'bear_put_spread',
+    'long_straddle', 'short_straddle', 'long_strangle', 'short_strangle', 'iron_condor'
+)
+(BULL_CALL_SPREAD, BEAR_CALL_SPREAD, BULL_PUT_SPREAD, BEAR_PUT_SPREAD,
+ LONG_STRADDLE, SHORT_STRADDLE, LONG_STRANGLE, SHORT_STRANGLE, IRON_CONDOR) = range(len(STRATEGIES))
+
+# Metrics strategies can be ranked by
+RANK_METRICS = ('expected_value', 'probability_of_profit', 'reward_risk')
+
+# Legs of the widest strategy (iron condor)
+MAX_LEGS = 4
+
+# Search limits: strike band around the underlying (fraction of it) and
+# spread width in listed strikes
+DEFAULT_MONEYNESS = 0.15
+DEFAULT_MAX_WIDTH = 8
+
+
+class StrategySet:
+    """
+    Multi-leg strategies on one chain, stored as parallel arrays
+    
+    Attributes:
+        kind (numpy.ndarray): Strategy type of every strategy, indexing STRATEGIES
+        option (numpy.ndarray): (n, MAX_LEGS) chain positions of the legs, -1 for unused legs
+        quantity (numpy.ndarray): (n, MAX_LEGS) lots per leg, positive when bought,
+            negative when sold and 0 for unused legs
+        group (numpy.ndarray): Expiry of every strategy, as a position in chain.expiries()
+    """
+    
+    def __init__(self, kind, option, quantity, group):
+        self.kind = np.asarray(kind, dtype=np.int8)
+        self.option = np.asarray(option, dtype=np.int64).reshape(-1, MAX_LEGS)
+        self.quantity = np.asarray(quantity, dtype=np.float64).reshape(-1, MAX_LEGS)
+        self.group = np.asarray(group, dtype=np.int64)
+    
+    def __len__(self):
+        return len(self.kind)
+    
+    @classmethod
+    def concatenate(cls, sets):
+        """
+        Join strategy sets of the same chain
+        
+        Args:
+            sets (list): StrategySet objects
+        
+        Returns:
+            StrategySet: All strategies, in order
+        """
+        if not sets:
+            return cls(np.zeros(0), np.zeros((0, MAX_LEGS)), np.zeros((0, MAX_LEGS)), np.zeros(0))
+        return cls(
+            np.concatenate([s.kind for s in sets]),
+            np.concatenate([s.option for s in sets]),
+            np.concatenate([s.quantity for s in sets]),
+            np.concatenate([s.group for s in sets])
+        )
+    
+    def take(self, rows):
+        """
+        Subset of the strategies
+        
+        Args:
+            rows (array-like): Positions or boolean mask
+        
+        Returns:
+            StrategySet: Selected strategies
+        """
+        return StrategySet(self.kind[rows], self.option[rows], self.quantity[rows], self.group[rows])
+    
+    def legs(self, chain):
+        """
+        Strike, type and price of every leg
+        
+        Unused legs repeat the first leg's strike with no quantity, so they
+        add neither payoff nor a kink.
+        
+        Args:
+            chain (OptionChain): Chain the strategies were built on
+        
+        Returns:
+            tuple: (n, MAX_LEGS) strike, is_call and ltp arrays
+        """
+        used = self.option >= 0
+        option = np.where(used, self.option, self.option[:, :1])
+        ltp = np.where(used, chain.ltp[option], 0.0)
+        return chain.strike[option], chain.is_call[option], ltp
+
+
+def _structures(kind, pairs, quantities):
+    """StrategySet rows of one structure from its leg option positions"""
+    option = np.full((len(pairs[0]), MAX_LEGS), -1, dtype=np.int64)
+    quantity = np.zeros((len(pairs[0]), MAX_LEGS))
+    for leg, (positions, lots) in enumerate(zip(pairs, quantities)):
+        option[:, leg] = positions
+        quantity[:, leg] = lots
+    return kind, option, quantity
+
+
+def payoff_at(strike, is_call, quantity, premium, prices):
+    """
+    Expiry payoff of strategies at underlying prices
+    
+    Args:
+        strike (numpy.ndarray): (n, legs) strikes
+        is_call (numpy.ndarray): (n, legs) True for calls
+        quantity (numpy.ndarray): (n, legs) signed lots
+        premium (numpy.ndarray): (n,) net premium paid (negative for a credit)
+        prices (numpy.ndarray): (m,) prices shared by all strategies, or (n, m)
+    
+    Returns:
+        numpy.ndarray: (n, m) profit at each price
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    prices = prices[None, None, :] if prices.ndim == 1 else prices[:, None, :]
+    strike = strike[:, :, None]
+    intrinsic = np.where(is_call[:, :, None], np.maximum(prices - strike, 0.0), np.maximum(strike - prices, 0.0))
+    return np.einsum('nl,nlm->nm', quantity, intrinsic) - premium[:, None]
+
+
+def payoff_statistics(strike, is_call, quantity, premium):
+    """
+    Exact maximum profit, maximum loss and breakevens of expiry payoffs
+    
+    A payoff is linear between its strikes, so it is evaluated only at zero
+    and at each strike, with the net call quantity as its slope beyond the
+    highest strike; breakevens are the zero crossings of those segments.
+    
+    Args:
+        strike (numpy.ndarray): (n, legs) strikes
+        is_call (numpy.ndarray): (n, legs) True for calls
+        quantity (numpy.ndarray): (n, legs) signed lots
+        premium (numpy.ndarray): (n,) net premium paid
+    
+    Returns:
+        dict: max_profit and max_loss (inf when unbounded), breakevens as
+            (n, legs + 1) prices in increasing order padded with NaN, and
+            profit_at_zero (True where the payoff is positive at a zero price)
+    """
+    points = np.sort(np.concatenate([np.zeros((len(strike), 1)), strike], axis=1), axis=1)
+    values = payoff_at(strike, is_call, quantity, premium, points)
+    slope = (quantity * is_call).sum(axis=1)
+    
+    max_profit = np.where(slope > 0, np.inf, values.max(axis=1))
+    max_loss = np.where(slope < 0, -np.inf, values.min(axis=1))
+    
+    profitable = values > 0
+    flips = profitable[:, 1:] != profitable[:, :-1]
+    x0, x1, y0, y1 = points[:, :-1], points[:, 1:], values[:, :-1], values[:, 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inside = np.where(flips, x0 - y0 * (x1 - x0) / (y1 - y0), np.nan)
+        tail_profitable = (slope > 0) | ((slope == 0) & profitable[:, -1])
+        tail = np.where(tail_profitable != profitable[:, -1], points[:, -1] - values[:, -1] / slope, np.nan)
+    return {
+        'max_profit': max_profit,
+        'max_loss': max_loss,
+        'breakevens': np.concatenate([inside, tail[:, None]], axis=1),
+        'profit_at_zero': profitable[:, 0]
+    }
+
+
+def lognormal_tail(price, forward, volatility, time):
+    """
+    Probability that a lognormal underlying ends above prices
+    
+    Args:
+        price (numpy.ndarray): Prices (NaN entries give 0)
+        forward (float or array): Forward price of the underlying
+        volatility (float or array): Annual volatility
+        time (float or array): Years to expiry
+    
+    Returns:
+        numpy.ndarray: P(S_T > price)
+    """
+    deviation = volatility * np.sqrt(time)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d2 = (np.log(forward / price) - 0.5 * deviation ** 2) / deviation
+    return np.where(np.isnan(price), 0.0, norm_cdf(np.nan_to_num(d2, nan=0.0, posinf=np.inf)))
+
+
+def expected_intrinsic(strike, is_call, forward, volatility, time):
+    """
+    Undiscounted expected expiry value of options under a lognormal underlying
+    
+    Args:
+        strike (numpy.ndarray): Strikes
+        is_call (numpy.ndarray): True for calls
+        forward, volatility, time (float or array): Forward price, annual
+            volatility and years to expiry of each option
+    
+    Returns:
+        numpy.ndarray: Black's undiscounted option values
+    """
+    deviation = volatility * np.sqrt(time)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        d1 = (np.log(forward / strike) + 0.5 * deviation ** 2) / deviation
+    d2 = d1 - deviation
+    call = forward * norm_cdf(d1) - strike * norm_cdf(d2)
+    put = strike * norm_cdf(-d2) - forward * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+class StrategyEngine:
+    """
+    Builds, evaluates and ranks multi-leg option strategies on a chain
+    
+    Candidates are verticals, straddles, strangles and iron condors on the
+    liquid strikes within `moneyness` of the underlying, spreads at most
+    `max_width` strikes wide and condors with equal wings; this keeps the
+    search to thousands of combinations per underlying. Every candidate is
+    evaluated at once as arrays: exact payoff extremes and breakevens from
+    the strikes, and probability of profit and expected value under a
+    lognormal underlying at the fitted smile's at-the-money volatility of
+    the expiry.
+    """
+    
+    def __init__(self, rate=0.0, dividend=0.0, moneyness=DEFAULT_MONEYNESS, max_width=DEFAULT_MAX_WIDTH,
+                 min_oi=0):
+        """
+        Args:
+            rate (float): Annual risk-free rate
+            dividend (float): Annual dividend yield of the underlying
+            moneyness (float): Largest strike distance from the underlying, as a fraction of it
+            max_width (int): Most listed strikes between the legs of a spread or condor wing
+            min_oi (float): Least open interest of an option used as a leg
+        """
+        self.rate = rate
+        self.dividend = dividend
+        self.moneyness = moneyness
+        self.max_width = max_width
+        self.min_oi = min_oi
+    
+    def candidates(self, chain, expiries=1, kinds=None):
+        """
+        Enumerate candidate strategies
+        
+        Args:
+            chain (OptionChain): Chain with prices and its underlying price
+            expiries (int): Nearest expiries searched
+            kinds (list, optional): Strategy types to build (defaults to all STRATEGIES)
+        
+        Returns:
+            StrategySet: Candidates, each within one expiry
+        """
+        kinds = set(STRATEGIES if kinds is None else kinds)
+        spot = chain.underlying
+        if not len(chain) or not np.isfinite(spot):
+            return StrategySet.concatenate([])
+        labels, groups = chain.expiries()
+        usable = (np.isfinite(chain.ltp) & (chain.ltp > 0) & np.isfinite(chain.strike)
+                  & (np.abs(chain.strike / spot - 1) <= self.moneyness) & (np.nan_to_num(chain.oi) >= self.min_oi))
+        
+        sets = []
+        for group in range(min(expiries, len(labels))):
+            members = np.flatnonzero(usable & (groups == group))
+            if not len(members):
+                continue
+            strikes, position = np.unique(chain.strike[members], return_inverse=True)
+            # Chain position of the call and put at every strike, -1 when not listed
+            calls = np.full(len(strikes), -1, dtype=np.int64)
+            puts = np.full(len(strikes), -1, dtype=np.int64)
+            call = chain.is_call[members]
+            calls[position[call]] = members[call]
+            puts[position[~call]] = members[~call]
+            parts = self._expiry_candidates(strikes, calls, puts, spot, kinds)
+            for kind, option, quantity in parts:
+                if len(option):
+                    sets.append(StrategySet(np.full(len(option), kind), option, quantity, np.full(len(option), group)))
+        return StrategySet.concatenate(sets)
+    
+    def _expiry_candidates(self, strikes, calls, puts, spot, kinds):
+        """Structures of one expiry from its call and put positions per strike"""
+        n = len(strikes)
+        parts = []
+        lower, upper = np.triu_indices(n, 1)
+        narrow = upper - lower <= self.max_width
+        
+        both = (calls[lower] >= 0) & (calls[upper] >= 0) & narrow
+        low, high = calls[lower[both]], calls[upper[both]]
+        if 'bull_call_spread' in kinds:
+            parts.append(_structures(BULL_CALL_SPREAD, (low, high), (1, -1)))
+        if 'bear_call_spread' in kinds:
+            parts.append(_structures(BEAR_CALL_SPREAD, (low, high), (-1, 1)))
+        
+        both = (puts[lower] >= 0) & (puts[upper] >= 0) & narrow
+        low, high = puts[lower[both]], puts[upper[both]]
+        if 'bull_put_spread' in kinds:
+            parts.append(_structures(BULL_PUT_SPREAD, (low, high), (1, -1)))
+        if 'bear_put_spread' in kinds:
+            parts.append(_structures(BEAR_PUT_SPREAD, (low, high), (-1, 1)))
+        
+        listed = (calls >= 0) & (puts >= 0)
+        if 'long_straddle' in kinds:
+            parts.append(_structures(LONG_STRADDLE, (calls[listed], puts[listed]), (1, 1)))
+        if 'short_straddle' in kinds:
+            parts.append(_structures(SHORT_STRADDLE, (calls[listed], puts[listed]), (-1, -1)))
+        
+        # Strangles and condors sell or buy out-of-the-money options on both sides
+        otm = (puts[lower] >= 0) & (calls[upper] >= 0) & (strikes[lower] < spot) & (strikes[upper] > spot)
+        strangle = otm & (upper - lower <= 2 * self.max_width)
+        put_leg, call_leg = puts[lower[strangle]], calls[upper[strangle]]
+        if 'long_strangle' in kinds:
+            parts.append(_structures(LONG_STRANGLE, (put_leg, call_leg), (1, 1)))
+        if 'short_strangle' in kinds:
+            parts.append(_structures(SHORT_STRANGLE, (put_leg, call_leg), (-1, -1)))
+        
+        if 'iron_condor' in kinds:
+            body_put, body_call = np.repeat(lower[otm], self.max_width), np.repeat(upper[otm], self.max_width)
+            wing = np.tile(np.arange(1, self.max_width + 1), int(otm.sum()))
+            wing_put, wing_call = body_put - wing, body_call + wing
+            valid = (wing_put >= 0) & (wing_call < n)
+            valid[valid] = (puts[wing_put[valid]] >= 0) & (calls[wing_call[valid]] >= 0)
+            parts.append(_structures(
+                IRON_CONDOR,
+                (puts[wing_put[valid]], puts[body_put[valid]], calls[body_call[valid]], calls[wing_call[valid]]),
+                (1, -1, -1, 1)
+            ))
+        return parts
+    
+    def evaluate(self, chain, strategies, smile=None, now=None):
+        """
+        Evaluate strategies at expiry
+        
+        Args:
+            chain (OptionChain): Chain the strategies were built on
+            strategies (StrategySet): Strategies to evaluate
+            smile (VolatilitySmile, optional): Fitted smile of the chain; fitted when omitted
+            now (Timestamp, optional): Valuation time when the smile is fitted here
+        
+        Returns:
+            dict: Arrays of net_premium (paid; negative for a credit),
+                max_profit, max_loss, breakevens ((n, MAX_LEGS + 1), NaN padded),
+                probability_of_profit, expected_value (discounted expected
+                payoff less the premium) and reward_risk (max profit over max loss)
+        """
+        if smile is None:
+            smile = VolatilitySmile(rate=self.rate, dividend=self.dividend)
+            smile.fit(chain, now=now)
+        strike, is_call, ltp = strategies.legs(chain)
+        quantity = strategies.quantity
+        premium = (quantity * ltp).sum(axis=1)
+        result = payoff_statistics(strike, is_call, quantity, premium)
+        result['net_premium'] = premium
+        
+        # Distribution of the underlying at each strategy's expiry
+        labels, _ = chain.expiries()
+        index = smile.expiry_index(np.array(labels + [None], dtype=object))
+        fitted = index >= 0
+        index = np.where(fitted, index, 0)
+        time = np.where(fitted, smile.times[index], np.nan) if len(smile) else np.full(len(index), np.nan)
+        forward = np.where(fitted, smile.forwards[index], np.nan) if len(smile) else np.full(len(index), np.nan)
+        volatility = smile.iv(forward, np.where(fitted, index, -1)) if len(smile) else np.full(len(index), np.nan)
+        group = np.where(strategies.group >= 0, strategies.group, len(labels))
+        time, forward, volatility = time[group], forward[group], volatility[group]
+        
+        breakevens = result['breakevens']
+        # Profitable at zero or not, then each breakeven in price order
+        # alternately ends and starts a profitable range
+        starts_profitable = result['profit_at_zero']
+        sign = np.where(starts_profitable, -1.0, 1.0)[:, None]
+        order = np.cumsum(~np.isnan(breakevens), axis=1) - 1
+        direction = np.where(np.isnan(breakevens), 0.0, sign * np.where(order % 2 == 0, 1.0, -1.0))
+        tails = lognormal_tail(breakevens, forward[:, None], volatility[:, None], time[:, None])
+        result['probability_of_profit'] = np.clip(
+            starts_profitable + (direction * tails).sum(axis=1), 0.0, 1.0)
+        
+        value = expected_intrinsic(strike, is_call, forward[:, None], volatility[:, None], time[:, None])
+        discount = np.exp(-self.rate * time)
+        result['expected_value'] = discount * (quantity * value).sum(axis=1) - premium
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['reward_risk'] = np.where(result['max_loss'] < 0, result['max_profit'] / -result['max_loss'], np.inf)
+        unknown = ~np.isfinite(volatility) | ~(time > 0)
+        result['probability_of_profit'][unknown] = np.nan
+        result['expected_value'][unknown] = np.nan
+        return result
+    
+    def payoff_grid(self, chain, strategies, prices):
+        """
+        Expiry payoff of strategies over a grid of underlying prices
+        
+        Args:
+            chain (OptionChain): Chain the strategies were built on
+            strategies (StrategySet): Strategies to evaluate
+            prices (array-like): Underlying prices
+        
+        Returns:
+            numpy.ndarray: (len(strategies), len(prices)) profit at each price
+        """
+        strike, is_call, ltp = strategies.legs(chain)
+        premium = (strategies.quantity * ltp).sum(axis=1)
+        return payoff_at(strike, is_call, strategies.quantity, premium, prices)
+    
+    def search(self, chain, smile=None, expiries=1, kinds=None, rank_by='expected_value', top=20, now=None):
+        """
+        Find the best strategies on a chain
+        
+        Candidates that cannot lose are dropped, as they only arise from stale prices.
+        
+        Args:
+            chain (OptionChain): Chain with prices, IVs and its underlying price
+            smile (VolatilitySmile, optional): Fitted smile of the chain
+            expiries (int): Nearest expiries searched
+            kinds (list, optional): Strategy types searched (defaults to all STRATEGIES)
+            rank_by (str): One of RANK_METRICS
+            top (int): Strategies returned
+            now (Timestamp, optional): Valuation time when the smile is fitted here
+        
+        Returns:
+            pandas.DataFrame: Best strategies first, with strategy, expiry,
+                legs, net_premium, max_profit, max_loss, breakevens,
+                probability_of_profit, expected_value and reward_risk
+        """
+        if rank_by not in RANK_METRICS:
+            raise ValueError(f"rank_by must be one of {', '.join(RANK_METRICS)}")
+        strategies = self.candidates(chain, expiries=expiries, kinds=kinds)
+        metrics = self.evaluate(chain, strategies, smile=smile, now=now) if len(strategies) else None
+        if metrics is None:
+            return self._frame(chain, strategies, {}, np.zeros(0, dtype=np.int64))
+        
+        score = np.where(metrics['max_loss'] < 0, np.nan_to_num(metrics[rank_by], nan=-np.inf), -np.inf)
+        candidates = np.flatnonzero(score > -np.inf)
+        if len(candidates) > top:
+            candidates = candidates[np.argpartition(-score[candidates], top - 1)[:top]]
+        best = candidates[np.argsort(-score[candidates], kind='stable')]
+        logger.debug(f"Ranked {len(strategies)} strategies by {rank_by}")
+        return self._frame(chain, strategies, metrics, best)
+    
+    @staticmethod
+    def _frame(chain, strategies, metrics, rows):
+        """Table of selected strategies"""
+        labels, _ = chain.expiries()
+        legs = []
+        for option, quantity in zip(strategies.option[rows], strategies.quantity[rows]):
+            legs.append(', '.join(
+                f"{int(lots):+d} {chain.strike[position]:g} {'CE' if chain.is_call[position] else 'PE'}"
+                for position, lots in zip(option, quantity) if position >= 0
+            ))
+        frame = pd.DataFrame({
+            'strategy': [STRATEGIES[kind] for kind in strategies.kind[rows]],
+            'expiry': [labels[group] for group in strategies.group[rows]],
+            'legs': legs
+        })
+        for name in ('net_premium', 'max_profit', 'max_loss'):
+            frame[name] = metrics[name][rows] if metrics else np.zeros(0)
+        frame['breakevens'] = [
+            [float(price) for price in prices if not np.isnan(price)]
+            for prices in (metrics['breakevens'][rows] if metrics else [])
+        ]
+        for name in ('probability_of_profit', 'expected_value', 'reward_risk'):
+            frame[name] = metrics[name][rows] if metrics else np.zeros(0)
+        return frame
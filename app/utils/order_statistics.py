@@ -0,0 +1,193 @@
+import logging
+from bisect import bisect_left, bisect_right, insort
+
+logger = logging.getLogger(__name__)
+
+# Tie handling of rank queries, as in pandas
+RANK_METHODS = ('average', 'min', 'max')
+
+
+class SortedBlockList:
+    """
+    Sorted multiset of numbers with O(log n) rank queries and updates
+    
+    Values live in a list of sorted blocks of at most 2 * load items. A
+    bisect over the block maxima finds the block, a bisect inside the block
+    finds the position, and a Fenwick tree over the block sizes turns a
+    block position into a rank. Inserting or removing shifts at most one
+    block (a C-level memmove of a few hundred pointers); the tree is rebuilt
+    only when a block splits or empties.
+    """
+    
+    def __init__(self, values=(), load=128):
+        """
+        Args:
+            values (iterable): Initial values
+            load (int): Target block size
+        """
+        self.load = load
+        self._blocks = []
+        self._maxes = []
+        self._tree = []
+        self._len = 0
+        for value in sorted(values):
+            if not self._blocks or len(self._blocks[-1]) >= load:
+                self._blocks.append([])
+            self._blocks[-1].append(value)
+            self._len += 1
+        self._maxes = [block[-1] for block in self._blocks]
+        self._build_index()
+    
+    def __len__(self):
+        return self._len
+    
+    def __iter__(self):
+        for block in self._blocks:
+            yield from block
+    
+    def _build_index(self):
+        """Rebuild the Fenwick tree of block sizes"""
+        tree = [len(block) for block in self._blocks]
+        for i in range(len(tree)):
+            parent = i | (i + 1)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+    
+    def _index_add(self, block, delta):
+        tree = self._tree
+        while block < len(tree):
+            tree[block] += delta
+            block |= block + 1
+    
+    def _count_before(self, block):
+        """Number of values in the blocks before the given block"""
+        tree = self._tree
+        total = 0
+        while block > 0:
+            total += tree[block - 1]
+            block &= block - 1
+        return total
+    
+    def add(self, value):
+        """Insert a value"""
+        blocks = self._blocks
+        if not blocks:
+            blocks.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            self._build_index()
+            return
+        
+        i = bisect_right(self._maxes, value)
+        if i == len(blocks):
+            i -= 1
+            blocks[i].append(value)
+            self._maxes[i] = value
+        else:
+            insort(blocks[i], value)
+        self._len += 1
+        
+        if len(blocks[i]) > 2 * self.load:
+            block = blocks[i]
+            blocks[i:i + 1] = [block[:self.load], block[self.load:]]
+            self._maxes[i:i + 1] = [block[self.load - 1], block[-1]]
+            self._build_index()
+        else:
+            self._index_add(i, 1)
+    
+    def remove(self, value):
+        """
+        Remove one occurrence of a value
+        
+        Raises:
+            ValueError: If the value is not present
+        """
+        i = bisect_left(self._maxes, value)
+        if i < len(self._blocks):
+            block = self._blocks[i]
+            j = bisect_left(block, value)
+            if j < len(block) and block[j] == value:
+                del block[j]
+                self._len -= 1
+                if block:
+                    self._maxes[i] = block[-1]
+                    self._index_add(i, -1)
+                else:
+                    del self._blocks[i]
+                    del self._maxes[i]
+                    self._build_index()
+                return
+        raise ValueError(f"{value} not in SortedBlockList")
+    
+    def count_less(self, value):
+        """Number of values strictly below value"""
+        i = bisect_left(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._count_before(i) + bisect_left(self._blocks[i], value)
+    
+    def count_less_equal(self, value):
+        """Number of values at or below value"""
+        i = bisect_right(self._maxes, value)
+        if i == len(self._blocks):
+            return self._len
+        return self._count_before(i) + bisect_right(self._blocks[i], value)
+    
+    def rank(self, value, method='average'):
+        """
+        Rank of a value among the stored values, starting at 1
+        
+        Args:
+            value (float): Value to rank (normally one of the stored values)
+            method (str): How ties are ranked, as in pandas: 'average', 'min' or 'max'
+        
+        Returns:
+            float: Rank of value
+        """
+        less = self.count_less(value)
+        if method == 'min':
+            return float(less + 1)
+        less_equal = self.count_less_equal(value)
+        if method == 'max':
+            return float(less_equal)
+        if method == 'average':
+            return (less + 1 + less_equal) / 2.0
+        raise ValueError(f"Unsupported rank method: {method}")
+    
+    def __getitem__(self, k):
+        """k-th smallest value (0-based, negative indexes count from the top)"""
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError("SortedBlockList index out of range")
+        
+        # Fenwick descent to the block holding the k-th value
+        tree = self._tree
+        position = 0
+        step = 1 << (len(tree).bit_length() - 1)
+        while step:
+            if position + step <= len(tree) and tree[position + step - 1] <= k:
+                position += step
+                k -= tree[position - 1]
+            step >>= 1
+        return self._blocks[position][k]
+    
+    def quantile(self, q):
+        """
+        Quantile with linear interpolation, as numpy.quantile
+        
+        Args:
+            q (float): Quantile between 0 and 1
+        
+        Returns:
+            float: Interpolated value, NaN when empty
+        """
+        if not self._len:
+            return float('nan')
+        position = q * (self._len - 1)
+        lower = int(position)
+        low_value = self[lower]
+        if lower + 1 >= self._len:
+            return float(low_value)
+        return float(low_value + (self[lower + 1] - low_value) * (position - lower))
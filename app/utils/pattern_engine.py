@@ -0,0 +1,281 @@
+import os
+import logging
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Candlestick patterns need TA-Lib's CDL* functions; there is no NumPy fallback
+try:
+    import talib
+    from talib import abstract as talib_abstract
+except ImportError:
+    talib = None
+    talib_abstract = None
+
+PATTERN_FIELDS = ['open', 'high', 'low', 'close']
+DETECTION_COLUMNS = ['symbol', 'pattern', 'bar', 'strength']
+
+
+def pattern_names():
+    """Names of all TA-Lib candlestick pattern functions (empty without TA-Lib)"""
+    if talib is None:
+        return []
+    return list(talib.get_function_groups()['Pattern Recognition'])
+
+
+def _scan_patterns(spec):
+    """
+    Evaluate candlestick patterns over concatenated symbol segments
+    
+    Runs in the calling process or in a worker process. Every segment holds
+    the newest bars of one symbol plus the bars the patterns look back on,
+    so one TA-Lib call per pattern covers the whole batch; hits that would
+    reach into the previous symbol's segment are masked out by the caller's
+    eligibility arrays.
+    
+    Args:
+        spec (dict): open/high/low/close arrays, full-series row numbers,
+            first row to evaluate per position, and (pattern, lookback) pairs
+    
+    Returns:
+        list: (pattern, positions, strengths) for every pattern with hits
+    """
+    open_, high, low, close = (spec[field] for field in PATTERN_FIELDS)
+    rows = spec['rows']
+    first_new = spec['first_new']
+    
+    hits = []
+    for pattern, lookback in spec['patterns']:
+        try:
+            output = getattr(talib, pattern)(open_, high, low, close)
+        except Exception as e:
+            logger.error(f"Error evaluating {pattern}: {str(e)}")
+            continue
+        positions = np.flatnonzero(output)
+        if len(positions):
+            keep = (rows[positions] >= first_new[positions]) & (rows[positions] >= lookback)
+            positions = positions[keep]
+        if len(positions):
+            hits.append((pattern, positions, output[positions].astype(np.int16)))
+    return hits
+
+
+class PatternEngine:
+    def __init__(self, patterns=None, workers=None, parallel_min_rows=20000, max_detections=100000):
+        """
+        Initialize the candlestick pattern engine
+        
+        Each scan evaluates the full TA-Lib candlestick pattern set for every
+        symbol of a batch, but only on bars newer than the symbol's last
+        scan plus the bars the patterns look back on. The newest bar of the
+        previous scan may have been in progress, so it is evaluated again
+        and its detections replaced; only bars before it are final. The tails of all
+        symbols are concatenated so every pattern is one TA-Lib call for the
+        whole batch; large scans split the pattern set across a process pool.
+        
+        Args:
+            patterns (list, optional): CDL* function names (all by default)
+            workers (int, optional): Number of worker processes (defaults to CPU count)
+            parallel_min_rows (int): Minimum number of bars in a scan before
+                the process pool is used; per-cycle scans of a few new bars
+                are faster in process
+            max_detections (int): Number of newest detections kept in detections
+        """
+        if talib is None:
+            raise ImportError("TA-Lib is not installed; candlestick pattern recognition needs it")
+        
+        available = pattern_names()
+        self.patterns = list(patterns) if patterns else available
+        unknown = sorted(set(self.patterns) - set(available))
+        if unknown:
+            raise ValueError(f"Unknown candlestick patterns: {unknown}")
+        
+        self.lookbacks = {pattern: talib_abstract.Function(pattern).lookback for pattern in self.patterns}
+        self.lookback = max(self.lookbacks.values(), default=0)
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_min_rows = parallel_min_rows
+        self.max_detections = max_detections
+        self.detections = pd.DataFrame(columns=DETECTION_COLUMNS)
+        self._last_bar = {}
+    
+    def reset(self, symbols=None):
+        """
+        Forget scan state so the next scan re-evaluates the whole history
+        
+        Args:
+            symbols (list, optional): Symbols to reset (all by default)
+        """
+        if symbols is None:
+            self._last_bar = {}
+            self.detections = pd.DataFrame(columns=DETECTION_COLUMNS)
+            return
+        for symbol in symbols:
+            self._last_bar.pop(symbol, None)
+        self.detections = self.detections[~self.detections['symbol'].isin(list(symbols))]
+    
+    def scan(self, panel):
+        """
+        Evaluate the patterns on the bars added since the previous scan
+        
+        The previous scan's newest bar is evaluated again, and its earlier
+        detections are replaced by the new ones.
+        
+        Args:
+            panel (dict or pandas.DataFrame): Mapping of symbol to OHLC
+                DataFrame, or a DataFrame with (field, symbol) MultiIndex columns
+        
+        Returns:
+            pandas.DataFrame: Detections on the evaluated bars with columns symbol, pattern, bar
+                and strength (TA-Lib's signed output, e.g. 100 bullish, -100
+                bearish, +/-200 confirmed), ordered by bar
+        """
+        segments = self._segments(panel)
+        if not segments:
+            return pd.DataFrame(columns=DETECTION_COLUMNS)
+        
+        try:
+            spec, owners, bars = self._concatenate(segments)
+            hits = self._evaluate(spec)
+        except Exception as e:
+            logger.error(f"Error scanning candlestick patterns: {str(e)}")
+            return pd.DataFrame(columns=DETECTION_COLUMNS)
+        
+        # Detections on the re-evaluated bars are superseded by this scan
+        first_evaluated = {symbol: index[rows[1] - rows[0]] for symbol, index, _, rows in segments}
+        if len(self.detections):
+            stale = self.detections['bar'] >= self.detections['symbol'].map(first_evaluated)
+            self.detections = self.detections[~stale.to_numpy(dtype=bool)].reset_index(drop=True)
+        for symbol, index, _, _ in segments:
+            self._last_bar[symbol] = index[-1]
+        
+        if not hits:
+            return pd.DataFrame(columns=DETECTION_COLUMNS)
+        
+        patterns = np.concatenate([np.full(len(positions), pattern, dtype=object) for pattern, positions, _ in hits])
+        positions = np.concatenate([positions for _, positions, _ in hits])
+        strengths = np.concatenate([values for _, _, values in hits])
+        
+        symbols = np.array([segment[0] for segment in segments], dtype=object)
+        found = pd.DataFrame({
+            'symbol': symbols[owners[positions]],
+            'pattern': patterns,
+            'bar': bars[positions],
+            'strength': strengths
+        })
+        found = found.sort_values(['bar', 'symbol', 'pattern'], kind='stable').reset_index(drop=True)
+        
+        self.detections = pd.concat([self.detections, found], ignore_index=True) if len(self.detections) else found
+        if len(self.detections) > self.max_detections:
+            self.detections = self.detections.iloc[-self.max_detections:].reset_index(drop=True)
+        
+        logger.info(f"Found {len(found)} candlestick patterns on {len(segments)} symbols")
+        return found
+    
+    def latest(self, symbol=None):
+        """
+        Detections on the newest scanned bar of each symbol
+        
+        Args:
+            symbol (str, optional): Restrict to one symbol
+        
+        Returns:
+            pandas.DataFrame: Matching detections
+        """
+        detections = self.detections
+        if symbol is not None:
+            detections = detections[detections['symbol'] == symbol]
+        if detections.empty:
+            return detections
+        last = detections['symbol'].map(self._last_bar)
+        return detections[(detections['bar'] == last).to_numpy(dtype=bool)]
+    
+    def _segments(self, panel):
+        """
+        Newest bars of every symbol plus the bars the patterns look back on
+        
+        Returns:
+            list: (symbol, bar index, (bars x 4) OHLC array, full-series rows of
+                the first bar in the segment and of the first bar to evaluate)
+                per symbol, where the first bar to evaluate is the newest bar
+                of the last scan
+        """
+        if isinstance(panel, pd.DataFrame):
+            items = ((symbol, panel.xs(symbol, axis=1, level=1)) for symbol in panel['close'].columns)
+        else:
+            items = panel.items()
+        
+        segments = []
+        for symbol, data in items:
+            if data is None or data.empty or any(col not in data.columns for col in PATTERN_FIELDS):
+                logger.warning(f"Skipping {symbol}: missing OHLC data for pattern recognition")
+                continue
+            
+            # One conversion per frame; column lookups on the frame are far slower
+            try:
+                columns = list(data.columns)
+                values = data.to_numpy(dtype=np.float64)[:, [columns.index(field) for field in PATTERN_FIELDS]]
+            except (TypeError, ValueError):
+                # Non-numeric extra columns
+                values = data[PATTERN_FIELDS].to_numpy(dtype=np.float64)
+            index = data.index
+            valid = ~np.isnan(values).any(axis=1)
+            if not valid.all():
+                values, index = values[valid], index[valid]
+            if not len(values):
+                continue
+            
+            last = self._last_bar.get(symbol)
+            # The newest bar of the last scan may have been in progress when it was scanned
+            first_new = 0 if last is None else int(index.searchsorted(last, side='left'))
+            if first_new >= len(values):
+                continue
+            
+            start = max(0, first_new - self.lookback)
+            segments.append((symbol, index[start:], values[start:], (start, first_new)))
+        return segments
+    
+    @staticmethod
+    def _concatenate(segments):
+        """
+        Stack all segments into one series per OHLC field
+        
+        Returns:
+            tuple: (scan spec without patterns, owning segment per position,
+                bar label per position)
+        """
+        lengths = np.array([len(values) for _, _, values, _ in segments])
+        values = np.concatenate([values for _, _, values, _ in segments])
+        owners = np.repeat(np.arange(len(segments)), lengths)
+        
+        starts = np.array([rows[0] for _, _, _, rows in segments])
+        first_new = np.array([rows[1] for _, _, _, rows in segments])
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        rows = np.arange(len(values)) - offsets[owners] + starts[owners]
+        
+        bars = segments[0][1].append([index for _, index, _, _ in segments[1:]]) if len(segments) > 1 else segments[0][1]
+        
+        spec = {field: np.ascontiguousarray(values[:, i]) for i, field in enumerate(PATTERN_FIELDS)}
+        spec['rows'] = rows
+        spec['first_new'] = first_new[owners]
+        return spec, owners, bars
+    
+    def _evaluate(self, spec):
+        """Run every pattern over a scan spec, across processes for large scans"""
+        patterns = [(pattern, self.lookbacks[pattern]) for pattern in self.patterns]
+        workers = min(self.workers, len(patterns))
+        if workers <= 1 or len(spec['rows']) < self.parallel_min_rows:
+            return _scan_patterns(dict(spec, patterns=patterns))
+        
+        try:
+            # Round-robin split keeps slow and fast patterns mixed across workers
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [
+                    executor.submit(_scan_patterns, dict(spec, patterns=patterns[i::workers]))
+                    for i in range(workers)
+                ]
+                return [hit for future in futures for hit in future.result()]
+        except Exception as e:
+            logger.error(f"Error in parallel pattern scan, falling back to serial: {str(e)}")
+            return _scan_patterns(dict(spec, patterns=patterns))
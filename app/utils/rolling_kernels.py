@@ -0,0 +1,175 @@
+import numpy as np
+import logging
+from numpy.lib.stride_tricks import sliding_window_view
+from app.utils.order_statistics import RANK_METHODS, SortedBlockList
+
+logger = logging.getLogger(__name__)
+
+
+# Output rows per re-anchored block of prefix sums; every cumulative sum
+# spans at most this many rows plus the longest window, so rounding error
+# stays bounded however long the history grows
+PREFIX_BLOCK_ROWS = 4096
+
+
+def _prefix_sums(x, with_squares):
+    """
+    Cumulative sums of one block, shared by every window ending in it
+    
+    Values are centered on the block's mean before summing, which keeps the
+    sums small and limits cancellation when differences of the sum of
+    squares are taken.
+    
+    Returns:
+        tuple: (sums, squares or None, nan counts, center), each prefixed
+            with a row of zeros; the center has one value per column
+    """
+    nan = np.isnan(x)
+    valid = np.where(nan, 0.0, x)
+    count = len(x) - nan.sum(axis=0)
+    center = np.where(count > 0, valid.sum(axis=0) / np.maximum(count, 1), 0.0)
+    x = np.where(nan, 0.0, x - center)
+    
+    zeros = np.zeros((1,) + x.shape[1:])
+    sums = np.concatenate((zeros, np.cumsum(x, axis=0)))
+    squares = np.concatenate((zeros, np.cumsum(x * x, axis=0))) if with_squares else None
+    nan_counts = np.concatenate((zeros.astype(np.int64), np.cumsum(nan, axis=0)))
+    return sums, squares, nan_counts, center
+
+
+def rolling_moments(values, windows, std_windows=(), ddof=1, block_rows=PREFIX_BLOCK_ROWS):
+    """
+    Rolling means and standard deviations for several windows in O(n) total
+    
+    Matches pandas rolling(window=w).mean()/.std(ddof) with min_periods=w:
+    a window containing any NaN yields NaN. The prefix sums are re-anchored
+    every block_rows rows, starting the longest window before the block.
+    A 2-D input is treated as one series per column.
+    
+    Args:
+        values (array-like): Input series, shape (T,) or (T, N)
+        windows (list): Windows to compute rolling means for
+        std_windows (list): Windows to compute rolling standard deviations for
+        ddof (int): Delta degrees of freedom for the standard deviation
+        block_rows (int): Output rows per block of prefix sums
+    
+    Returns:
+        tuple: (dict of window -> mean array, dict of window -> std array)
+    """
+    x = np.asarray(values, dtype=np.float64)
+    n = len(x)
+    means = {window: np.full(x.shape, np.nan) for window in windows}
+    stds = {window: np.full(x.shape, np.nan) for window in std_windows}
+    active = [window for window in sorted(set(windows) | set(std_windows)) if 0 < window <= n]
+    if not active:
+        return means, stds
+    
+    lookback = active[-1] - 1
+    for start in range(0, n, max(int(block_rows), 1)):
+        end = min(start + max(int(block_rows), 1), n)
+        anchor = max(start - lookback, 0)
+        sums, squares, nan_counts, center = _prefix_sums(x[anchor:end], with_squares=bool(std_windows))
+        
+        for window in active:
+            # Windows ending at rows first..end-1, as positions in the block's prefix sums
+            first = max(start, window - 1)
+            if first >= end:
+                continue
+            upper = slice(first + 1 - anchor, end + 1 - anchor)
+            lower = slice(first + 1 - window - anchor, end + 1 - window - anchor)
+            window_sum = sums[upper] - sums[lower]
+            incomplete = (nan_counts[upper] - nan_counts[lower]) > 0
+            centered_mean = window_sum / window
+            
+            if window in means:
+                means[window][first:end] = np.where(incomplete, np.nan, centered_mean + center)
+            
+            if window in stds and window > ddof:
+                window_squares = squares[upper] - squares[lower]
+                var = (window_squares - window_sum * centered_mean) / (window - ddof)
+                # Rounding can leave tiny negative variances for flat windows
+                stds[window][first:end] = np.where(incomplete, np.nan, np.sqrt(np.maximum(var, 0.0)))
+    
+    return means, stds
+
+
+def rolling_mean(values, windows):
+    """Rolling means for several windows sharing one prefix sum per block"""
+    return rolling_moments(values, windows)[0]
+
+
+# Above this window a sorted-block list beats comparing every window element
+SORTED_RANK_MIN_WINDOW = 2048
+
+
+def _ranks_from_counts(less, less_equal, method):
+    if method == 'min':
+        return less + 1.0
+    if method == 'max':
+        return less_equal.astype(np.float64)
+    return (less + 1.0 + less_equal) / 2.0
+
+
+def rolling_rank(values, window, method='average', pct=True, chunk_rows=4096):
+    """
+    Rank of every value within its trailing window
+    
+    Matches pandas rolling(window=w).rank(method, pct=pct) with
+    min_periods=w: a window containing any NaN yields NaN. Short windows
+    compare each value against a sliding window view in row chunks; long
+    windows walk the series once with a SortedBlockList, O(log w) per bar.
+    
+    Args:
+        values (array-like): Input series
+        window (int): Number of bars in the window, including the current one
+        method (str): How ties are ranked: 'average', 'min' or 'max'
+        pct (bool): Return the rank divided by the window (percentile rank)
+        chunk_rows (int): Windows compared per chunk, bounding temporary memory
+    
+    Returns:
+        numpy.ndarray: Ranks, NaN for the first window - 1 bars
+    """
+    x = np.asarray(values, dtype=np.float64)
+    out = np.full(len(x), np.nan)
+    if window <= 0 or window > len(x):
+        return out
+    if method not in RANK_METHODS:
+        raise ValueError(f"Unsupported rank method: {method}")
+    
+    if window >= SORTED_RANK_MIN_WINDOW:
+        out[window - 1:] = _sorted_rolling_rank(x, window, method)
+    else:
+        windows = sliding_window_view(x, window)
+        for start in range(0, len(windows), chunk_rows):
+            block = windows[start:start + chunk_rows]
+            current = block[:, -1:]
+            less = (block < current).sum(axis=1)
+            less_equal = (block <= current).sum(axis=1)
+            ranks = _ranks_from_counts(less, less_equal, method)
+            ranks[np.isnan(block).any(axis=1)] = np.nan
+            out[window - 1 + start:window - 1 + start + len(block)] = ranks
+    
+    if pct:
+        out /= window
+    return out
+
+
+def _sorted_rolling_rank(x, window, method):
+    """Ranks of x[window - 1:] from one pass with a SortedBlockList"""
+    values = x.tolist()
+    nan_counts = np.concatenate(([0], np.cumsum(np.isnan(x))))
+    nan_in_window = (nan_counts[window:] - nan_counts[:-window]) > 0
+    finite = [value for value in values[:window - 1] if value == value]
+    window_values = SortedBlockList(finite)
+    ranks = np.full(len(x) - window + 1, np.nan)
+    
+    for t in range(window - 1, len(values)):
+        value = values[t]
+        if value == value:
+            window_values.add(value)
+        if not nan_in_window[t - window + 1]:
+            ranks[t - window + 1] = window_values.rank(value, method)
+        leaving = values[t - window + 1]
+        if leaving == leaving:
+            window_values.remove(leaving)
+    return ranks
@@ -0,0 +1,335 @@
+import ast
+import logging
+import operator
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+import pandas as pd
+import numpy as np
+from app.utils.technical_analyzer import TechnicalAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Volume windows of the DataProcessor volume_ratio_N features
+VOLUME_WINDOWS = [5, 10, 20, 50]
+
+# Calendar days of daily history fetched per symbol (SMA-200 needs about 300)
+PANEL_DAYS = 400
+# Calendar days refetched to bring a cached history up to date
+REFRESH_DAYS = 5
+
+_COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne
+}
+
+_ARITHMETIC = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv
+}
+
+
+def load_universe(source):
+    """
+    Symbols of a screening universe
+    
+    Args:
+        source (str): Path to a file with one symbol per line (or CSV rows
+            starting with the symbol; '#' starts a comment), or a
+            comma-separated list of symbols
+    
+    Returns:
+        list: Unique symbols in order; empty when source is empty or unreadable
+    """
+    if not source:
+        return []
+    
+    try:
+        if os.path.isfile(source):
+            with open(source) as f:
+                entries = [line.split('#', 1)[0].split(',', 1)[0] for line in f]
+        else:
+            entries = source.split(',')
+        return list(dict.fromkeys(entry.strip().upper() for entry in entries if entry.strip()))
+    
+    except Exception as e:
+        logger.error(f"Error loading screening universe from {source}: {str(e)}")
+        return []
+
+
+class Screener:
+    def __init__(self, technical_analyzer=None, workers=8):
+        """
+        Initialize the universe screener
+        
+        Conditions are expressions over the screening table such as
+        "rsi < 30 and close > sma_200 and volume_ratio_20 > 2". They are
+        parsed once, checked against a whitelist of syntax, and evaluated as
+        vectorized boolean masks over all symbols.
+        
+        Daily histories fetched by fetch_panel are cached for the day, so the
+        universe is downloaded once a day and the trading loop only refreshes
+        the last few bars of its symbols.
+        
+        Args:
+            technical_analyzer (TechnicalAnalyzer, optional): Analyzer used for
+                the panel indicators; a latest-only analyzer by default
+            workers (int): Concurrent history requests
+        """
+        self.technical_analyzer = technical_analyzer or TechnicalAnalyzer(latest_only=True)
+        self.workers = workers
+        self._compiled = {}
+        # Symbol -> (fetch date, calendar days covered, OHLCV DataFrame)
+        self._histories = {}
+        self._lock = threading.Lock()
+    
+    def build_table(self, panel):
+        """
+        Latest indicators and volume features for every symbol of a panel
+        
+        Args:
+            panel (dict or pandas.DataFrame): Mapping of symbol to OHLCV
+                DataFrame, or a DataFrame with (field, symbol) MultiIndex columns
+        
+        Returns:
+            pandas.DataFrame: TechnicalAnalyzer.analyze_many columns plus close,
+                volume, returns and volume_ratio_N, one row per symbol
+        """
+        table = self.technical_analyzer.analyze_many(panel)
+        if table.empty:
+            return table
+        
+        features = self._volume_features(panel, list(table.index))
+        return table.join(features)
+    
+    def screen(self, panel, condition, rank_by=None, ascending=False, limit=None):
+        """
+        Symbols of a panel that satisfy a condition, ranked
+        
+        Args:
+            panel (dict or pandas.DataFrame): Panel of OHLCV data, or a table
+                from build_table
+            condition (str): Boolean expression over the table columns
+            rank_by (str, optional): Expression to sort candidates by
+            ascending (bool): Sort order for rank_by
+            limit (int, optional): Maximum number of candidates
+        
+        Returns:
+            pandas.DataFrame: Matching rows, ranked
+        """
+        table = panel if self._is_table(panel) else self.build_table(panel)
+        if table.empty:
+            return table
+        
+        mask = np.asarray(self.evaluate(condition, table), dtype=bool)
+        if mask.ndim == 0:
+            mask = np.full(len(table), bool(mask))
+        candidates = table[mask]
+        
+        if rank_by:
+            score = np.broadcast_to(np.asarray(self.evaluate(rank_by, candidates), dtype=np.float64), len(candidates))
+            order = np.argsort(score if ascending else -score, kind='stable')
+            # NaN scores rank last in either direction
+            order = np.concatenate([order[~np.isnan(score[order])], order[np.isnan(score[order])]])
+            candidates = candidates.iloc[order]
+        
+        if limit is not None:
+            candidates = candidates.iloc[:limit]
+        
+        logger.info(f"Screen '{condition}' matched {int(mask.sum())} of {len(table)} symbols")
+        return candidates
+    
+    def evaluate(self, expression, table):
+        """
+        Evaluate an expression over a table
+        
+        Args:
+            expression (str): Expression using column names, numbers, strings,
+                comparisons, + - * /, and/or/not
+            table (pandas.DataFrame): Screening table
+        
+        Returns:
+            numpy.ndarray: One value per row
+        """
+        tree = self._compile(expression)
+        return self._eval_node(tree.body, table)
+    
+    def _compile(self, expression):
+        """Parse an expression once and cache its syntax tree"""
+        tree = self._compiled.get(expression)
+        if tree is None:
+            try:
+                tree = ast.parse(expression, mode='eval')
+            except SyntaxError as e:
+                raise ValueError(f"Invalid screen expression '{expression}': {e.msg}")
+            self._compiled[expression] = tree
+        return tree
+    
+    def _eval_node(self, node, table):
+        """Evaluate one node of a whitelisted expression"""
+        if isinstance(node, ast.BoolOp):
+            values = [np.asarray(self._eval_node(value, table), dtype=bool) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = values[0]
+            for value in values[1:]:
+                result = combine(result, value)
+            return result
+        
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return np.logical_not(np.asarray(self._eval_node(node.operand, table), dtype=bool))
+        
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self._eval_node(node.operand, table)
+        
+        if isinstance(node, ast.Compare):
+            # Chained comparisons such as 30 < rsi < 70 hold pairwise
+            result = None
+            left = self._eval_node(node.left, table)
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARISONS:
+                    raise ValueError(f"Unsupported comparison in screen expression: {type(op).__name__}")
+                right = self._eval_node(comparator, table)
+                with np.errstate(invalid='ignore'):
+                    current = np.asarray(_COMPARISONS[type(op)](left, right), dtype=bool)
+                result = current if result is None else np.logical_and(result, current)
+                left = right
+            return result
+        
+        if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            left = self._eval_node(node.left, table)
+            right = self._eval_node(node.right, table)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return _ARITHMETIC[type(node.op)](left, right)
+        
+        if isinstance(node, ast.Name):
+            if node.id not in table.columns:
+                raise ValueError(f"Unknown column '{node.id}' in screen expression; available: {sorted(table.columns)}")
+            column = table[node.id]
+            if pd.api.types.is_numeric_dtype(column.dtype):
+                return column.to_numpy(dtype=np.float64)
+            return column.to_numpy()
+        
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)) and not isinstance(node.value, bool):
+            return node.value
+        
+        raise ValueError(f"Unsupported syntax in screen expression: {type(node).__name__}")
+    
+    @staticmethod
+    def _is_table(panel):
+        """Whether the input is already a screening table (one row per symbol)"""
+        return isinstance(panel, pd.DataFrame) and not isinstance(panel.columns, pd.MultiIndex)
+    
+    @staticmethod
+    def _volume_features(panel, symbols):
+        """Last close and volume, last return and volume_ratio_N per symbol"""
+        bars = max(VOLUME_WINDOWS)
+        close = np.full((bars, len(symbols)), np.nan)
+        volume = np.full((bars, len(symbols)), np.nan)
+        
+        if isinstance(panel, pd.DataFrame):
+            close_values = panel['close'][symbols].to_numpy(dtype=np.float64)[-bars:]
+            volume_values = panel['volume'][symbols].to_numpy(dtype=np.float64)[-bars:]
+            close[bars - len(close_values):] = close_values
+            volume[bars - len(volume_values):] = volume_values
+        else:
+            for j, symbol in enumerate(symbols):
+                data = panel[symbol]
+                close_values = data['close'].to_numpy(dtype=np.float64)[-bars:]
+                volume_values = data['volume'].to_numpy(dtype=np.float64)[-bars:]
+                close[bars - len(close_values):, j] = close_values
+                volume[bars - len(volume_values):, j] = volume_values
+        
+        features = pd.DataFrame(index=pd.Index(symbols, name='symbol'))
+        features['close'] = close[-1]
+        features['volume'] = volume[-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            features['returns'] = close[-1] / close[-2] - 1
+            for window in VOLUME_WINDOWS:
+                # Same definition as DataProcessor: volume over its rolling mean including the current bar
+                features[f'volume_ratio_{window}'] = volume[-1] / volume[-window:].mean(axis=0)
+        return features
+    
+    @staticmethod
+    def to_records(table):
+        """JSON-ready rows of a screening table, with NaN as None"""
+        table = table.reset_index()
+        return table.astype(object).where(table.notna(), None).to_dict(orient='records')
+    
+    def fetch_panel(self, api_wrapper, symbols, days=PANEL_DAYS):
+        """
+        Daily OHLCV history for a universe of symbols, cached for the day
+        
+        Symbols without a history from today covering `days` are fetched
+        concurrently; the API wrapper's shared rate limiter paces the
+        requests, so the pool only hides network latency.
+        
+        Args:
+            api_wrapper: API wrapper with get_historical_data
+            symbols (list): Symbols to fetch
+            days (int): Calendar days of history (SMA-200 needs about 300)
+        
+        Returns:
+            dict: Symbol -> OHLCV DataFrame, for symbols with data
+        """
+        symbols = list(dict.fromkeys(symbols))
+        today = date.today()
+        with self._lock:
+            missing = [symbol for symbol in symbols
+                       if symbol not in self._histories
+                       or self._histories[symbol][0] != today
+                       or self._histories[symbol][1] < days]
+        
+        fetched = self._fetch(api_wrapper, missing, days)
+        with self._lock:
+            for symbol, data in fetched.items():
+                self._histories[symbol] = (today, days, data)
+            return {symbol: self._histories[symbol][2] for symbol in symbols
+                    if symbol in self._histories and self._histories[symbol][0] == today}
+    
+    def refresh(self, api_wrapper, symbols, days=REFRESH_DAYS):
+        """
+        Cached daily histories of some symbols with their latest bars refetched
+        
+        Args:
+            api_wrapper: API wrapper with get_historical_data
+            symbols (list): Symbols to refresh, typically the trading watchlist
+            days (int): Calendar days of recent bars to refetch
+        
+        Returns:
+            dict: Symbol -> up-to-date OHLCV DataFrame, for symbols with data
+        """
+        panel = self.fetch_panel(api_wrapper, symbols)
+        recent = self._fetch(api_wrapper, list(panel), days)
+        with self._lock:
+            for symbol, data in recent.items():
+                fetched_on, covered, cached = self._histories[symbol]
+                # Recent bars replace cached ones from the same time on; the last cached bar may have been in progress
+                merged = pd.concat([cached[cached.index < data.index[0]], data])
+                self._histories[symbol] = (fetched_on, covered, merged)
+                panel[symbol] = merged
+        return panel
+    
+    def _fetch(self, api_wrapper, symbols, days):
+        """Histories of several symbols fetched on a thread pool"""
+        panel = {}
+        if not symbols:
+            return panel
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(symbols)))) as executor:
+            pending = {executor.submit(api_wrapper.get_historical_data, symbol, days=days): symbol for symbol in symbols}
+            for future in as_completed(pending):
+                symbol = pending[future]
+                try:
+                    data = future.result()
+                    if data is not None and not data.empty:
+                        panel[symbol] = data.sort_index()
+                except Exception as e:
+                    logger.error(f"Error fetching history for {symbol}: {str(e)}")
+        return panel
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def add_signals(indicators):
+    """
+    Add trend, RSI and MACD signal labels and a summary to an indicator dict
+    
+    Args:
+        indicators (dict): Indicator values with current_price, sma_50, sma_200,
+            rsi, macd and macd_signal
+    
+    Returns:
+        dict: The same dict with trend, rsi_signal, macd_signal_value and summary
+    """
+    # Determine trend based on moving averages
+    if indicators['current_price'] > indicators['sma_50'] > indicators['sma_200']:
+        indicators['trend'] = "Bullish"
+    elif indicators['current_price'] < indicators['sma_50'] < indicators['sma_200']:
+        indicators['trend'] = "Bearish"
+    else:
+        indicators['trend'] = "Neutral"
+    
+    # Determine overbought/oversold based on RSI
+    if indicators['rsi'] > 70:
+        indicators['rsi_signal'] = "Overbought"
+    elif indicators['rsi'] < 30:
+        indicators['rsi_signal'] = "Oversold"
+    else:
+        indicators['rsi_signal'] = "Neutral"
+    
+    # Determine MACD signal
+    if indicators['macd'] > indicators['macd_signal']:
+        indicators['macd_signal_value'] = "Bullish"
+    else:
+        indicators['macd_signal_value'] = "Bearish"
+    
+    # Create summary
+    summary = f"Technical Analysis: {indicators['trend']}. "
+    summary += f"RSI: {indicators['rsi']:.2f} ({indicators['rsi_signal']}), "
+    summary += f"MACD: {indicators['macd_signal_value']}, "
+    summary += f"Price: {indicators['current_price']:.2f}"
+    
+    indicators['summary'] = summary
+    
+    return indicators
+
+
+def add_signal_columns(table):
+    """
+    Vectorized add_signals for a table with one row per symbol
+    
+    Args:
+        table (pandas.DataFrame): Columns current_price, sma_50, sma_200, rsi,
+            macd and macd_signal
+    
+    Returns:
+        pandas.DataFrame: The same table with trend, rsi_signal and macd_signal_value
+    """
+    price = table['current_price'].to_numpy(dtype=np.float64)
+    sma_50 = table['sma_50'].to_numpy(dtype=np.float64)
+    sma_200 = table['sma_200'].to_numpy(dtype=np.float64)
+    rsi = table['rsi'].to_numpy(dtype=np.float64)
+    
+    table['trend'] = np.select(
+        [(price > sma_50) & (sma_50 > sma_200), (price < sma_50) & (sma_50 < sma_200)],
+        ["Bullish", "Bearish"],
+        "Neutral"
+    )
+    table['rsi_signal'] = np.select([rsi > 70, rsi < 30], ["Overbought", "Oversold"], "Neutral")
+    table['macd_signal_value'] = np.where(
+        table['macd'].to_numpy(dtype=np.float64) > table['macd_signal'].to_numpy(dtype=np.float64),
+        "Bullish",
+        "Bearish"
+    )
+    return table
@@ -0,0 +1,520 @@
+import logging
+import math
+import numbers
+from abc import ABC, abstractmethod
+from collections import deque
+from app.utils.signals import add_signals
+from app.utils.order_statistics import RANK_METHODS, SortedBlockList
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+# Running window sums are recomputed from the window this often, so rounding
+# error cannot accumulate over an unbounded stream of ticks
+RESYNC_UPDATES = 1024
+
+
+def _is_zero(value):
+    """TA-Lib's tolerance for treating a denominator as zero"""
+    return -1e-14 < value < 1e-14
+
+
+def _field(bar, name):
+    """Read a field from a bar mapping; a bare number is taken as the close"""
+    if isinstance(bar, numbers.Real):
+        return float(bar)
+    return float(bar[name])
+
+
+class StreamingIndicator(ABC):
+    """
+    Base class for indicators updated one bar at a time in O(1)
+    
+    Subclasses keep all state in __slots__, which snapshot() and restore()
+    walk generically. Values follow TA-Lib's default (non-Metastock) seeding,
+    so a fully warmed indicator matches the TA-Lib batch output. Subclasses
+    must implement update() and value() to be instantiated.
+    """
+    __slots__ = ()
+    
+    @abstractmethod
+    def update(self, bar):
+        """Add a bar and return the updated value"""
+    
+    @abstractmethod
+    def value(self):
+        """Current value, NaN until the indicator is warmed up"""
+    
+    def _slot_names(self):
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                yield name
+    
+    def snapshot(self):
+        """
+        Capture the indicator state
+        
+        Returns:
+            dict: Plain-Python state that can be stored and passed to restore()
+        """
+        state = {}
+        for name in self._slot_names():
+            current = getattr(self, name)
+            if isinstance(current, StreamingIndicator):
+                state[name] = current.snapshot()
+            elif isinstance(current, deque):
+                state[name] = list(current)
+            else:
+                state[name] = current
+        return state
+    
+    def restore(self, state):
+        """
+        Restore state captured by snapshot()
+        
+        Args:
+            state (dict): Output of snapshot() from an indicator of the same type and parameters
+        
+        Returns:
+            StreamingIndicator: self
+        """
+        for name in self._slot_names():
+            current = getattr(self, name)
+            if isinstance(current, StreamingIndicator):
+                current.restore(state[name])
+            elif isinstance(current, deque):
+                setattr(self, name, deque(state[name], maxlen=current.maxlen))
+            else:
+                setattr(self, name, state[name])
+        return self
+
+
+class SMA(StreamingIndicator):
+    __slots__ = ('period', 'window', 'total', 'updates')
+    
+    def __init__(self, period=20):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.updates = 0
+    
+    def update(self, bar):
+        close = _field(bar, 'close')
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+        self.updates += 1
+        if self.updates % RESYNC_UPDATES == 0:
+            self.total = math.fsum(self.window)
+        return self.value()
+    
+    def value(self):
+        if len(self.window) < self.period:
+            return NAN
+        return self.total / self.period
+
+
+class EMA(StreamingIndicator):
+    __slots__ = ('period', 'k', 'count', 'total', 'ema')
+    
+    def __init__(self, period=20):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.count = 0
+        self.total = 0.0
+        self.ema = NAN
+    
+    def update(self, bar):
+        close = _field(bar, 'close')
+        self.count += 1
+        if self.count < self.period:
+            self.total += close
+        elif self.count == self.period:
+            # Seeded with the simple average of the first period values
+            self.ema = (self.total + close) / self.period
+        else:
+            self.ema = ((close - self.ema) * self.k) + self.ema
+        return self.ema
+    
+    def value(self):
+        return self.ema
+
+
+class RSI(StreamingIndicator):
+    __slots__ = ('period', 'count', 'prev_close', 'avg_gain', 'avg_loss', 'rsi')
+    
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.prev_close = NAN
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.rsi = NAN
+    
+    def update(self, bar):
+        close = _field(bar, 'close')
+        self.count += 1
+        if self.count == 1:
+            self.prev_close = close
+            return self.rsi
+        
+        change = close - self.prev_close
+        self.prev_close = close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        
+        changes = self.count - 1
+        if changes < self.period:
+            self.avg_gain += gain
+            self.avg_loss += loss
+            return self.rsi
+        if changes == self.period:
+            # The first averages cover period price changes
+            self.avg_gain = (self.avg_gain + gain) / self.period
+            self.avg_loss = (self.avg_loss + loss) / self.period
+        else:
+            # Wilder smoothing
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+        
+        total = self.avg_gain + self.avg_loss
+        self.rsi = 0.0 if _is_zero(total) else 100.0 * (self.avg_gain / total)
+        return self.rsi
+    
+    def value(self):
+        return self.rsi
+
+
+class MACD(StreamingIndicator):
+    __slots__ = ('fast_period', 'slow_period', 'count', 'fast', 'slow', 'signal', 'macd', 'hist')
+    
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self.count = 0
+        self.fast = EMA(fast_period)
+        self.slow = EMA(slow_period)
+        self.signal = EMA(signal_period)
+        self.macd = NAN
+        self.hist = NAN
+    
+    def update(self, bar):
+        close = _field(bar, 'close')
+        self.count += 1
+        self.slow.update(close)
+        # TA-Lib seeds the fast EMA so that it becomes valid on the same bar as the slow one
+        if self.count > self.slow_period - self.fast_period:
+            self.fast.update(close)
+        
+        if self.count >= self.slow_period:
+            line = self.fast.value() - self.slow.value()
+            signal = self.signal.update(line)
+            if not math.isnan(signal):
+                self.macd = line
+                self.hist = line - signal
+        return self.value()
+    
+    def value(self):
+        """Tuple of (macd, signal, histogram)"""
+        return self.macd, self.signal.value(), self.hist
+
+
+class BollingerBands(StreamingIndicator):
+    """
+    Bollinger Bands over a sliding window
+    
+    The mean and the sum of squared deviations from it are updated with
+    Welford's recurrence rather than raw sums of prices and squared prices,
+    whose difference cancels catastrophically at typical index levels. Both
+    are recomputed from the window every RESYNC_UPDATES ticks.
+    """
+    __slots__ = ('period', 'nbdev', 'window', 'mean', 'm2', 'updates')
+    
+    def __init__(self, period=20, nbdev=2.0):
+        self.period = period
+        self.nbdev = nbdev
+        self.window = deque(maxlen=period)
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.updates = 0
+    
+    def update(self, bar):
+        close = _field(bar, 'close')
+        if len(self.window) == self.period:
+            # Replace the oldest value in a single step
+            oldest = self.window[0]
+            self.window.append(close)
+            delta = close - oldest
+            prev_mean = self.mean
+            self.mean += delta / self.period
+            self.m2 += delta * (close - self.mean + oldest - prev_mean)
+        else:
+            self.window.append(close)
+            delta = close - self.mean
+            self.mean += delta / len(self.window)
+            self.m2 += delta * (close - self.mean)
+        
+        self.updates += 1
+        if self.updates % RESYNC_UPDATES == 0:
+            self._resync()
+        return self.value()
+    
+    def _resync(self):
+        self.mean = math.fsum(self.window) / len(self.window)
+        self.m2 = math.fsum((close - self.mean) ** 2 for close in self.window)
+    
+    def value(self):
+        """Tuple of (upper, middle, lower)"""
+        if len(self.window) < self.period:
+            return NAN, NAN, NAN
+        middle = self.mean
+        variance = self.m2 / self.period
+        deviation = self.nbdev * (math.sqrt(variance) if variance > 0 else 0.0)
+        return middle + deviation, middle, middle - deviation
+
+
+class Stochastic(StreamingIndicator):
+    __slots__ = ('fastk_period', 'highs', 'lows', 'slowk', 'slowd')
+    
+    def __init__(self, fastk_period=5, slowk_period=3, slowd_period=3):
+        self.fastk_period = fastk_period
+        self.highs = deque(maxlen=fastk_period)
+        self.lows = deque(maxlen=fastk_period)
+        self.slowk = SMA(slowk_period)
+        self.slowd = SMA(slowd_period)
+    
+    def update(self, bar):
+        self.highs.append(_field(bar, 'high'))
+        self.lows.append(_field(bar, 'low'))
+        if len(self.highs) < self.fastk_period:
+            return self.value()
+        
+        lowest = min(self.lows)
+        diff = (max(self.highs) - lowest) / 100.0
+        fastk = (_field(bar, 'close') - lowest) / diff if diff != 0 else 0.0
+        slowk = self.slowk.update(fastk)
+        if not math.isnan(slowk):
+            self.slowd.update(slowk)
+        return self.value()
+    
+    def value(self):
+        """Tuple of (slow %K, slow %D)"""
+        slowd = self.slowd.value()
+        if math.isnan(slowd):
+            return NAN, NAN
+        return self.slowk.value(), slowd
+
+
+class ADX(StreamingIndicator):
+    __slots__ = ('period', 'count', 'prev_high', 'prev_low', 'prev_close',
+                 'plus_dm', 'minus_dm', 'tr', 'sum_dx', 'adx')
+    
+    def __init__(self, period=14):
+        self.period = period
+        self.count = 0
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.prev_close = NAN
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.tr = 0.0
+        self.sum_dx = 0.0
+        self.adx = NAN
+    
+    def update(self, bar):
+        high, low, close = _field(bar, 'high'), _field(bar, 'low'), _field(bar, 'close')
+        index = self.count
+        self.count += 1
+        if index == 0:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return self.adx
+        
+        diff_plus = high - self.prev_high
+        diff_minus = self.prev_low - low
+        plus_dm = diff_plus if diff_plus > 0 and diff_plus > diff_minus else 0.0
+        minus_dm = diff_minus if diff_minus > 0 and diff_plus < diff_minus else 0.0
+        true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+        
+        period = self.period
+        if index < period:
+            # First period - 1 movements are summed
+            self.plus_dm += plus_dm
+            self.minus_dm += minus_dm
+            self.tr += true_range
+            return self.adx
+        
+        # Wilder smoothing of the directional movement and true range
+        self.plus_dm = self.plus_dm - self.plus_dm / period + plus_dm
+        self.minus_dm = self.minus_dm - self.minus_dm / period + minus_dm
+        self.tr = self.tr - self.tr / period + true_range
+        
+        dx = None
+        if not _is_zero(self.tr):
+            minus_di = 100.0 * (self.minus_dm / self.tr)
+            plus_di = 100.0 * (self.plus_dm / self.tr)
+            di_total = minus_di + plus_di
+            if not _is_zero(di_total):
+                dx = 100.0 * (abs(minus_di - plus_di) / di_total)
+        
+        if index < 2 * period:
+            if dx is not None:
+                self.sum_dx += dx
+            if index == 2 * period - 1:
+                self.adx = self.sum_dx / period
+        elif dx is not None:
+            self.adx = ((self.adx * (period - 1)) + dx) / period
+        return self.adx
+    
+    def value(self):
+        return self.adx
+
+
+class OBV(StreamingIndicator):
+    __slots__ = ('prev_close', 'obv')
+    
+    def __init__(self):
+        self.prev_close = NAN
+        self.obv = NAN
+    
+    def update(self, bar):
+        close, volume = _field(bar, 'close'), _field(bar, 'volume')
+        if math.isnan(self.obv):
+            self.obv = volume
+        elif close > self.prev_close:
+            self.obv += volume
+        elif close < self.prev_close:
+            self.obv -= volume
+        self.prev_close = close
+        return self.obv
+    
+    def value(self):
+        return self.obv
+
+
+class RollingRank(StreamingIndicator):
+    """
+    Percentile rank of the latest value within the last period values
+    
+    Matches rolling_kernels.rolling_rank (and pandas rolling rank): NaN
+    until the window is full or while it holds a NaN. Each update is
+    O(log period) through a SortedBlockList of the window's values.
+    """
+    __slots__ = ('period', 'field', 'method', 'pct', 'window', 'sorted', 'nan_count')
+    
+    def __init__(self, period=250, field='close', method='average', pct=True):
+        if method not in RANK_METHODS:
+            raise ValueError(f"Unsupported rank method: {method}")
+        self.period = period
+        self.field = field
+        self.method = method
+        self.pct = pct
+        self.window = deque(maxlen=period)
+        self.sorted = SortedBlockList()
+        self.nan_count = 0
+    
+    def update(self, bar):
+        value = _field(bar, self.field)
+        if len(self.window) == self.period:
+            leaving = self.window[0]
+            if math.isnan(leaving):
+                self.nan_count -= 1
+            else:
+                self.sorted.remove(leaving)
+        self.window.append(value)
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self.sorted.add(value)
+        return self.value()
+    
+    def value(self):
+        if len(self.window) < self.period or self.nan_count:
+            return NAN
+        rank = self.sorted.rank(self.window[-1], self.method)
+        return rank / self.period if self.pct else rank
+    
+    def snapshot(self):
+        # The sorted values are rebuilt from the window on restore
+        state = super().snapshot()
+        state['sorted'] = None
+        return state
+    
+    def restore(self, state):
+        super().restore(state)
+        self.sorted = SortedBlockList(value for value in self.window if not math.isnan(value))
+        return self
+
+
+class IndicatorSet(StreamingIndicator):
+    """
+    Per-symbol set of streaming indicators mirroring TechnicalAnalyzer.analyze
+    
+    Feed each new bar to update(); value() returns the same keys as
+    TechnicalAnalyzer.analyze, including trend, rsi_signal and
+    macd_signal_value, without recomputing any history.
+    """
+    __slots__ = ('sma_20', 'sma_50', 'sma_200', 'ema_20', 'rsi', 'macd',
+                 'bbands', 'stoch', 'adx', 'obv', 'current_price')
+    
+    def __init__(self):
+        self.sma_20 = SMA(20)
+        self.sma_50 = SMA(50)
+        self.sma_200 = SMA(200)
+        self.ema_20 = EMA(20)
+        self.rsi = RSI(14)
+        self.macd = MACD(12, 26, 9)
+        self.bbands = BollingerBands(20, 2.0)
+        self.stoch = Stochastic(5, 3, 3)
+        self.adx = ADX(14)
+        self.obv = OBV()
+        self.current_price = NAN
+    
+    def update(self, bar):
+        """
+        Update every indicator with a new bar
+        
+        Args:
+            bar (dict or pandas.Series): Bar with open, high, low, close and volume
+        """
+        for name in self.__slots__[:-1]:
+            getattr(self, name).update(bar)
+        self.current_price = _field(bar, 'close')
+    
+    def update_many(self, data):
+        """Feed every row of an OHLCV DataFrame in order"""
+        columns = ['high', 'low', 'close', 'volume']
+        for high, low, close, volume in data[columns].itertuples(index=False, name=None):
+            self.update({'high': high, 'low': low, 'close': close, 'volume': volume})
+    
+    def value(self):
+        """
+        Latest indicators with signals
+        
+        Returns:
+            dict: Same keys as TechnicalAnalyzer.analyze
+        """
+        macd, macd_signal, macd_hist = self.macd.value()
+        bb_upper, bb_middle, bb_lower = self.bbands.value()
+        stoch_k, stoch_d = self.stoch.value()
+        indicators = {
+            'sma_20': self.sma_20.value(),
+            'sma_50': self.sma_50.value(),
+            'sma_200': self.sma_200.value(),
+            'ema_20': self.ema_20.value(),
+            'rsi': self.rsi.value(),
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd_hist,
+            'bb_upper': bb_upper,
+            'bb_middle': bb_middle,
+            'bb_lower': bb_lower,
+            'stoch_k': stoch_k,
+            'stoch_d': stoch_d,
+            'adx': self.adx.value(),
+            'obv': self.obv.value(),
+            'current_price': self.current_price
+        }
+        return add_signals(indicators)
@@ -1,14 +1,77 @@
 import logging
 import pandas as pd
 import numpy as np
-import talib as ta
+from app.utils.indicator_backends import get_backend
+from app.utils.signals import add_signals, add_signal_columns
+from app.utils import indicator_kernels as kernels
+from app.utils.rolling_kernels import rolling_rank
 
 logger = logging.getLogger(__name__)
 
+# DataProcessor.process columns holding TA-Lib compatible values:
+# indicator -> (column, TA-Lib lookback, smoothing factor of recursive indicators, passes)
+PRECOMPUTED_COLUMNS = {
+    'sma_20': ('ma_20', 19, None, 1),
+    'sma_50': ('ma_50', 49, None, 1),
+    'sma_200': ('ma_200', 199, None, 1),
+    'ema_20': ('ema_20', 19, 2 / 21, 1),
+    'macd': ('macd_line', 33, 2 / 27, 1),
+    'macd_signal': ('macd_signal', 33, 2 / 27, 1),
+    'macd_hist': ('macd_histogram', 33, 2 / 27, 1),
+    'adx': ('adx', 27, 1 / 14, 2)
+}
+
+# Timeframe label -> pandas resample rule, all built from one minute series
+TIMEFRAMES = {
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '60min',
+    '1d': '1D'
+}
+# Native candle interval used to seed timeframes the minute cache is too short for
+TIMEFRAME_INTERVALS = {
+    '5m': 'FIVE_MINUTE',
+    '15m': 'FIFTEEN_MINUTE',
+    '1h': 'ONE_HOUR',
+    '1d': 'ONE_DAY'
+}
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=15)
+SESSION_CLOSE = pd.Timedelta(hours=15, minutes=30)
+MINUTE_HISTORY_DAYS = 30
+# Longest indicator lookback in bars (sma_200), and calendar days added for holidays
+LONGEST_LOOKBACK = 200
+SEED_HOLIDAY_DAYS = 15
+MAX_CACHED_MINUTES = MINUTE_HISTORY_DAYS * 375
+MAX_TIMEFRAME_BARS = 1000
+
 class TechnicalAnalyzer:
-    def __init__(self):
-        """Initialize the Technical Analyzer"""
-        pass
+    def __init__(self, latest_only=False, tolerance=1e-9, reuse_precomputed=True, backend='auto', api_wrapper=None):
+        """
+        Initialize the Technical Analyzer
+        
+        Args:
+            latest_only (bool): Compute only the latest value of each indicator.
+                Windowed indicators use their closed form over the last window,
+                recursive ones (EMA, RSI, MACD, ADX) run on a slice of their
+                lookback plus enough warm-up bars for the seed to decay below
+                tolerance.
+            tolerance (float): Residual weight of the seed allowed in latest-only mode
+            reuse_precomputed (bool): Take indicators already present in a
+                DataProcessor.process output instead of recomputing them
+            backend (str or IndicatorBackend): Indicator backend ('talib', 'numpy'
+                or 'auto'), or a backend from indicator_backends.get_backend
+            api_wrapper (SmartAPIWrapper, optional): Source of minute bars for
+                analyze_multi_timeframe
+        """
+        self.latest_only = latest_only
+        self.tolerance = tolerance
+        self.reuse_precomputed = reuse_precomputed
+        self.backend = get_backend(backend) if isinstance(backend, str) else backend
+        self.api_wrapper = api_wrapper
+        
+        # Minute bars per symbol and closed bars/indicators per (symbol, timeframe)
+        self._minute_cache = {}
+        self._timeframe_cache = {}
     
     def analyze(self, data):
         """
@@ -16,7 +79,7 @@ class TechnicalAnalyzer:
         
         Args:
             data (pandas.DataFrame): Historical price data with OHLCV columns
-            
+        
         Returns:
             dict: Technical indicators and analysis
         """
@@ -32,65 +95,80 @@ class TechnicalAnalyzer:
                     logger.warning(f"Missing required column {col} for technical analysis")
                     return self._get_empty_indicators()
             
-            # Calculate technical indicators
+            # Calculate technical indicators, reusing the ones the data processor already added
             indicators = {}
+            reused = self._precomputed(data)
             
             # Moving Averages
             try:
-                indicators['sma_20'] = ta.SMA(data['close'], timeperiod=20).iloc[-1]
-                indicators['sma_50'] = ta.SMA(data['close'], timeperiod=50).iloc[-1]
-                indicators['sma_200'] = ta.SMA(data['close'], timeperiod=200).iloc[-1]
-                indicators['ema_20'] = ta.EMA(data['close'], timeperiod=20).iloc[-1]
+                for period in [20, 50, 200]:
+                    key = f'sma_{period}'
+                    indicators[key] = reused[key] if key in reused else self._sma_last(data['close'], period)
+                if 'ema_20' in reused:
+                    indicators['ema_20'] = reused['ema_20']
+                else:
+                    indicators['ema_20'] = self._last(self.backend.ema(self._tail(data['close'], 19, 2 / 21), timeperiod=20))
             except Exception as e:
                 logger.error(f"Error calculating moving averages: {str(e)}")
                 indicators['sma_20'] = indicators['sma_50'] = indicators['sma_200'] = indicators['ema_20'] = 0
             
             # RSI
             try:
-                indicators['rsi'] = ta.RSI(data['close'], timeperiod=14).iloc[-1]
+                indicators['rsi'] = self._last(self.backend.rsi(self._tail(data['close'], 14, 1 / 14), timeperiod=14))
             except Exception as e:
                 logger.error(f"Error calculating RSI: {str(e)}")
                 indicators['rsi'] = 50
             
             # MACD
             try:
-                macd, macd_signal, macd_hist = ta.MACD(data['close'])
-                indicators['macd'] = macd.iloc[-1]
-                indicators['macd_signal'] = macd_signal.iloc[-1]
-                indicators['macd_hist'] = macd_hist.iloc[-1]
+                if all(key in reused for key in ['macd', 'macd_signal', 'macd_hist']):
+                    macd, macd_signal, macd_hist = reused['macd'], reused['macd_signal'], reused['macd_hist']
+                else:
+                    macd, macd_signal, macd_hist = (self._last(values) for values in self.backend.macd(self._tail(data['close'], 33, 2 / 27)))
+                indicators['macd'] = macd
+                indicators['macd_signal'] = macd_signal
+                indicators['macd_hist'] = macd_hist
             except Exception as e:
                 logger.error(f"Error calculating MACD: {str(e)}")
                 indicators['macd'] = indicators['macd_signal'] = indicators['macd_hist'] = 0
             
             # Bollinger Bands
             try:
-                upper, middle, lower = ta.BBANDS(data['close'], timeperiod=20)
-                indicators['bb_upper'] = upper.iloc[-1]
-                indicators['bb_middle'] = middle.iloc[-1]
-                indicators['bb_lower'] = lower.iloc[-1]
+                if 'bb_upper' in reused:
+                    bands = reused['bb_upper'], reused['bb_middle'], reused['bb_lower']
+                else:
+                    bands = self._bbands_last(data['close'], 20)
+                indicators['bb_upper'], indicators['bb_middle'], indicators['bb_lower'] = bands
             except Exception as e:
                 logger.error(f"Error calculating Bollinger Bands: {str(e)}")
                 indicators['bb_upper'] = indicators['bb_middle'] = indicators['bb_lower'] = 0
             
             # Stochastic
             try:
-                slowk, slowd = ta.STOCH(data['high'], data['low'], data['close'])
-                indicators['stoch_k'] = slowk.iloc[-1]
-                indicators['stoch_d'] = slowd.iloc[-1]
+                # Default STOCH(5, 3, 3) depends on the last 9 bars only
+                high, low, close = (self._tail(data[col], 8) for col in ('high', 'low', 'close'))
+                slowk, slowd = self.backend.stoch(high, low, close)
+                indicators['stoch_k'] = self._last(slowk)
+                indicators['stoch_d'] = self._last(slowd)
             except Exception as e:
                 logger.error(f"Error calculating Stochastic: {str(e)}")
                 indicators['stoch_k'] = indicators['stoch_d'] = 50
             
             # ADX
             try:
-                indicators['adx'] = ta.ADX(data['high'], data['low'], data['close'], timeperiod=14).iloc[-1]
+                if 'adx' in reused:
+                    indicators['adx'] = reused['adx']
+                else:
+                    # ADX smooths twice with Wilder's factor, so warm up for both passes
+                    high, low, close = (self._tail(data[col], 27, 1 / 14, passes=2) for col in ('high', 'low', 'close'))
+                    indicators['adx'] = self._last(self.backend.adx(high, low, close, timeperiod=14))
             except Exception as e:
                 logger.error(f"Error calculating ADX: {str(e)}")
                 indicators['adx'] = 25
             
             # OBV
             try:
-                indicators['obv'] = ta.OBV(data['close'], data['volume']).iloc[-1]
+                indicators['obv'] = self._obv_last(data['close'], data['volume'])
             except Exception as e:
                 logger.error(f"Error calculating OBV: {str(e)}")
                 indicators['obv'] = 0
@@ -98,41 +176,440 @@ class TechnicalAnalyzer:
             # Calculate current price
             indicators['current_price'] = data['close'].iloc[-1]
             
-            # Determine trend based on moving averages
-            if indicators['current_price'] > indicators['sma_50'] > indicators['sma_200']:
-                indicators['trend'] = "Bullish"
-            elif indicators['current_price'] < indicators['sma_50'] < indicators['sma_200']:
-                indicators['trend'] = "Bearish"
-            else:
-                indicators['trend'] = "Neutral"
+            # Trend, RSI and MACD signals and summary
+            add_signals(indicators)
             
-            # Determine overbought/oversold based on RSI
-            if indicators['rsi'] > 70:
-                indicators['rsi_signal'] = "Overbought"
-            elif indicators['rsi'] < 30:
-                indicators['rsi_signal'] = "Oversold"
-            else:
-                indicators['rsi_signal'] = "Neutral"
+            return indicators
+        
+        except Exception as e:
+            logger.error(f"Error in technical analysis: {str(e)}")
+            return self._get_empty_indicators()
+    
+    def analyze_many(self, panel):
+        """
+        Analyze a whole watchlist with 2-D array operations
+        
+        All symbols are stacked into (bars x symbols) arrays holding only the
+        bars the latest values depend on (as in latest-only mode), so every
+        indicator is computed once for the whole universe.
+        
+        Args:
+            panel (dict or pandas.DataFrame): Mapping of symbol to OHLCV
+                DataFrame, or a DataFrame with (field, symbol) MultiIndex columns
+        
+        Returns:
+            pandas.DataFrame: One row per symbol with latest indicator values
+                and trend, rsi_signal and macd_signal_value labels
+        """
+        columns = list(self._get_empty_indicators().keys())
+        columns.remove('summary')
+        try:
+            symbols, arrays, obv = self._stack_panel(panel, self._panel_bars())
+            if not symbols:
+                logger.warning("Empty panel provided for technical analysis")
+                return pd.DataFrame(columns=columns)
+            
+            high, low, close = arrays['high'], arrays['low'], arrays['close']
+            table = pd.DataFrame(index=pd.Index(symbols, name='symbol'))
             
-            # Determine MACD signal
-            if indicators['macd'] > indicators['macd_signal']:
-                indicators['macd_signal_value'] = "Bullish"
+            # Windowed indicators from their last window
+            with np.errstate(invalid='ignore'):
+                table['sma_20'] = close[-20:].mean(axis=0) if len(close) >= 20 else np.nan
+                table['sma_50'] = close[-50:].mean(axis=0) if len(close) >= 50 else np.nan
+                table['sma_200'] = close[-200:].mean(axis=0) if len(close) >= 200 else np.nan
+            
+            # Recursive indicators over the warm-up window
+            table['ema_20'] = kernels.ema(close[-self._slice_bars(19, 2 / 21):], 20, latest=True)
+            table['rsi'] = kernels.rsi(close[-self._slice_bars(14, 1 / 14):], 14, latest=True)
+            macd, macd_signal, macd_hist = kernels.macd(close[-self._slice_bars(33, 2 / 27):], latest=True)
+            table['macd'] = macd
+            table['macd_signal'] = macd_signal
+            table['macd_hist'] = macd_hist
+            
+            if len(close) >= 20:
+                window = close[-20:]
+                middle = window.mean(axis=0)
+                deviation = 2 * window.std(axis=0)
+                table['bb_upper'], table['bb_middle'], table['bb_lower'] = middle + deviation, middle, middle - deviation
             else:
-                indicators['macd_signal_value'] = "Bearish"
+                table['bb_upper'] = table['bb_middle'] = table['bb_lower'] = np.nan
             
-            # Create summary
-            summary = f"Technical Analysis: {indicators['trend']}. "
-            summary += f"RSI: {indicators['rsi']:.2f} ({indicators['rsi_signal']}), "
-            summary += f"MACD: {indicators['macd_signal_value']}, "
-            summary += f"Price: {indicators['current_price']:.2f}"
+            slowk, slowd = kernels.stoch(high[-9:], low[-9:], close[-9:])
+            table['stoch_k'] = slowk[-1]
+            table['stoch_d'] = slowd[-1]
             
-            indicators['summary'] = summary
+            adx_bars = self._slice_bars(27, 1 / 14, passes=2)
+            table['adx'] = kernels.adx(high[-adx_bars:], low[-adx_bars:], close[-adx_bars:], 14, latest=True)
+            table['obv'] = obv
+            table['current_price'] = close[-1]
             
-            return indicators
+            return add_signal_columns(table)[columns]
+        
+        except Exception as e:
+            logger.error(f"Error in panel technical analysis: {str(e)}")
+            return pd.DataFrame(columns=columns)
+    
+    def analyze_multi_timeframe(self, symbol, timeframes=None, data=None):
+        """
+        Analyze a symbol on several timeframes built from one minute series
+        
+        Minute bars are cached per symbol; after the first call only the
+        latest day is fetched and merged. Timeframes needing more history
+        than the minute cache holds (1h and 1d for sma_200) are seeded once
+        with native candles. Each timeframe keeps its closed bars and
+        indicators, and is recomputed only when one of its bars closes, so
+        the in-progress bar never enters the indicators.
+        
+        Args:
+            symbol (str): Stock symbol
+            timeframes (list, optional): Labels from TIMEFRAMES; all by default
+            data (pandas.DataFrame, optional): New minute OHLCV bars to merge
+                instead of fetching them through the API wrapper
+        
+        Returns:
+            dict: symbol, timeframes (label -> indicators with the bar_time of
+                the last closed bar) and trend_confluence (the trend shared by
+                all timeframes, or "Mixed")
+        """
+        try:
+            minutes = self._update_minute_cache(symbol, data)
+            if minutes is None or minutes.empty:
+                logger.warning(f"No minute data available for multi-timeframe analysis of {symbol}")
+                return {}
+            
+            results = {}
+            for timeframe in timeframes or list(TIMEFRAMES):
+                if timeframe not in TIMEFRAMES:
+                    logger.warning(f"Skipping unsupported timeframe {timeframe}")
+                    continue
+                results[timeframe] = self._timeframe_indicators(symbol, timeframe, minutes)
             
+            trends = {indicators['trend'] for indicators in results.values()}
+            return {
+                'symbol': symbol,
+                'timeframes': results,
+                'trend_confluence': trends.pop() if len(trends) == 1 else "Mixed"
+            }
+        
         except Exception as e:
-            logger.error(f"Error in technical analysis: {str(e)}")
-            return self._get_empty_indicators()
+            logger.error(f"Error in multi-timeframe analysis for {symbol}: {str(e)}")
+            return {}
+    
+    def _update_minute_cache(self, symbol, data=None):
+        """Merge new minute bars into the symbol's cache, fetching them if not given"""
+        cached = self._minute_cache.get(symbol)
+        if data is None:
+            if self.api_wrapper is None:
+                return cached
+            days = 1 if cached is not None and not cached.empty else MINUTE_HISTORY_DAYS
+            data = self.api_wrapper.get_historical_data(symbol, interval="ONE_MINUTE", days=days)
+        
+        if data is not None and not data.empty:
+            data = data[['open', 'high', 'low', 'close', 'volume']].sort_index()
+            if cached is not None and not cached.empty:
+                # Fetched bars replace cached ones from the same time on; the last cached bar may have been in progress
+                data = pd.concat([cached[cached.index < data.index[0]], data])
+            self._minute_cache[symbol] = data.iloc[-MAX_CACHED_MINUTES:]
+        
+        return self._minute_cache.get(symbol)
+    
+    def _timeframe_indicators(self, symbol, timeframe, minutes):
+        """Indicators of a timeframe, recomputed only when new bars have closed"""
+        rule = TIMEFRAMES[timeframe]
+        state = self._timeframe_cache.setdefault((symbol, timeframe), {'bars': None, 'indicators': None})
+        if state['bars'] is None:
+            state['bars'] = self._seed_bars(symbol, timeframe, minutes)
+        bars = state['bars']
+        
+        # Only minutes after the last closed bar can form new bars
+        if bars is not None and not bars.empty:
+            minutes = minutes[minutes.index >= bars.index[-1] + pd.Timedelta(rule)]
+        closed = self._closed_bars(minutes, rule)
+        
+        if not closed.empty:
+            bars = closed if bars is None else pd.concat([bars, closed])
+            bars = bars.iloc[-MAX_TIMEFRAME_BARS:]
+            state['bars'] = bars
+        elif state['indicators'] is not None:
+            return dict(state['indicators'])
+        
+        if bars is None or bars.empty:
+            indicators = self._get_empty_indicators()
+            indicators['bar_time'] = None
+        else:
+            indicators = self.analyze(bars)
+            indicators['bar_time'] = bars.index[-1]
+        state['indicators'] = indicators
+        return dict(indicators)
+    
+    @staticmethod
+    def _seed_days(timeframe):
+        """Calendar days of native candles covering LONGEST_LOOKBACK bars, or 0 if the minute cache does"""
+        length = pd.Timedelta(TIMEFRAMES[timeframe])
+        session = SESSION_CLOSE - SESSION_OPEN
+        bars_per_session = 1 if length >= pd.Timedelta(days=1) else int(np.ceil(session / length))
+        sessions = int(np.ceil(LONGEST_LOOKBACK / bars_per_session))
+        # Five sessions a week
+        if sessions <= MINUTE_HISTORY_DAYS * 5 // 7:
+            return 0
+        return int(np.ceil(sessions * 7 / 5)) + SEED_HOLIDAY_DAYS
+    
+    def _seed_bars(self, symbol, timeframe, minutes):
+        """
+        Native candles preceding the bars built from the minute cache
+        
+        The last fetched candle may still be in progress, so it is dropped;
+        the minute cache rebuilds every bar after the seed.
+        """
+        days = self._seed_days(timeframe)
+        if not days or self.api_wrapper is None:
+            return None
+        
+        try:
+            seed = self.api_wrapper.get_historical_data(symbol, interval=TIMEFRAME_INTERVALS[timeframe], days=days)
+            if seed is None or seed.empty:
+                return None
+            
+            seed = seed[['open', 'high', 'low', 'close', 'volume']].sort_index().iloc[:-1]
+            if seed.empty:
+                return None
+            if seed.index.tz is None and minutes.index.tz is not None:
+                seed.index = seed.index.tz_localize(minutes.index.tz)
+            elif seed.index.tz is not None:
+                seed.index = seed.index.tz_convert(minutes.index.tz) if minutes.index.tz is not None else seed.index.tz_localize(None)
+            if not minutes.empty and seed.index[-1] + pd.Timedelta(TIMEFRAMES[timeframe]) < minutes.index[0]:
+                logger.warning(f"Seed candles for {symbol} {timeframe} end before the cached minutes start")
+            return seed.iloc[-MAX_TIMEFRAME_BARS:]
+        
+        except Exception as e:
+            logger.error(f"Error seeding {timeframe} bars for {symbol}: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _closed_bars(minutes, rule):
+        """
+        Resample minute bars and keep the bars that have closed
+        
+        Intraday bars are aligned to the session open (so hourly bars start
+        at 9:15) and end at the session close at the latest. A bar is closed
+        once the data contains its last minute.
+        """
+        if minutes.empty:
+            return minutes
+        
+        length = pd.Timedelta(rule)
+        offset = SESSION_OPEN % length if length < pd.Timedelta(days=1) else pd.Timedelta(0)
+        
+        # Nothing to resample until the first pending bar has closed
+        first_start = (minutes.index[0] - offset).floor(rule) + offset
+        first_end = min(first_start + length, first_start.normalize() + SESSION_CLOSE)
+        if minutes.index[-1] < first_end - pd.Timedelta(minutes=1):
+            return minutes.iloc[:0]
+        
+        bars = minutes.resample(rule, offset=offset).agg({
+            'open': 'first',
+            'high': 'max',
+            'low': 'min',
+            'close': 'last',
+            'volume': 'sum'
+        }).dropna(subset=['close'])
+        
+        ends = bars.index + length
+        session_close = bars.index.normalize() + SESSION_CLOSE
+        ends = ends.where(ends < session_close, session_close)
+        return bars[minutes.index[-1] >= ends - pd.Timedelta(minutes=1)]
+    
+    def _slice_bars(self, lookback, alpha=None, passes=1):
+        """Bars the latest value of an indicator depends on"""
+        bars = lookback + 1
+        if alpha is not None:
+            bars += self._warmup_bars(alpha, passes)
+        return bars
+    
+    def _panel_bars(self):
+        """Bars needed by the most demanding indicator in analyze_many"""
+        return max(
+            200,
+            self._slice_bars(19, 2 / 21),
+            self._slice_bars(14, 1 / 14),
+            self._slice_bars(33, 2 / 27),
+            self._slice_bars(27, 1 / 14, passes=2)
+        )
+    
+    def _stack_panel(self, panel, bars):
+        """
+        Stack the last bars of every symbol into right-aligned 2-D arrays
+        
+        Shorter histories are padded with leading NaN. OBV depends on the
+        whole history, so it is computed here from the full series.
+        
+        Returns:
+            tuple: (symbols, dict of field -> (bars x symbols) array, latest OBV array)
+        """
+        fields = ['high', 'low', 'close', 'volume']
+        
+        if isinstance(panel, pd.DataFrame):
+            symbols = list(panel['close'].columns)
+            full = {field: panel[field][symbols].to_numpy(dtype=np.float64) for field in fields}
+            arrays = {field: values[-bars:] for field, values in full.items()}
+            obv = kernels.obv(full['close'], full['volume'])[-1] if len(full['close']) else np.full(len(symbols), np.nan)
+            return symbols, arrays, obv
+        
+        symbols = []
+        frames = []
+        for symbol, data in panel.items():
+            if data is None or data.empty or any(col not in data.columns for col in fields):
+                logger.warning(f"Skipping {symbol}: missing OHLCV data for technical analysis")
+                continue
+            symbols.append(symbol)
+            frames.append(data)
+        
+        arrays = {field: np.full((bars, len(symbols)), np.nan) for field in fields}
+        obv = np.full(len(symbols), np.nan)
+        for j, data in enumerate(frames):
+            # One conversion per frame; column lookups on the frame are far slower
+            try:
+                values = data.to_numpy(dtype=np.float64)
+                columns = list(data.columns)
+                positions = [columns.index(field) for field in fields]
+            except (TypeError, ValueError):
+                # Non-numeric extra columns
+                values = data[fields].to_numpy(dtype=np.float64)
+                positions = np.arange(len(fields))
+            n = min(bars, len(values))
+            for position, field in zip(positions, fields):
+                arrays[field][bars - n:, j] = values[-n:, position]
+            prices, volumes = values[:, positions[2]], values[:, positions[3]]
+            obv[j] = volumes[0] + np.dot(np.sign(np.diff(prices)), volumes[1:])
+        return symbols, arrays, obv
+    
+    def percentile_ranks(self, data, columns=('close', 'volume'), window=250):
+        """
+        Percentile rank of the latest value of each column within its last window bars
+        
+        A {column}_rank_{window} column from DataProcessor is reused when
+        present; otherwise only the last window values are ranked.
+        
+        Args:
+            data (pandas.DataFrame): Historical data
+            columns (iterable): Columns to rank
+            window (int): Number of bars, including the latest one
+        
+        Returns:
+            dict: {column}_rank_{window} -> rank in (0, 1], NaN with too little data
+        """
+        ranks = {}
+        for column in columns:
+            key = f'{column}_rank_{window}'
+            try:
+                if self.reuse_precomputed and key in data.columns and not np.isnan(data[key].iloc[-1]):
+                    ranks[key] = float(data[key].iloc[-1])
+                    continue
+                values = data[column].to_numpy(dtype=np.float64)[-window:]
+                ranks[key] = float(rolling_rank(values, window)[-1]) if len(values) else np.nan
+            except Exception as e:
+                logger.error(f"Error ranking {column}: {str(e)}")
+                ranks[key] = np.nan
+        return ranks
+    
+    def _precomputed(self, data):
+        """
+        Latest indicator values already present in a DataProcessor.process output
+        
+        Only float64 columns are reused, and recursive indicators only when the
+        frame holds at least their warm-up slice. The processor computes them
+        over the full history before dropping its warm-up rows, so their seed
+        has decayed at least as far as a recomputation on this frame.
+        
+        Args:
+            data (pandas.DataFrame): Data passed to analyze
+        
+        Returns:
+            dict: Indicator name -> latest value for every reusable indicator
+        """
+        reused = {}
+        if not self.reuse_precomputed:
+            return reused
+        
+        def latest(column, min_bars):
+            if column not in data.columns or len(data) < min_bars:
+                return None
+            values = data[column].to_numpy()
+            if values.dtype != np.float64 or np.isnan(values[-1]):
+                return None
+            return values[-1]
+        
+        for key, (column, lookback, alpha, passes) in PRECOMPUTED_COLUMNS.items():
+            value = latest(column, self._slice_bars(lookback, alpha, passes))
+            if value is not None:
+                reused[key] = value
+        
+        middle, std = latest('bb_middle_20', 20), latest('bb_std_20', 20)
+        if middle is not None and std is not None:
+            # The processor stores the sample std; TA-Lib bands use the population std
+            deviation = 2 * std * np.sqrt(19 / 20)
+            reused['bb_upper'], reused['bb_middle'], reused['bb_lower'] = middle + deviation, middle, middle - deviation
+        
+        return reused
+    
+    def _warmup_bars(self, alpha, passes=1):
+        """Bars after which a seed's weight (1 - alpha) ** n falls below tolerance"""
+        return passes * int(np.ceil(np.log(self.tolerance) / np.log(1 - alpha)))
+    
+    def _tail(self, series, lookback, alpha=None, passes=1):
+        """
+        Slice a series to what its latest indicator value depends on
+        
+        Args:
+            series (pandas.Series): Input series
+            lookback (int): TA-Lib lookback of the indicator
+            alpha (float, optional): Smoothing factor of a recursive indicator
+            passes (int): Number of chained recursive smoothings
+        
+        Returns:
+            pandas.Series or numpy.ndarray: The full series, or an array of its
+                last bars in latest-only mode
+        """
+        if not self.latest_only:
+            return series
+        bars = self._slice_bars(lookback, alpha, passes)
+        # Plain arrays avoid the pandas overhead that dominates on short slices
+        return series.to_numpy(dtype=np.float64)[-bars:]
+    
+    @staticmethod
+    def _last(values):
+        """Last element of an indicator output (array or Series)"""
+        return values.iloc[-1] if isinstance(values, pd.Series) else values[-1]
+    
+    def _sma_last(self, close, period):
+        """Latest simple moving average"""
+        if not self.latest_only:
+            return self.backend.sma(close, timeperiod=period)[-1]
+        if len(close) < period:
+            return np.nan
+        return close.to_numpy(dtype=np.float64)[-period:].mean()
+    
+    def _bbands_last(self, close, period, nbdev=2):
+        """Latest Bollinger Bands (upper, middle, lower)"""
+        if not self.latest_only:
+            upper, middle, lower = self.backend.bbands(close, timeperiod=period, nbdev=nbdev)
+            return upper[-1], middle[-1], lower[-1]
+        if len(close) < period:
+            return np.nan, np.nan, np.nan
+        window = close.to_numpy(dtype=np.float64)[-period:]
+        # TA-Lib uses the population standard deviation
+        middle = window.mean()
+        deviation = nbdev * window.std()
+        return middle + deviation, middle, middle - deviation
+    
+    def _obv_last(self, close, volume):
+        """Latest On-Balance Volume"""
+        if not self.latest_only:
+            return self.backend.obv(close, volume)[-1]
+        prices = close.to_numpy(dtype=np.float64)
+        volumes = volume.to_numpy(dtype=np.float64)
+        # TA-Lib starts from the first bar's volume and adds signed volume on each change
+        return volumes[0] + np.dot(np.sign(np.diff(prices)), volumes[1:])
     
     def _get_empty_indicators(self):
         """Return empty indicators when analysis fails"""
@@ -0,0 +1,354 @@
+import logging
+import pandas as pd
+import numpy as np
+
+from app.utils.option_pricing import norm_cdf, norm_pdf, time_to_expiry
+
+logger = logging.getLogger(__name__)
+
+# Strikes per expiry at which the smile is tabulated against delta
+DELTA_GRID_POINTS = 64
+
+# Newton refinements of a strike interpolated from the delta table
+DELTA_NEWTON_STEPS = 2
+
+
+def pchip_slopes(x, y):
+    """
+    Knot derivatives of the monotone piecewise cubic Hermite interpolant
+    
+    Fritsch-Carlson slopes with the weighted harmonic mean of the adjacent
+    secants inside (zero at local extrema) and the shape-preserving
+    three-point formula at the ends, as scipy.interpolate.PchipInterpolator.
+    
+    Args:
+        x (numpy.ndarray): Strictly increasing knots
+        y (numpy.ndarray): Values at the knots
+    
+    Returns:
+        numpy.ndarray: Derivative at every knot
+    """
+    n = len(x)
+    if n < 2:
+        return np.zeros(n)
+    h = np.diff(x)
+    secant = np.diff(y) / h
+    if n == 2:
+        return np.full(2, secant[0])
+    
+    slopes = np.zeros(n)
+    w1 = 2 * h[1:] + h[:-1]
+    w2 = h[1:] + 2 * h[:-1]
+    same_sign = secant[:-1] * secant[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic = (w1 + w2) / (w1 / secant[:-1] + w2 / secant[1:])
+    slopes[1:-1] = np.where(same_sign, harmonic, 0.0)
+    
+    def end_slope(h0, h1, m0, m1):
+        slope = ((2 * h0 + h1) * m0 - h0 * m1) / (h0 + h1)
+        if np.sign(slope) != np.sign(m0):
+            return 0.0
+        if np.sign(m0) != np.sign(m1) and abs(slope) > abs(3 * m0):
+            return 3 * m0
+        return slope
+    
+    slopes[0] = end_slope(h[0], h[1], secant[0], secant[1])
+    slopes[-1] = end_slope(h[-1], h[-2], secant[-1], secant[-2])
+    return slopes
+
+
+def _otm_smile(strike, iv, is_call, forward):
+    """
+    One IV per strike, from the out-of-the-money option where it is quoted
+    
+    Returns:
+        tuple: (sorted unique strikes, their IVs)
+    """
+    valid = np.isfinite(strike) & np.isfinite(iv) & (strike > 0)
+    strike, iv, is_call = strike[valid], iv[valid], is_call[valid]
+    # Puts below the forward and calls above it first, so they win each strike
+    in_the_money = np.where(is_call, strike < forward, strike >= forward)
+    order = np.lexsort((in_the_money, strike))
+    strike, iv = strike[order], iv[order]
+    first = np.r_[True, strike[1:] != strike[:-1]] if len(strike) else np.zeros(0, dtype=bool)
+    return strike[first], iv[first]
+
+
+class VolatilitySmile:
+    """
+    Monotone cubic (PCHIP) smile of every expiry of a chain
+    
+    The smile of an expiry interpolates the out-of-the-money IVs against
+    strike and is flat beyond the listed strikes. All expiries share
+    concatenated coefficient arrays, so a query over many strikes and
+    expiries is a single searchsorted and a Horner evaluation. A refit only
+    touches the expiries whose strikes or IVs changed.
+    
+    Attributes:
+        expiries (list): Fitted expiry labels, nearest first
+        times (numpy.ndarray): Time to expiry in years at fit time, per expiry
+        forwards (numpy.ndarray): Forward price at fit time, per expiry
+        knots (numpy.ndarray): Strikes of all expiries, concatenated
+        coefficients (numpy.ndarray): (len(knots), 4) cubic coefficients of the
+            interval starting at each knot
+        offsets (numpy.ndarray): Start of every expiry in knots, plus the total
+    """
+    
+    def __init__(self, rate=0.0, dividend=0.0, grid_points=DELTA_GRID_POINTS):
+        """
+        Args:
+            rate (float): Annual risk-free rate
+            dividend (float): Annual dividend yield of the underlying
+            grid_points (int): Strikes per expiry tabulated for delta queries
+        """
+        self.rate = rate
+        self.dividend = dividend
+        self.grid_points = grid_points
+        self.expiries = []
+        self.times = np.zeros(0)
+        self.forwards = np.zeros(0)
+        self.knots = np.zeros(0)
+        self.coefficients = np.zeros((0, 4))
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self._state = None
+        self._inputs = {}
+        self._fits = {}
+        self._lookup = {}
+        self._scale = 1.0
+        self._keys = np.zeros(0)
+        self._delta_keys = np.zeros(0)
+        self._delta_strikes = np.zeros(0)
+    
+    def __len__(self):
+        return len(self.expiries)
+    
+    def fit(self, chain, now=None):
+        """
+        Fit the smile of every expiry of a chain
+        
+        Args:
+            chain (OptionChain): Chain with solved or quoted IVs and its underlying price
+            now (Timestamp, optional): Valuation time
+        
+        Returns:
+            int: Number of expiries (re)fitted; 0 when the chain did not change
+        """
+        state = (chain.underlying, chain.strike, chain.iv, chain.is_call, chain.expiry)
+        if self._state is not None and self._state[0] == state[0] and all(
+                np.array_equal(old, new, equal_nan=new.dtype.kind == 'f') for old, new in zip(self._state[1:], state[1:])):
+            return 0
+        self._state = state
+        
+        labels, groups = chain.expiries()
+        times = time_to_expiry(labels, now=now) if labels else np.zeros(0)
+        spot = chain.underlying
+        
+        inputs, fits, refitted = {}, {}, 0
+        expiries, kept_times = [], []
+        for group, label in enumerate(labels):
+            if not np.isfinite(spot) or not times[group] > 0:
+                continue
+            members = groups == group
+            forward = spot * np.exp((self.rate - self.dividend) * times[group])
+            strikes, ivs = _otm_smile(chain.strike[members], chain.iv[members], chain.is_call[members], forward)
+            if not len(strikes):
+                continue
+            
+            previous = self._inputs.get(label)
+            if (previous is not None and np.array_equal(previous[0], strikes)
+                    and np.array_equal(previous[1], ivs, equal_nan=True)):
+                fits[label] = self._fits[label]
+            else:
+                fits[label] = self._fit_expiry(strikes, ivs, times[group], forward)
+                refitted += 1
+            inputs[label] = (strikes, ivs)
+            expiries.append(label)
+            kept_times.append(times[group])
+        
+        if not refitted and expiries == self.expiries:
+            return 0
+        self._inputs, self._fits = inputs, fits
+        self._assemble(expiries, np.asarray(kept_times, dtype=np.float64))
+        return refitted
+    
+    def _fit_expiry(self, strikes, ivs, time, forward):
+        """Coefficients and delta table of one expiry"""
+        slopes = pchip_slopes(strikes, ivs)
+        coefficients = np.zeros((len(strikes), 4))
+        coefficients[:, 0] = ivs
+        coefficients[:, 1] = slopes
+        if len(strikes) > 1:
+            h = np.diff(strikes)
+            secant = np.diff(ivs) / h
+            coefficients[:-1, 2] = (3 * secant - 2 * slopes[:-1] - slopes[1:]) / h
+            coefficients[:-1, 3] = (slopes[:-1] + slopes[1:] - 2 * secant) / (h * h)
+            coefficients[-1, 1] = 0.0
+        
+        # Call delta over a geometric strike grid, as the probability 1 - N(d1)
+        # of finishing below, made non-decreasing so it can be inverted
+        grid = np.geomspace(strikes[0], strikes[-1], self.grid_points) if len(strikes) > 1 else strikes.copy()
+        grid_iv = _evaluate(grid, strikes, coefficients)
+        deviation = grid_iv * np.sqrt(time)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d1 = np.log(forward / grid) / deviation + 0.5 * deviation
+        below = np.maximum.accumulate(1.0 - norm_cdf(d1))
+        return {'time': time, 'forward': forward, 'knots': strikes, 'coefficients': coefficients,
+                'delta_strikes': grid, 'delta_below': below}
+    
+    def _assemble(self, expiries, times):
+        """Concatenate the fits of all expiries into the query arrays"""
+        fits = [self._fits[label] for label in expiries]
+        self.expiries = expiries
+        self.times = times
+        self.forwards = np.array([fit['forward'] for fit in fits], dtype=np.float64)
+        sizes = [len(fit['knots']) for fit in fits]
+        self.offsets = np.r_[0, np.cumsum(sizes)].astype(np.int64)
+        self.knots = np.concatenate([fit['knots'] for fit in fits]) if fits else np.zeros(0)
+        self.coefficients = np.concatenate([fit['coefficients'] for fit in fits]) if fits else np.zeros((0, 4))
+        
+        # Composite keys group * scale + strike keep every expiry's knots in
+        # their own range of one sorted array
+        self._scale = 2.0 * float(np.max(self.knots)) + 1.0 if len(self.knots) else 1.0
+        owners = np.repeat(np.arange(len(fits)), sizes)
+        self._keys = owners * self._scale + self.knots
+        grid_sizes = [len(fit['delta_strikes']) for fit in fits]
+        self._delta_offsets = np.r_[0, np.cumsum(grid_sizes)].astype(np.int64)
+        self._delta_keys = (np.repeat(np.arange(len(fits)), grid_sizes) * 2.0
+                            + (np.concatenate([fit['delta_below'] for fit in fits]) if fits else np.zeros(0)))
+        self._delta_strikes = np.concatenate([fit['delta_strikes'] for fit in fits]) if fits else np.zeros(0)
+        
+        self._lookup = {}
+        for group, label in enumerate(expiries):
+            self._lookup[label] = group
+            try:
+                self._lookup.setdefault(pd.Timestamp(label).normalize(), group)
+            except (TypeError, ValueError):
+                pass
+    
+    def expiry_index(self, expiry=None):
+        """
+        Position of expiries among the fitted ones
+        
+        Args:
+            expiry (label or array-like, optional): Expiry labels in any date
+                format, or integer positions; the nearest expiry when omitted
+        
+        Returns:
+            numpy.ndarray: Position of every expiry, -1 when it is not fitted
+        """
+        if expiry is None:
+            return np.array(0 if self.expiries else -1)
+        if isinstance(expiry, np.ndarray) and expiry.dtype.kind in 'iu':
+            return np.where((expiry >= 0) & (expiry < len(self.expiries)), expiry, -1)
+        values = np.asarray(expiry, dtype=object)
+        
+        def position(label):
+            if isinstance(label, (int, np.integer)):
+                return int(label) if 0 <= label < len(self.expiries) else -1
+            if label in self._lookup:
+                return self._lookup[label]
+            try:
+                return self._lookup.get(pd.Timestamp(label).normalize(), -1)
+            except (TypeError, ValueError):
+                return -1
+        
+        if values.ndim == 0:
+            return np.array(position(values.item()))
+        codes, unique = pd.factorize(values.ravel())
+        return np.array([position(label) for label in unique], dtype=np.int64)[codes].reshape(values.shape)
+    
+    def iv(self, strike, expiry=None):
+        """
+        Implied volatility at arbitrary strikes
+        
+        Args:
+            strike (float or array): Strikes
+            expiry (label or array-like, optional): Expiry of each strike; the
+                nearest expiry when omitted
+        
+        Returns:
+            numpy.ndarray: IVs, flat beyond the listed strikes and NaN for
+                unknown expiries
+        """
+        strike = np.asarray(strike, dtype=np.float64)
+        group = self.expiry_index(expiry)
+        strike, group = np.broadcast_arrays(strike, group)
+        known = group >= 0
+        group = np.where(known, group, 0)
+        if not len(self.expiries):
+            return np.full(strike.shape, np.nan)
+        
+        first, last = self.offsets[group], self.offsets[group + 1] - 1
+        x = np.clip(strike, self.knots[first], self.knots[last])
+        interval = np.searchsorted(self._keys, group * self._scale + x, side='right') - 1
+        interval = np.clip(interval, first, np.maximum(last - 1, first))
+        dx = x - self.knots[interval]
+        c = self.coefficients[interval]
+        result = c[..., 0] + dx * (c[..., 1] + dx * (c[..., 2] + dx * c[..., 3]))
+        return np.where(known & ~np.isnan(strike), result, np.nan)
+    
+    def strike_at_delta(self, delta, expiry=None, is_call=True):
+        """
+        Strike whose option has a given Black-Scholes delta under the smile
+        
+        Args:
+            delta (float or array): Call deltas in (0, 1) or put deltas in (-1, 0)
+            expiry (label or array-like, optional): Expiry of each query; the
+                nearest expiry when omitted
+            is_call (bool or array): Whether each delta is a call delta
+        
+        Returns:
+            numpy.ndarray: Strikes, clipped to the listed strike range
+        """
+        delta = np.asarray(delta, dtype=np.float64)
+        group = self.expiry_index(expiry)
+        delta, group, is_call = np.broadcast_arrays(delta, group, np.asarray(is_call, dtype=bool))
+        known = group >= 0
+        group = np.where(known, group, 0)
+        if not len(self.expiries):
+            return np.full(delta.shape, np.nan)
+        
+        # Spot delta to the probability of the call finishing below, 1 - N(d1)
+        discount = np.exp(-self.dividend * self.times[group])
+        below = 1.0 - np.where(is_call, delta, delta + discount) / discount
+        first, last = self._delta_offsets[group], self._delta_offsets[group + 1] - 1
+        below = np.clip(below, self._delta_keys[first] - 2.0 * group, self._delta_keys[last] - 2.0 * group)
+        strike = np.interp(group * 2.0 + below, self._delta_keys, self._delta_strikes)
+        
+        # Newton steps on the table's linear interpolation, with the slope of
+        # N(d1) at a fixed volatility
+        low, high = self._delta_strikes[first], self._delta_strikes[last]
+        root_time = np.sqrt(self.times[group])
+        forward = self.forwards[group]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for _ in range(DELTA_NEWTON_STEPS):
+                deviation = self.iv(strike, group) * root_time
+                d1 = np.log(forward / strike) / deviation + 0.5 * deviation
+                slope = norm_pdf(d1) / (strike * deviation)
+                step = (1.0 - norm_cdf(d1) - below) / slope
+                strike = np.clip(np.where(np.isfinite(step), strike - step, strike), low, high)
+        return np.where(known & ~np.isnan(delta), strike, np.nan)
+    
+    def iv_at_delta(self, delta, expiry=None, is_call=True):
+        """
+        Implied volatility at Black-Scholes deltas
+        
+        Args:
+            delta (float or array): Call deltas in (0, 1) or put deltas in (-1, 0)
+            expiry (label or array-like, optional): Expiry of each query
+            is_call (bool or array): Whether each delta is a call delta
+        
+        Returns:
+            numpy.ndarray: IVs at the strikes with those deltas
+        """
+        group = self.expiry_index(expiry)
+        return self.iv(self.strike_at_delta(delta, group, is_call), group)
+
+
+def _evaluate(x, knots, coefficients):
+    """Piecewise cubic of one expiry at x, flat beyond the knots"""
+    x = np.clip(x, knots[0], knots[-1])
+    interval = np.clip(np.searchsorted(knots, x, side='right') - 1, 0, max(len(knots) - 2, 0))
+    dx = x - knots[interval]
+    c = coefficients[interval]
+    return c[:, 0] + dx * (c[:, 1] + dx * (c[:, 2] + dx * c[:, 3]))
@@ -0,0 +1,121 @@
+import logging
+import time
+import numpy as np
+
+from benchmark_technical_analyzer import make_history
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def indicator_calls(backend, high, low, close, volume):
+    """Indicator name -> zero-argument call computing it with the given backend"""
+    return {
+        'sma': lambda: backend.sma(close, timeperiod=20),
+        'ema': lambda: backend.ema(close, timeperiod=20),
+        'rsi': lambda: backend.rsi(close, timeperiod=14),
+        'macd': lambda: backend.macd(close),
+        'bbands': lambda: backend.bbands(close, timeperiod=20),
+        'stoch': lambda: backend.stoch(high, low, close),
+        'adx': lambda: backend.adx(high, low, close, timeperiod=14),
+        'obv': lambda: backend.obv(close, volume)
+    }
+
+def best_time(func, repeats):
+    """Best-of-n wall time of func() and its last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def max_rel_diff(result, reference, indicator=None, floor=1e-12):
+    """
+    Largest element-wise relative difference between two indicator outputs
+    
+    Bollinger Bands are compared by their band widths (upper - middle and
+    middle - lower) and middle band; relative to the band level a width
+    error would be invisible. Values smaller than floor in magnitude (a MACD
+    histogram crossing zero) are compared relative to floor instead. NaN
+    positions must agree, otherwise the difference is infinite.
+    """
+    if not isinstance(result, tuple):
+        result, reference = (result,), (reference,)
+    if indicator == 'bbands':
+        result, reference = (
+            (upper - middle, middle, middle - lower) for upper, middle, lower in (result, reference)
+        )
+    worst = 0.0
+    for values, expected in zip(result, reference):
+        if not np.array_equal(np.isnan(values), np.isnan(expected)):
+            return float('inf')
+        valid = ~np.isnan(expected)
+        if valid.any():
+            scale = np.maximum(np.abs(expected[valid]), floor)
+            worst = max(worst, float(np.max(np.abs(values[valid] - expected[valid]) / scale)))
+    return worst
+
+def make_ticks(bars, seed=42, level=20000.0, step=0.01):
+    """Tick-like OHLCV history: a high price level with tiny moves, where raw sums of squares cancel"""
+    rng = np.random.default_rng(seed)
+    close = level + np.cumsum(rng.normal(0, step, bars))
+    open_ = close + rng.normal(0, step, bars)
+    return {
+        'high': np.maximum(open_, close) + np.abs(rng.normal(0, step, bars)),
+        'low': np.minimum(open_, close) - np.abs(rng.normal(0, step, bars)),
+        'close': close,
+        'volume': rng.integers(1, 100, bars).astype(float)
+    }
+
+def make_inputs(bars, symbols, ticks=False):
+    """OHLCV arrays of shape (bars,) for one symbol or (bars, symbols) for a panel"""
+    histories = [(make_ticks if ticks else make_history)(bars, seed=seed) for seed in range(symbols)]
+    fields = []
+    for field in ['high', 'low', 'close', 'volume']:
+        columns = [np.asarray(history[field]) for history in histories]
+        fields.append(columns[0] if symbols == 1 else np.column_stack(columns))
+    return fields
+
+def main():
+    """Compare speed and accuracy of every indicator across the available backends"""
+    from app.utils.indicator_backends import available_backends, get_backend
+    
+    backends = available_backends()
+    reference_name = 'talib' if 'talib' in backends else backends[0]
+    fastest = {}
+    
+    for bars, symbols, ticks in [(1000, 1, False), (100000, 1, False), (1000, 500, False), (1000000, 1, True)]:
+        high, low, close, volume = make_inputs(bars, symbols, ticks)
+        # Price differences below a billionth of the price level are rounding noise of the inputs
+        floor = 1e-9 * float(np.nanmax(np.abs(close)))
+        calls = {name: indicator_calls(get_backend(name), high, low, close, volume) for name in backends}
+        
+        for indicator in calls[reference_name]:
+            reference_time, reference = best_time(calls[reference_name][indicator], repeats=5)
+            timings = {reference_name: reference_time}
+            report = [f"{reference_name} {reference_time * 1000:.3f} ms"]
+            
+            for name in backends:
+                if name == reference_name:
+                    continue
+                elapsed, result = best_time(calls[name][indicator], repeats=5)
+                timings[name] = elapsed
+                report.append(f"{name} {elapsed * 1000:.3f} ms (max relative diff {max_rel_diff(result, reference, indicator, floor):.2e})")
+            
+            winner = min(timings, key=timings.get)
+            fastest.setdefault(indicator, {}).setdefault(winner, 0)
+            fastest[indicator][winner] += 1
+            workload = f"{bars} {'ticks' if ticks else 'bars'} x {symbols} symbols"
+            logger.info(f"{workload}, {indicator}: " + ", ".join(report))
+    
+    # Backend that won most workloads for each indicator, usable as get_backend overrides
+    overrides = {indicator: max(wins, key=wins.get) for indicator, wins in fastest.items()}
+    logger.info(f"Fastest backend per indicator: {overrides}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+from benchmark_indicator_backends import best_time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Valuation time of the synthetic chains
+VALUATION_TIME = pd.Timestamp('2025-01-15 10:00')
+
+def make_chain(strikes, underlying=1000.0, expiry='2025-03-27', seed=42):
+    """Black-Scholes option chain response with a call and a put per strike, in the API wrapper format"""
+    from app.api.mock_api_wrapper import PRICE_TICK, smile_volatility
+    from app.utils.option_pricing import black_scholes_price, time_to_expiry
+    rng = np.random.default_rng(seed)
+    step = underlying * 0.5 / strikes
+    strike = np.round(underlying + step * (np.arange(strikes) - strikes // 2), 2)
+    time = float(time_to_expiry(expiry, now=VALUATION_TIME)[0])
+    iv = smile_volatility(np.log(strike / (underlying * np.exp(0.065 * time))), time, 0.2, -0.4, 0.3)
+    rows = []
+    for option_type in ('CE', 'PE'):
+        price = black_scholes_price(underlying, strike, time, iv, 0.065, 0.0, option_type == 'CE')
+        price = np.maximum(np.round(price / PRICE_TICK) * PRICE_TICK, PRICE_TICK)
+        for k, ltp, vol in zip(strike.tolist(), np.round(price, 2).tolist(), np.round(iv * 100, 2).tolist()):
+            # IVs quoted in percent as the feeds do
+            rows.append({
+                'strike': k,
+                'type': option_type,
+                'expiry': expiry,
+                'ltp': ltp,
+                'iv': vol,
+                'volume': int(rng.integers(100, 10000)),
+                'oi': int(rng.integers(1000, 100000))
+            })
+    return {'data': rows, 'underlying': underlying}
+
+def fitted_smile(chain, now):
+    """Volatility smile fitted from scratch"""
+    from app.utils.volatility_smile import VolatilitySmile
+    smile = VolatilitySmile()
+    smile.fit(chain, now=now)
+    return smile
+
+def main():
+    """Time option chain parsing and analysis"""
+    from app.utils.option_chain_analyzer import OptionChain, OptionChainAnalyzer
+    
+    analyzer = OptionChainAnalyzer(api_wrapper=None)
+    for strikes in [50, 200, 1000]:
+        response = make_chain(strikes)
+        parse_time, chain = best_time(lambda: OptionChain.from_response(response), repeats=50)
+        analyze_time, analysis = best_time(lambda: analyzer.analyze_chain(chain), repeats=50)
+        logger.info(
+            f"{strikes} strikes: parse {parse_time * 1000:.3f} ms, analyze {analyze_time * 1000:.3f} ms, "
+            f"PCR {analysis['put_call_ratio']:.3f}, ATM IV {analysis['implied_volatility']:.4f}, "
+            f"skew {analysis['iv_skew']:.4f}, max pain {analysis['max_pain']:.2f}"
+        )
+    
+    # Max pain of several expiries in one batch
+    expiries = ['2025-03-27', '2025-04-24', '2025-05-29', '2025-06-26', '2025-09-25']
+    for strikes in [200, 1000]:
+        rows = []
+        for seed, expiry in enumerate(expiries):
+            rows.extend(make_chain(strikes, expiry=expiry, seed=seed)['data'])
+        chain = OptionChain.from_response({'data': rows, 'underlying': 1000.0})
+        elapsed, pains = best_time(chain.max_pains, repeats=50)
+        logger.info(f"Max pain of {len(expiries)} expiries x {strikes} strikes: {elapsed * 1000:.3f} ms, {pains}")
+    
+    # Implied volatilities solved from prices, from scratch and warm-started
+    # from the previous snapshot after a small move of every price
+    now = VALUATION_TIME
+    rng = np.random.default_rng(7)
+    for strikes in [200, 1000]:
+        chain = OptionChain.from_response(make_chain(strikes))
+        previous = OptionChain.from_response(make_chain(strikes))
+        previous.solve_iv(rate=0.065, now=now)
+        chain.ltp = chain.ltp * (1 + rng.normal(0, 0.002, len(chain)))
+        initial = previous.aligned_iv(chain)
+        cold_time, solved = best_time(lambda: chain.solve_iv(rate=0.065, now=now), repeats=20)
+        warm_time, _ = best_time(lambda: chain.solve_iv(rate=0.065, initial=initial, now=now), repeats=20)
+        logger.info(
+            f"IV of {len(chain)} options: cold {cold_time * 1000:.3f} ms, warm {warm_time * 1000:.3f} ms, "
+            f"{np.isfinite(solved).sum()} solved"
+        )
+    
+    # Smile fits of several expiries and strike queries against them
+    for strikes in [200, 1000]:
+        rows = []
+        for seed, expiry in enumerate(expiries):
+            rows.extend(make_chain(strikes, expiry=expiry, seed=seed)['data'])
+        chain = OptionChain.from_response({'data': rows, 'underlying': 1000.0})
+        fit_time, smile = best_time(lambda: fitted_smile(chain, now), repeats=20)
+        refit_time, _ = best_time(lambda: smile.fit(chain, now=now), repeats=20)
+        queries = rng.uniform(800, 1200, 10000)
+        groups = rng.integers(0, len(expiries), len(queries))
+        query_time, _ = best_time(lambda: smile.iv(queries, groups), repeats=50)
+        delta_time, _ = best_time(lambda: smile.iv_at_delta(0.25, expiries[0]), repeats=50)
+        logger.info(
+            f"Smile of {len(expiries)} expiries x {strikes} strikes: fit {fit_time * 1000:.3f} ms, "
+            f"unchanged refit {refit_time * 1e6:.1f} us, {len(queries)} strike queries {query_time * 1000:.3f} ms, "
+            f"25-delta IV {delta_time * 1e6:.1f} us"
+        )
+    
+    # A trading day of minute snapshots where a tenth of the options change per minute
+    from app.utils.chain_history import ChainHistory
+    rows = []
+    for seed, expiry in enumerate(expiries[:2]):
+        rows.extend(make_chain(500, expiry=expiry, seed=seed)['data'])
+    opened = pd.Timestamp('2025-01-15 09:15')
+    with tempfile.TemporaryDirectory() as directory:
+        history = ChainHistory(directory)
+        raw_bytes = 0
+        started = time.perf_counter()
+        for minute in range(375):
+            for row in rows:
+                if rng.random() < 0.1:
+                    row['oi'] += int(rng.integers(-500, 2000))
+                    row['ltp'] = round(row['ltp'] * (1 + rng.normal(0, 0.01)), 2)
+            chain = OptionChain.from_response({'data': rows, 'underlying': 1000.0 + minute * 0.1})
+            history.record('NIFTY', chain, opened + pd.Timedelta(minutes=minute))
+            raw_bytes += len(chain) * 7 * 8
+        history.flush()
+        record_time = (time.perf_counter() - started) / 375
+        stored = sum(os.path.getsize(os.path.join(directory, 'NIFTY', name)) for name in os.listdir(os.path.join(directory, 'NIFTY')))
+        reopened = ChainHistory(directory)
+        snapshot_time, _ = best_time(lambda: reopened.snapshot('NIFTY', opened + pd.Timedelta(minutes=200)), repeats=20)
+        window_time, _ = best_time(lambda: reopened.oi_change('NIFTY', opened + pd.Timedelta(minutes=60), opened + pd.Timedelta(minutes=300)), repeats=20)
+        logger.info(
+            f"Chain history of {len(rows)} options x 375 minutes: {stored / 1024:.0f} KiB on disk vs "
+            f"{raw_bytes / 1024:.0f} KiB raw, record {record_time * 1000:.3f} ms (incl. parsing), "
+            f"snapshot {snapshot_time * 1000:.3f} ms, OI change {window_time * 1000:.3f} ms"
+        )
+
+    # Strategy search over the two nearest expiries of a solved chain
+    from app.utils.option_strategies import StrategyEngine
+    now = VALUATION_TIME
+    engine = StrategyEngine()
+    for strikes in [50, 200]:
+        rows = []
+        for seed, expiry in enumerate(expiries[:2]):
+            rows.extend(make_chain(strikes, expiry=expiry, seed=seed)['data'])
+        chain = OptionChain.from_response({'data': rows, 'underlying': 1000.0})
+        chain.solve_iv(now=now)
+        smile = fitted_smile(chain, now)
+        count = len(engine.candidates(chain, expiries=2))
+        elapsed, best = best_time(lambda: engine.search(chain, smile=smile, expiries=2, top=10), repeats=5)
+        logger.info(
+            f"Strategy search of {len(expiries[:2])} expiries x {strikes} strikes: {count} candidates in "
+            f"{elapsed * 1000:.3f} ms, best {best['strategy'].iloc[0]} {best['legs'].iloc[0]}"
+        )
+
+    # Mock chains of every listed expiry, refreshed a minute apart along the simulated path
+    from app.api.mock_api_wrapper import MockAPIWrapper
+    mock = MockAPIWrapper(api_key=None, secret_key=None, client_code=None)
+    logging.getLogger('app.api.mock_api_wrapper').setLevel(logging.WARNING)
+    mock_expiries = mock.get_expiry_dates('NIFTY')
+    
+    def refresh():
+        mock.advance(60)
+        return [mock.get_option_chain('NIFTY', expiry) for expiry in mock_expiries]
+    
+    elapsed, responses = best_time(refresh, repeats=20)
+    logger.info(
+        f"Mock chains of {len(mock_expiries)} expiries x {mock.strikes} strikes: {elapsed * 1000:.3f} ms per refresh, "
+        f"{sum(len(response['data']) for response in responses)} options, underlying {responses[0]['underlying']}"
+    )
+
+if __name__ == "__main__":
+    main()
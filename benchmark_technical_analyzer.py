@@ -0,0 +1,62 @@
+import logging
+import time
+import numpy as np
+import pandas as pd
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def make_history(bars, seed=42):
+    """Generate a random-walk OHLCV history"""
+    rng = np.random.default_rng(seed)
+    close = 1000 * np.cumprod(1 + rng.normal(0.0002, 0.01, bars))
+    open_ = close * (1 + rng.normal(0, 0.002, bars))
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.003, bars))),
+        'low': np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.003, bars))),
+        'close': close,
+        'volume': rng.integers(10000, 1000000, bars).astype(float)
+    }, index=pd.date_range('2000-01-01', periods=bars, freq='min'))
+
+def time_analyze(analyzer, data, repeats):
+    """Best-of-n wall time of analyzer.analyze(data)"""
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = analyzer.analyze(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    """Compare full and latest-only TechnicalAnalyzer.analyze"""
+    from app.utils.technical_analyzer import TechnicalAnalyzer
+    
+    full_analyzer = TechnicalAnalyzer()
+    latest_analyzer = TechnicalAnalyzer(latest_only=True)
+    
+    for bars in [10000, 100000]:
+        data = make_history(bars)
+        full_time, full_result = time_analyze(full_analyzer, data, repeats=5)
+        latest_time, latest_result = time_analyze(latest_analyzer, data, repeats=5)
+        
+        numeric_keys = [key for key, value in full_result.items() if isinstance(value, (int, float, np.floating))]
+        max_rel_diff = max(
+            abs(latest_result[key] - full_result[key]) / max(abs(full_result[key]), 1e-12)
+            for key in numeric_keys
+        )
+        same_signals = all(latest_result[key] == full_result[key] for key in ['trend', 'rsi_signal', 'macd_signal_value'])
+        
+        logger.info(
+            f"{bars} bars: full {full_time * 1000:.2f} ms, latest-only {latest_time * 1000:.2f} ms, "
+            f"speedup {full_time / latest_time:.1f}x, max relative difference {max_rel_diff:.2e}, "
+            f"same signals: {same_signals}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,22 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def make_ohlcv(bars, seed, start_price=1000.0):
+    """Random-walk OHLCV bars on business days, indexed like feed data (no frequency)"""
+    import numpy as np
+    
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    open_ = close * (1 + rng.normal(0, 0.003, bars))
+    spread = np.abs(rng.normal(0, 0.005, bars)) * close
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) + spread,
+        'low': np.minimum(open_, close) - spread,
+        'close': close,
+        'volume': rng.integers(1000, 100000, bars).astype(np.float64)
+    }, index=pd.DatetimeIndex(pd.bdate_range('2020-01-01', periods=bars).to_numpy()))
+
 def test_imports():
     """Test importing key modules"""
     logger.info("Testing imports...")
@@ -182,6 +198,59 @@ def test_data_processor():
         logger.error(f"✗ Error testing data processor: {str(e)}")
         return False
 
+def test_process_many():
+    """Test that process_many matches processing each symbol serially"""
+    logger.info("Testing parallel data processing...")
+    
+    try:
+        from app.utils.data_processor import DataProcessor
+        
+        data_processor = DataProcessor()
+        data = {f"SYM{i}": make_ohlcv(400 + 50 * i, seed=i) for i in range(4)}
+        parallel = data_processor.process_many(data, workers=2)
+        
+        for symbol, frame in data.items():
+            serial = data_processor.process(frame)
+            try:
+                pd.testing.assert_frame_equal(parallel[symbol], serial)
+            except AssertionError as e:
+                logger.error(f"✗ process_many differs from process for {symbol}: {str(e)}")
+                return False
+        
+        logger.info(f"✓ process_many matches serial processing for {len(data)} symbols")
+        return True
+    
+    except Exception as e:
+        logger.error(f"✗ Error testing parallel data processing: {str(e)}")
+        return False
+
+def test_precision_report():
+    """Test that float32 features stay within one float32 rounding of float64"""
+    logger.info("Testing float32 precision report...")
+    
+    try:
+        from app.utils.data_processor import DataProcessor
+        
+        data_processor = DataProcessor(precision='float32', rank_features={'volume': [20]})
+        report = data_processor.precision_report(make_ohlcv(600, seed=1))
+        logger.info(f"Saved {report['saved_pct']:.1f}% of memory, worst relative deviation "
+                    f"{report['max_rel_deviation']:.2e} in {report['worst_column']}")
+        
+        if report['bytes_saved'] <= 0:
+            logger.error("✗ float32 features use no less memory than float64")
+            return False
+        
+        if report['max_rel_deviation'] > 1e-7:
+            logger.error("✗ float32 features deviate by more than float32 rounding")
+            return False
+        
+        logger.info("✓ float32 features stay within float32 rounding")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing float32 precision report: {str(e)}")
+        return False
+
 def test_technical_analyzer():
     """Test the technical analyzer"""
     logger.info("Testing technical analyzer...")
@@ -230,6 +299,652 @@ def test_technical_analyzer():
         logger.error(f"✗ Error testing technical analyzer: {str(e)}")
         return False
 
+def test_analyze_many():
+    """Test that analyzing a panel matches analyzing each symbol on its own"""
+    logger.info("Testing panel technical analysis...")
+    
+    try:
+        import numpy as np
+        from app.utils.technical_analyzer import TechnicalAnalyzer
+        
+        technical_analyzer = TechnicalAnalyzer()
+        panel = {f"SYM{i}": make_ohlcv(300, seed=i) for i in range(3)}
+        table = technical_analyzer.analyze_many(panel)
+        
+        for symbol, data in panel.items():
+            indicators = technical_analyzer.analyze(data)
+            for column in table.columns:
+                batch, single = table.loc[symbol, column], indicators[column]
+                if isinstance(single, str):
+                    matches = batch == single
+                else:
+                    matches = np.isclose(batch, single, rtol=1e-9, equal_nan=True)
+                if not matches:
+                    logger.error(f"✗ {symbol} {column}: analyze_many gave {batch}, analyze gave {single}")
+                    return False
+        
+        logger.info(f"✓ analyze_many matches analyze on {len(table.columns)} columns")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing panel technical analysis: {str(e)}")
+        return False
+
+def test_screener():
+    """Test that a screen matches the same condition applied by hand"""
+    logger.info("Testing universe screener...")
+    
+    try:
+        from app.utils.screener import Screener
+        
+        screener = Screener()
+        panel = {f"SYM{i}": make_ohlcv(300, seed=i) for i in range(12)}
+        table = screener.build_table(panel)
+        matches = screener.screen(panel, "rsi < 55 and close > sma_20", rank_by="rsi")
+        
+        expected = table[(table['rsi'] < 55) & (table['close'] > table['sma_20'])].sort_values('rsi', ascending=False)
+        if list(matches.index) != list(expected.index):
+            logger.error(f"✗ Screen returned {list(matches.index)}, expected {list(expected.index)}")
+            return False
+        
+        try:
+            screener.screen(table, "__import__('os').system('true')")
+            logger.error("✗ Screener evaluated a function call")
+            return False
+        except ValueError:
+            pass
+        
+        logger.info(f"✓ Screen matched {len(matches)} of {len(table)} symbols as expected")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing universe screener: {str(e)}")
+        return False
+
+def test_correlation_monitor():
+    """Test the incrementally updated correlation matrix against a full recomputation"""
+    logger.info("Testing correlation monitor...")
+    
+    try:
+        import numpy as np
+        from app.utils.correlation_monitor import CorrelationMonitor
+        
+        closes = pd.DataFrame({f"SYM{i}": make_ohlcv(600, seed=i)['close'] for i in range(5)})
+        monitor = CorrelationMonitor(list(closes.columns), window=60)
+        monitor.seed(closes.iloc[:100])
+        added = monitor.update_many(closes)
+        
+        returns = closes.pct_change().to_numpy()[-monitor.window:]
+        expected = np.corrcoef(returns, rowvar=False)
+        error = np.max(np.abs(monitor.correlation_matrix() - expected))
+        logger.info(f"Added {added} bars, maximum correlation error {error:.2e}")
+        
+        if added != len(closes) - 100 or error > 1e-9:
+            logger.error("✗ Incremental correlations differ from np.corrcoef")
+            return False
+        
+        logger.info("✓ Incremental correlations match np.corrcoef")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing correlation monitor: {str(e)}")
+        return False
+
+def test_pattern_engine():
+    """Test that incremental candlestick scans find the same patterns as one full scan"""
+    logger.info("Testing candlestick pattern engine...")
+    
+    try:
+        from app.utils.pattern_engine import PatternEngine
+        
+        panel = {f"SYM{i}": make_ohlcv(400, seed=i) for i in range(3)}
+        incremental = PatternEngine()
+        for end in (150, 151, 230, 400):
+            batch = {symbol: data.iloc[:end].copy() for symbol, data in panel.items()}
+            # The newest bar is still forming: the next scan must replace its detections
+            for data in batch.values():
+                data.iloc[-1, data.columns.get_loc('close')] = data['high'].iloc[-1]
+            incremental.scan(batch)
+        incremental.scan(panel)
+        
+        full = PatternEngine()
+        full.scan(panel)
+        
+        columns = ['symbol', 'pattern', 'bar']
+        expected = full.detections.sort_values(columns).reset_index(drop=True)
+        found = incremental.detections.sort_values(columns).reset_index(drop=True)
+        try:
+            pd.testing.assert_frame_equal(found, expected, check_dtype=False)
+        except AssertionError as e:
+            logger.error(f"✗ Incremental scans differ from a full scan: {str(e)}")
+            return False
+        
+        logger.info(f"✓ Incremental scans found the same {len(expected)} patterns as a full scan")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing candlestick pattern engine: {str(e)}")
+        return False
+
+def test_rolling_rank():
+    """Test rolling percentile ranks against pandas, in batch and streaming"""
+    logger.info("Testing rolling percentile ranks...")
+    
+    try:
+        import numpy as np
+        from app.utils.rolling_kernels import rolling_rank
+        from app.utils.streaming_indicators import RollingRank
+        
+        # Rounded prices produce ties; a NaN gap checks the windows around it
+        rng = np.random.default_rng(7)
+        values = np.round(100 + np.cumsum(rng.normal(0, 1, 6000)), 0)
+        values[3000:3010] = np.nan
+        series = pd.Series(values)
+        
+        # Short windows use sliding window views, long ones a sorted block list
+        for window in (20, 2500):
+            for method in ('average', 'min', 'max'):
+                expected = series.rolling(window).rank(method=method, pct=True).to_numpy()
+                batch = rolling_rank(values, window, method=method)
+                streaming = RollingRank(window, method=method)
+                stream = np.array([streaming.update(value) for value in values.tolist()])
+                for name, result in (("rolling_rank", batch), ("RollingRank", stream)):
+                    if not np.allclose(result, expected, rtol=0, atol=1e-12, equal_nan=True):
+                        logger.error(f"✗ {name} differs from pandas for window {window}, method {method}")
+                        return False
+        
+        logger.info("✓ Rolling percentile ranks match pandas")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing rolling percentile ranks: {str(e)}")
+        return False
+
+def test_option_chain():
+    """Test option chain parsing and analytics on a small hand-made chain"""
+    logger.info("Testing option chain analytics...")
+    
+    try:
+        import numpy as np
+        from app.utils.option_chain_analyzer import OptionChain
+        
+        # strike: (call ltp, call IV %, call volume, call OI, put ltp, put IV %, put volume, put OI)
+        quotes = {
+            90: (12.0, 25.0, 10, 100, 1.0, 30.0, 40, 40),
+            100: (5.0, 20.0, 50, 200, 4.0, 22.0, 60, 300),
+            110: (1.5, 18.0, 20, 50, 11.0, 20.0, 5, 120)
+        }
+        flat_rows, leg_rows = [], []
+        for strike, (c_ltp, c_iv, c_volume, c_oi, p_ltp, p_iv, p_volume, p_oi) in quotes.items():
+            flat_rows.append({'strike': strike, 'type': 'CE', 'ltp': c_ltp, 'iv': c_iv, 'volume': c_volume,
+                              'oi': c_oi, 'expiry': '2030-01-31'})
+            flat_rows.append({'strike': strike, 'type': 'PE', 'ltp': p_ltp, 'iv': p_iv, 'volume': p_volume,
+                              'oi': p_oi, 'expiry': '2030-01-31'})
+            leg_rows.append({
+                'strikePrice': strike, 'expiryDate': '2030-01-31',
+                'CE': {'lastPrice': c_ltp, 'impliedVolatility': c_iv, 'totalTradedVolume': c_volume, 'openInterest': c_oi},
+                'PE': {'lastPrice': p_ltp, 'impliedVolatility': p_iv, 'totalTradedVolume': p_volume, 'openInterest': p_oi}
+            })
+        
+        chain = OptionChain.from_response({'data': flat_rows, 'underlying': 100.0})
+        legs = OptionChain.from_response(leg_rows, underlying=100.0)
+        for column in ('strike', 'is_call', 'ltp', 'iv', 'volume', 'oi', 'expiry'):
+            if not np.array_equal(getattr(chain, column), getattr(legs, column)):
+                logger.error(f"✗ Flat and per-strike rows parse to different {column} columns")
+                return False
+        
+        checks = [
+            ("IV as a fraction", chain.iv[0], 0.25),
+            ("PCR by OI", chain.put_call_ratios()[0], 460 / 350),
+            ("PCR by volume", chain.put_call_ratios()[1], 105 / 80),
+            ("ATM IV", chain.atm_iv()[0], 0.21),
+            ("ATM strike", chain.atm_iv()[1], 100.0),
+            ("IV skew", chain.iv_skew(moneyness=0.1), 0.30 - 0.18)
+        ]
+        for name, value, expected in checks:
+            if not np.isclose(value, expected, rtol=1e-12):
+                logger.error(f"✗ {name} is {value}, expected {expected}")
+                return False
+        
+        logger.info("✓ Option chain parsing and analytics are correct")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing option chain analytics: {str(e)}")
+        return False
+
+def test_max_pain():
+    """Test batched max pain against a brute-force search over every strike"""
+    logger.info("Testing max pain...")
+    
+    try:
+        import numpy as np
+        from app.utils.option_chain_analyzer import max_pain_by_group
+        
+        rng = np.random.default_rng(3)
+        size = 600
+        groups = rng.integers(0, 4, size)
+        strike = rng.integers(80, 121, size).astype(np.float64) * 5
+        is_call = rng.random(size) < 0.5
+        oi = np.where(rng.random(size) < 0.2, 0.0, rng.integers(1, 5000, size).astype(np.float64))
+        
+        group_ids, strikes, pains = max_pain_by_group(strike, oi, is_call, groups)
+        
+        for group, max_pain, pain in zip(group_ids, strikes, pains):
+            mask = (groups == group) & (oi > 0)
+            candidates = np.unique(strike[mask])
+            call = mask & is_call
+            put = mask & ~is_call
+            totals = np.array([
+                np.sum(oi[call] * np.maximum(k - strike[call], 0)) + np.sum(oi[put] * np.maximum(strike[put] - k, 0))
+                for k in candidates
+            ])
+            expected = candidates[np.argmin(totals)]
+            if max_pain != expected or not np.isclose(pain, totals.min(), rtol=1e-12):
+                logger.error(f"✗ Max pain of group {group} is {max_pain}, brute force gives {expected}")
+                return False
+        
+        if list(group_ids) != sorted(set(groups[oi > 0])):
+            logger.error(f"✗ Max pain returned groups {list(group_ids)}")
+            return False
+        
+        logger.info(f"✓ Max pain matches brute force for {len(group_ids)} expiries")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing max pain: {str(e)}")
+        return False
+
+def test_implied_volatility():
+    """Test that implied volatilities recover the volatilities options were priced with"""
+    logger.info("Testing implied volatility solver...")
+    
+    try:
+        import numpy as np
+        from app.utils.option_pricing import black_scholes_greeks, black_scholes_price, implied_volatility
+        
+        rng = np.random.default_rng(5)
+        size = 2000
+        spot, rate, dividend = 100.0, 0.065, 0.01
+        strike = rng.uniform(80, 120, size)
+        time = rng.uniform(0.02, 1.0, size)
+        volatility = rng.uniform(0.1, 0.8, size)
+        is_call = rng.random(size) < 0.5
+        
+        price = black_scholes_price(spot, strike, time, volatility, rate, dividend, is_call)
+        solved = implied_volatility(price, spot, strike, time, rate, dividend, is_call)
+        warm, iterations = implied_volatility(price, spot, strike, time, rate, dividend, is_call,
+                                              initial=solved, return_iterations=True)
+        
+        # Deep in-the-money options with no vega left carry no volatility information
+        vega = black_scholes_greeks(spot, strike, time, volatility, rate, dividend, is_call)['vega']
+        identifiable = vega > 1e-4
+        error = np.max(np.abs(solved[identifiable] - volatility[identifiable]))
+        warm_error = np.max(np.abs(warm[identifiable] - volatility[identifiable]))
+        logger.info(f"Maximum IV error {error:.2e} cold, {warm_error:.2e} warm-started")
+        
+        if error > 1e-6 or warm_error > 1e-6:
+            logger.error("✗ Implied volatilities do not recover the pricing volatilities")
+            return False
+        
+        if iterations[identifiable].max() > 2:
+            logger.error(f"✗ Warm-started solve took {iterations[identifiable].max()} iterations")
+            return False
+        
+        # A call cannot be worth more than the underlying
+        if not np.isnan(implied_volatility(150.0, spot, 100.0, 0.5)).all():
+            logger.error("✗ Implied volatility solved for a price above the no-arbitrage bound")
+            return False
+        
+        logger.info("✓ Implied volatilities round-trip through Black-Scholes prices")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing implied volatility solver: {str(e)}")
+        return False
+
+def test_greeks_surface():
+    """Test Greeks against finite differences and cached updates against a full recomputation"""
+    logger.info("Testing option Greeks...")
+    
+    try:
+        import numpy as np
+        from app.api.mock_api_wrapper import MockAPIWrapper
+        from app.utils.option_chain_analyzer import OptionChain
+        from app.utils.option_greeks import GreeksSurface
+        from app.utils.option_pricing import DAYS_PER_YEAR, black_scholes_greeks, black_scholes_price
+        
+        # Central differences of the price
+        spot, rate, dividend = 100.0, 0.065, 0.01
+        strike = np.array([80.0, 95.0, 100.0, 105.0, 120.0] * 2)
+        time, volatility = 0.25, 0.3
+        is_call = np.repeat([True, False], 5)
+        
+        def price(spot=spot, time=time, volatility=volatility):
+            return black_scholes_price(spot, strike, time, volatility, rate, dividend, is_call)
+        
+        h = 1e-3
+        expected = {
+            'delta': (price(spot=spot + h) - price(spot=spot - h)) / (2 * h),
+            'gamma': (price(spot=spot + h) - 2 * price() + price(spot=spot - h)) / h ** 2,
+            'vega': (price(volatility=volatility + h) - price(volatility=volatility - h)) / (2 * h) / 100,
+            'theta': -(price(time=time + h) - price(time=time - h)) / (2 * h) / DAYS_PER_YEAR
+        }
+        greeks = black_scholes_greeks(spot, strike, time, volatility, rate, dividend, is_call)
+        for greek, values in expected.items():
+            if not np.allclose(greeks[greek], values, rtol=1e-4, atol=1e-6):
+                logger.error(f"✗ {greek} differs from finite differences")
+                return False
+        
+        # A new quote for one option recomputes only that option
+        api_wrapper = MockAPIWrapper(api_key="mock", secret_key="mock", client_code="mock")
+        now = api_wrapper.now()
+        chain = OptionChain.from_response(api_wrapper.get_option_chain("NIFTY"))
+        surface = GreeksSurface(rate=rate)
+        surface.update(chain, now=now)
+        
+        ltp, iv = chain.ltp.copy(), chain.iv.copy()
+        ltp[10] += 1.0
+        iv[10] *= 1.1
+        quoted = OptionChain(chain.strike, chain.is_call, ltp, iv, chain.volume, chain.oi,
+                             expiry=chain.expiry, underlying=chain.underlying)
+        cached = surface.update(quoted, now=now)
+        full = GreeksSurface(rate=rate).update(quoted, now=now)
+        
+        if surface.recomputed != 1:
+            logger.error(f"✗ Greeks surface recomputed {surface.recomputed} options for one new quote")
+            return False
+        
+        for greek in full:
+            if not np.array_equal(cached[greek], full[greek], equal_nan=True):
+                logger.error(f"✗ Cached {greek} differs from a full recomputation")
+                return False
+        
+        logger.info("✓ Greeks match finite differences and cached updates match a full recomputation")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing option Greeks: {str(e)}")
+        return False
+
+def test_volatility_smile():
+    """Test that fitted smiles pass through the out-of-the-money IVs and invert deltas"""
+    logger.info("Testing volatility smile...")
+    
+    try:
+        import numpy as np
+        from app.utils.option_chain_analyzer import OptionChain
+        from app.utils.option_pricing import black_scholes_greeks
+        from app.utils.volatility_smile import VolatilitySmile
+        
+        now = pd.Timestamp('2030-01-01 10:00')
+        strikes = np.arange(80.0, 121.0, 5.0)
+        put_iv = 0.2 + 0.004 * (100 - strikes).clip(0)
+        call_iv = 0.18 + 0.002 * (strikes - 100).clip(0)
+        expiries = ['2030-01-31', '2030-03-28']
+        size = len(strikes)
+        chain = OptionChain(
+            strike=np.tile(strikes, 4),
+            is_call=np.tile(np.repeat([True, False], size), 2),
+            ltp=np.ones(4 * size),
+            # Later expiries are quoted a bit higher
+            iv=np.concatenate([call_iv, put_iv, call_iv + 0.02, put_iv + 0.02]),
+            volume=np.ones(4 * size),
+            oi=np.ones(4 * size),
+            expiry=np.repeat(expiries, 2 * size),
+            underlying=100.0
+        )
+        
+        smile = VolatilitySmile(rate=0.065)
+        smile.fit(chain, now=now)
+        
+        for offset, expiry in zip((0.0, 0.02), expiries):
+            forward = smile.forwards[smile.expiry_index(expiry)]
+            expected = np.where(strikes < forward, put_iv, call_iv) + offset
+            if not np.allclose(smile.iv(strikes, expiry), expected, rtol=0, atol=1e-12):
+                logger.error(f"✗ Smile of {expiry} does not pass through the out-of-the-money IVs")
+                return False
+            
+            # Monotone between knots and flat beyond them
+            between = smile.iv(strikes[:-1] + 2.5, expiry)
+            low, high = np.minimum(expected[:-1], expected[1:]), np.maximum(expected[:-1], expected[1:])
+            if np.any(between < low - 1e-12) or np.any(between > high + 1e-12):
+                logger.error(f"✗ Smile of {expiry} overshoots between strikes")
+                return False
+            if not np.allclose(smile.iv([50.0, 150.0], expiry), expected[[0, -1]], rtol=0, atol=1e-12):
+                logger.error(f"✗ Smile of {expiry} is not flat beyond the listed strikes")
+                return False
+        
+        strike = smile.strike_at_delta(0.25, expiries[0])
+        time = smile.times[0]
+        delta = black_scholes_greeks(100.0, strike, time, smile.iv(strike, expiries[0]), rate=0.065)['delta']
+        if abs(delta - 0.25) > 1e-6:
+            logger.error(f"✗ Strike at 25 delta has a delta of {delta}")
+            return False
+        
+        if smile.fit(chain, now=now) != 0:
+            logger.error("✗ Refitting an unchanged chain refitted expiries")
+            return False
+        
+        logger.info("✓ Volatility smiles fit the quoted IVs and invert deltas")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing volatility smile: {str(e)}")
+        return False
+
+def test_chain_history():
+    """Test that recorded option chain snapshots replay exactly, in memory and from disk"""
+    logger.info("Testing option chain history...")
+    
+    try:
+        import tempfile
+        from app.api.mock_api_wrapper import MockAPIWrapper
+        from app.utils.chain_history import ChainHistory
+        from app.utils.option_chain_analyzer import OptionChain
+        
+        def as_frame(chain):
+            frame = pd.DataFrame({
+                'expiry': chain.expiry.astype(str), 'strike': chain.strike, 'is_call': chain.is_call,
+                'ltp': chain.ltp, 'iv': chain.quoted_iv, 'volume': chain.volume, 'oi': chain.oi
+            })
+            return frame.sort_values(['expiry', 'strike', 'is_call']).reset_index(drop=True)
+        
+        api_wrapper = MockAPIWrapper(api_key="mock", secret_key="mock", client_code="mock")
+        start = pd.Timestamp('2030-01-01 10:00')
+        recorded = []
+        for i in range(10):
+            chain = OptionChain.from_response(api_wrapper.get_option_chain("NIFTY"))
+            if i % 3 == 2:
+                # Some options drop out of the feed now and then
+                chain = OptionChain(chain.strike[5:], chain.is_call[5:], chain.ltp[5:], chain.iv[5:],
+                                    chain.volume[5:], chain.oi[5:], expiry=chain.expiry[5:],
+                                    underlying=chain.underlying)
+            recorded.append((start + pd.Timedelta(minutes=i), chain))
+            api_wrapper.advance(60)
+        
+        with tempfile.TemporaryDirectory() as directory:
+            in_memory = ChainHistory(segment_length=4)
+            on_disk = ChainHistory(directory=directory, segment_length=4)
+            for timestamp, chain in recorded:
+                in_memory.record("NIFTY", chain, timestamp)
+                on_disk.record("NIFTY", chain, timestamp)
+            on_disk.flush()
+            
+            for name, history in (("memory", in_memory), ("disk", ChainHistory(directory=directory))):
+                if history.snapshot("NIFTY", start - pd.Timedelta(minutes=1)) is not None:
+                    logger.error(f"✗ History in {name} returned a chain before the first snapshot")
+                    return False
+                
+                for timestamp, chain in recorded:
+                    # Queries between snapshots see the last one before them
+                    replayed, at = history.snapshot("NIFTY", timestamp + pd.Timedelta(seconds=30), with_time=True)
+                    try:
+                        pd.testing.assert_frame_equal(as_frame(replayed), as_frame(chain))
+                    except AssertionError as e:
+                        logger.error(f"✗ Snapshot at {timestamp} from {name} differs: {str(e)}")
+                        return False
+                    if at != timestamp or replayed.underlying != chain.underlying:
+                        logger.error(f"✗ Snapshot at {timestamp} from {name} has the wrong time or underlying")
+                        return False
+        
+        logger.info(f"✓ All {len(recorded)} snapshots replay exactly in memory and from disk")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing option chain history: {str(e)}")
+        return False
+
+def test_oi_buildup():
+    """Test open interest build-up classification across chain refreshes"""
+    logger.info("Testing OI build-up...")
+    
+    try:
+        import numpy as np
+        from app.utils.oi_buildup import BUILDUP_LABELS, OIBuildupTracker, classify_buildup
+        from app.utils.option_chain_analyzer import OptionChain
+        
+        codes = classify_buildup([1, -1, 1, -1, 0, 1, np.nan], [1, 1, -1, -1, 1, 0, 1])
+        expected = ['long_buildup', 'short_buildup', 'short_covering', 'long_unwinding', 'neutral', 'neutral', 'neutral']
+        if [BUILDUP_LABELS[code] for code in codes] != expected:
+            logger.error(f"✗ classify_buildup gave {[BUILDUP_LABELS[code] for code in codes]}")
+            return False
+        
+        def chain(ltp, oi, underlying):
+            return OptionChain([100.0, 100.0, 110.0, 110.0], [True, False, True, False], ltp,
+                               [0.2] * 4, [10] * 4, oi, expiry=['2030-01-31'] * 4, underlying=underlying)
+        
+        tracker = OIBuildupTracker()
+        start = pd.Timestamp('2030-01-01 10:00')
+        tracker.update("NIFTY", chain([5.0, 4.0, 2.0, 9.0], [100, 100, 100, 100], 100.0), start)
+        # Price and OI up, price down and OI up, price up and OI down, price only
+        tracker.update("NIFTY", chain([6.0, 3.0, 2.5, 8.0], [150, 130, 80, 100], 101.0), start + pd.Timedelta(minutes=1))
+        # A price move without an OI update keeps the classification...
+        tracker.update("NIFTY", chain([7.0, 3.0, 2.5, 8.0], [150, 130, 80, 100], 101.0), start + pd.Timedelta(minutes=2))
+        # ...and the next OI update is measured from the last one
+        reclassified = tracker.update("NIFTY", chain([5.5, 3.0, 2.5, 8.0], [120, 130, 80, 100], 99.0),
+                                      start + pd.Timedelta(minutes=3))
+        
+        table = tracker.table("NIFTY")
+        expected = ['long_unwinding', 'short_buildup', 'short_covering', 'neutral']
+        if list(table['buildup']) != expected or reclassified != 1:
+            logger.error(f"✗ Option build-ups are {list(table['buildup'])}, expected {expected}")
+            return False
+        if table['oi_change'].iloc[0] != -30 or table['ltp_change'].iloc[0] != -0.5:
+            logger.error("✗ OI and price changes are not measured from the previous OI update")
+            return False
+        
+        # Total OI fell by 30 as the underlying fell by 2 from the previous OI update
+        underlying = tracker.underlying("NIFTY")
+        if underlying['buildup'] != 'long_unwinding' or underlying['oi_change'] != -30 or underlying['price_change'] != -2.0:
+            logger.error(f"✗ Underlying build-up is {underlying}")
+            return False
+        
+        logger.info("✓ OI build-ups are classified from OI updates")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing OI build-up: {str(e)}")
+        return False
+
+def test_option_strategies():
+    """Test vectorized strategy payoffs and statistics against leg-by-leg evaluation"""
+    logger.info("Testing option strategies...")
+    
+    try:
+        import numpy as np
+        from app.api.mock_api_wrapper import MockAPIWrapper
+        from app.utils.option_chain_analyzer import OptionChain
+        from app.utils.option_strategies import StrategyEngine, payoff_statistics
+        
+        api_wrapper = MockAPIWrapper(api_key="mock", secret_key="mock", client_code="mock")
+        chain = OptionChain.from_response(api_wrapper.get_option_chain("NIFTY"))
+        engine = StrategyEngine(rate=0.065)
+        strategies = engine.candidates(chain)
+        if not len(strategies):
+            logger.error("✗ No candidate strategies on the mock chain")
+            return False
+        
+        # Every kink of the payoffs lies on the grid
+        prices = np.unique(np.r_[np.linspace(0.0, 2 * chain.underlying, 401), chain.strike])
+        grid = engine.payoff_grid(chain, strategies, prices)
+        
+        sample = np.random.default_rng(9).choice(len(strategies), min(300, len(strategies)), replace=False)
+        for row in sample:
+            legs = [(chain.strike[option], chain.is_call[option], chain.ltp[option], quantity)
+                    for option, quantity in zip(strategies.option[row], strategies.quantity[row]) if option >= 0]
+            expected = -sum(quantity * ltp for _, _, ltp, quantity in legs)
+            for strike, is_call, _, quantity in legs:
+                expected = expected + quantity * (np.maximum(prices - strike, 0) if is_call else np.maximum(strike - prices, 0))
+            if not np.allclose(grid[row], expected, rtol=0, atol=1e-9):
+                logger.error(f"✗ Payoff of strategy {row} differs from its legs")
+                return False
+        
+        strike, is_call, ltp = strategies.legs(chain)
+        premium = (strategies.quantity * ltp).sum(axis=1)
+        stats = payoff_statistics(strike, is_call, strategies.quantity, premium)
+        bounded = np.isfinite(stats['max_profit'])
+        if not np.allclose(stats['max_profit'][bounded], grid[bounded].max(axis=1), rtol=0, atol=1e-9):
+            logger.error("✗ Maximum profits differ from the payoff grid")
+            return False
+        bounded = np.isfinite(stats['max_loss'])
+        if not np.allclose(stats['max_loss'][bounded], grid[bounded].min(axis=1), rtol=0, atol=1e-9):
+            logger.error("✗ Maximum losses differ from the payoff grid")
+            return False
+        
+        breakevens = stats['breakevens']
+        rows, legs = np.nonzero(~np.isnan(breakevens))
+        at_breakevens = engine.payoff_grid(chain, strategies.take(rows), breakevens[rows, legs][:, None])
+        if len(rows) and np.abs(at_breakevens).max() > 1e-9:
+            logger.error("✗ Strategies do not break even at their breakevens")
+            return False
+        
+        logger.info(f"✓ Payoffs and statistics of {len(strategies)} strategies match their legs")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing option strategies: {str(e)}")
+        return False
+
+def test_streaming_bollinger():
+    """Test streaming Bollinger Bands against TA-Lib after a long run of ticks"""
+    logger.info("Testing streaming Bollinger Bands...")
+    
+    try:
+        import numpy as np
+        import talib
+        from app.utils.streaming_indicators import BollingerBands, SMA
+        
+        # Two million ticks near 20000 with a small spread, where running
+        # sums of prices and squared prices used to cancel catastrophically
+        rng = np.random.default_rng(42)
+        prices = 20000 + np.cumsum(rng.normal(0, 0.01, 2_000_000))
+        bbands = BollingerBands(20, 2.0)
+        sma = SMA(50)
+        for price in prices.tolist():
+            bbands.update(price)
+            sma.update(price)
+        
+        # TA-Lib on the tail is unaffected by the ticks before it
+        upper, middle, lower = talib.BBANDS(prices[-500:], timeperiod=20, nbdevup=2.0, nbdevdn=2.0, matype=0)
+        expected_sma = talib.SMA(prices[-500:], timeperiod=50)[-1]
+        stream_upper, stream_middle, stream_lower = bbands.value()
+        
+        expected_width = upper[-1] - middle[-1]
+        width_error = abs((stream_upper - stream_middle) - expected_width) / expected_width
+        logger.info(f"Band width relative error: {width_error:.2e}")
+        
+        if width_error > 1e-6 or abs(stream_middle - middle[-1]) > 1e-6 or abs(sma.value() - expected_sma) > 1e-6:
+            logger.error("✗ Streaming Bollinger Bands drifted from TA-Lib")
+            return False
+        
+        logger.info("✓ Streaming Bollinger Bands match TA-Lib")
+        return True
+        
+    except Exception as e:
+        logger.error(f"✗ Error testing streaming Bollinger Bands: {str(e)}")
+        return False
+
 def test_flask_app():
     """Test the Flask app"""
     logger.info("Testing Flask app...")
@@ -279,7 +994,23 @@ def main():
         ("Import Test", test_imports),
         ("Mock API Test", test_mock_api),
         ("Data Processor Test", test_data_processor),
+        ("Parallel Processing Test", test_process_many),
+        ("Precision Report Test", test_precision_report),
         ("Technical Analyzer Test", test_technical_analyzer),
+        ("Panel Analysis Test", test_analyze_many),
+        ("Screener Test", test_screener),
+        ("Correlation Monitor Test", test_correlation_monitor),
+        ("Pattern Engine Test", test_pattern_engine),
+        ("Rolling Rank Test", test_rolling_rank),
+        ("Option Chain Test", test_option_chain),
+        ("Max Pain Test", test_max_pain),
+        ("Implied Volatility Test", test_implied_volatility),
+        ("Greeks Test", test_greeks_surface),
+        ("Volatility Smile Test", test_volatility_smile),
+        ("Chain History Test", test_chain_history),
+        ("OI Build-up Test", test_oi_buildup),
+        ("Option Strategies Test", test_option_strategies),
+        ("Streaming Bollinger Test", test_streaming_bollinger),
         ("Flask App Test", test_flask_app)
     ]
     